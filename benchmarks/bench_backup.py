@@ -0,0 +1,74 @@
+# bench_backup.py
+"""
+Kopia zapasowa bazy (backup_database, API backup SQLite) vs eksport wszystkich trzech
+tabel do CSV (export_all) - czas, rozmiar pliku i szybkość; dodatkowo czas przywrócenia
+kopii (restore_database).
+
+Uruchomienie:
+    python -m benchmarks.bench_backup [liczba_wierszy]
+
+Domyślnie 1 000 000 wierszy w każdej tabeli (Customers, Books, Purchases). Kompresja
+zstd wymaga pakietu zstandard - bez niego jest pomijana. Baza tworzona jest w katalogu
+tymczasowym, baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from bookstore import utilities, file_manager, backup, cache
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+
+
+def main(rows=1_000_000):
+    cache.disable()
+    try:
+        import zstandard  # noqa: F401
+        compressions = [None, "gzip", "zstd"]
+    except ImportError:
+        print("Brak pakietu zstandard - pomijanie kompresji zstd.")
+        compressions = [None, "gzip"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        generated = generate_database(db_path, "1k", end_date=END_DATE, books=rows, customers=rows, purchases=rows)
+        print(f"Wygenerowano po {rows} wierszy w {generated['seconds']:.0f} s.\n")
+        file_manager.CSV_DIR = directory
+        backup.BACKUP_DIR = os.path.join(directory, "backups")
+
+        print(f"{'wariant':<28} {'rozmiar [MB]':>13} {'czas [s]':>9} {'kopiowanie stron [s]':>21} {'stron/s':>9}")
+        for compression in compressions:
+            result = file_manager.export_all(file_format="csv", compression=compression)
+            assert result["code"] == 200, result["message"]
+            size = sum(table["bytes"] for table in result["data"]["tables"].values())
+            print(f"{'export_all CSV ' + (compression or ''):<28} {size / 2 ** 20:>13.1f} "
+                  f"{result['data']['seconds']:>9.2f}")
+            for table in result["data"]["tables"].values():
+                os.remove(table["path"])
+
+        backups = []
+        for compression in compressions:
+            result = backup.backup_database(compression=compression,
+                                            filename="bench.db" + backup.BACKUP_COMPRESSIONS.get(compression, ""))
+            assert result["code"] == 200, result["message"]
+            data = result["data"]
+            backups.append(data["path"])
+            print(f"{'backup_database ' + (compression or ''):<28} {data['file_bytes'] / 2 ** 20:>13.1f} "
+                  f"{data['seconds']:>9.2f} {data['copy_seconds']:>21.2f} {data['pages_per_sec']:>9.0f}")
+        print("(czas kopii obejmuje weryfikację PRAGMA quick_check i kompresję)\n")
+
+        print(f"{'przywrócenie':<28} {'czas [s]':>9} {'dekompresja [s]':>16} {'weryfikacja [s]':>16} "
+              f"{'punkt kontrolny [s]':>20} {'stron/s':>9}")
+        for path in backups:
+            result = backup.restore_database(path)
+            assert result["code"] == 200, result["message"]
+            data = result["data"]
+            print(f"{os.path.basename(path):<28} {data['seconds']:>9.2f} {data['decompress_seconds']:>16.2f} "
+                  f"{data['verify_seconds']:>16.2f} {data['checkpoint_seconds']:>20.2f} {data['pages_per_sec']:>9.0f}")
+        utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
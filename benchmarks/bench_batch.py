@@ -0,0 +1,121 @@
+# bench_batch.py
+"""
+Tryb wsadowy CLI (python -m bookstore batch): przepustowość pliku JSONL z operacjami
+przy różnych rozmiarach grupy transakcji oraz, dla porównania, osobny proces
+`python -m bookstore <funkcja>` na każdą operację (dotychczasowy sposób skryptowania).
+
+Uruchomienie:
+    python -m benchmarks.bench_batch [liczba_operacji] [rozmiar_grupy ...]
+
+Domyślnie 100 000 operacji (40% buy_book, 25% add_book, 15% register_customer,
+10% update_book_stock, 10% get_book) i grupy 1, 100, 1000 i 10 000 operacji. Grupa 1
+odpowiada osobnej transakcji dla każdej operacji. Każdy przebieg wykonywany jest na
+świeżej kopii bazy w katalogu tymczasowym, baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import subprocess
+from datetime import datetime
+
+from bookstore import utilities, cache
+from bookstore.__main__ import run_batch
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+GROUP_SIZES = [1, 100, 1000, 10_000]
+PROCESS_SAMPLE = 20  # Liczba operacji mierzonych w trybie "proces na operację"
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_operations(path, db_path, count, seed=42):
+    """Zapisuje `count` losowych operacji (na istniejących klientach i książkach) do pliku JSONL."""
+    rng = random.Random(seed)
+    utilities.configure_pool(db_path)
+    with utilities.get_connection() as conn:
+        customer_ids = [row[0] for row in conn.execute("SELECT CustomerID FROM Customers;")]
+        book_ids = [row[0] for row in conn.execute("SELECT BookID FROM Books;")]
+        # Zapas stanu, aby zakupy nie kończyły się kodem 400
+        conn.execute("UPDATE Books SET Stock = Stock + ?;", (count,))
+        conn.commit()
+    utilities.get_pool().close()
+
+    with open(path, "w", encoding="utf-8") as file:
+        for number in range(count):
+            kind = rng.random()
+            if kind < 0.40:
+                operation = {"op": "buy_book", "args": [rng.choice(customer_ids), str(rng.choice(book_ids)),
+                                                        rng.randint(1, 3)]}
+            elif kind < 0.65:
+                operation = {"op": "add_book", "args": {"bookInfo": {
+                    "Title": f"Nowość {number}", "Author": f"Autor {rng.randint(1, 500)}", "Genre": "Batch",
+                    "Price": round(rng.uniform(9.99, 99.99), 2), "Stock": rng.randint(0, 50)}}}
+            elif kind < 0.80:
+                operation = {"op": "register_customer",
+                             "args": {"clientInfo": {"Name": f"Klient Wsadowy {number}",
+                                                     "Email": f"batch{number}@example.com"}}}
+            elif kind < 0.90:
+                operation = {"op": "update_book_stock", "args": [rng.choice(book_ids), rng.randint(1, 10)]}
+            else:
+                operation = {"op": "get_book", "args": {"data": str(rng.choice(book_ids))}}
+            file.write(json.dumps(operation, ensure_ascii=False) + "\n")
+
+
+def fresh_copy(source, target):
+    utilities.get_pool().close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    shutil.copy(source, target)
+    utilities.configure_pool(target)
+
+
+def process_per_operation(ops_path, db_path, sample):
+    """Czas na operację przy osobnym procesie `python -m bookstore` dla każdej z `sample` operacji."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get("PYTHONPATH")])))
+    with open(ops_path, encoding="utf-8") as file:
+        operations = [json.loads(next(file)) for _ in range(sample)]
+    started = time.perf_counter()
+    for operation in operations:
+        args = operation["args"]
+        values = args if isinstance(args, list) else list(args.values())
+        argv = [value if isinstance(value, str) else json.dumps(value, ensure_ascii=False) for value in values]
+        subprocess.run([sys.executable, "-m", "bookstore", "--db", db_path, operation["op"], *argv],
+                       cwd=ROOT_DIR, env=env, capture_output=True, check=False)
+    return (time.perf_counter() - started) / sample
+
+
+def main(count=100_000, group_sizes=None):
+    cache.disable()
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.db")
+        generated = generate_database(source, "1k", end_date=END_DATE, books=10_000, customers=10_000,
+                                      purchases=100_000)
+        ops_path = os.path.join(directory, "operations.jsonl")
+        write_operations(ops_path, source, count)
+        print(f"Wygenerowano bazę w {generated['seconds']:.0f} s i {count} operacji.\n")
+        target = os.path.join(directory, "target.db")
+
+        fresh_copy(source, target)
+        utilities.get_pool().close()
+        per_operation = process_per_operation(ops_path, target, PROCESS_SAMPLE)
+        print(f"{'tryb':<28} {'czas [s]':>10} {'operacje/s':>12} {'błędy':>7}")
+        print(f"{'proces na operację':<28} {per_operation * count:>10.1f} {1 / per_operation:>12.0f} {'-':>7}"
+              f"  (szacunek z {PROCESS_SAMPLE} operacji)")
+
+        for group_size in group_sizes or GROUP_SIZES:
+            fresh_copy(source, target)
+            result = run_batch(ops_path, group_size)
+            assert result["code"] == 200, result["message"]
+            data = result["data"]
+            print(f"{f'batch, grupa {group_size}':<28} {data['seconds']:>10.2f} {data['ops_per_sec']:>12.0f} "
+                  f"{data['failed']:>7}")
+        utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000, [int(size) for size in sys.argv[2:]] or None)
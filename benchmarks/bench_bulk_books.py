@@ -0,0 +1,58 @@
+# bench_bulk_books.py
+"""
+Przepustowość masowego dodawania i usuwania książek: add_book w pętli vs add_books / remove_books.
+
+Uruchomienie:
+    python -m benchmarks.bench_bulk_books [liczba_książek]
+
+Cel: co najmniej 50 000 wierszy/s dla add_books na dysku SSD.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+from bookstore import utilities
+from bookstore.book_Manager import add_book, add_books, remove_books
+
+LOOP_SAMPLE = 2000  # add_book w pętli jest wolne - mierzymy na próbce
+
+
+def make_books(count, seed=42):
+    rng = random.Random(seed)
+    return [{"Title": f"Tytuł {i}", "Author": f"Autor {rng.randint(1, 5000)}", "Genre": rng.choice(["Fantasy", "Kryminał", "Poezja"]),
+             "Price": round(rng.uniform(5, 80), 2), "Stock": rng.randint(0, 200)} for i in range(count)]
+
+
+def main(count=200_000):
+    books = make_books(count)
+    with tempfile.TemporaryDirectory() as directory:
+        utilities.configure_pool(os.path.join(directory, "bench.db"))
+        utilities.initialize_database()
+
+        started = time.perf_counter()
+        for book in books[:LOOP_SAMPLE]:
+            add_book(book)
+        loop_rate = LOOP_SAMPLE / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        result = add_books(books)
+        bulk_rate = count / (time.perf_counter() - started)
+        print(result["message"])
+
+        with utilities.get_connection() as conn:
+            ids = [row[0] for row in conn.execute("SELECT BookID FROM Books;")]
+        started = time.perf_counter()
+        result = remove_books(ids)
+        remove_rate = len(ids) / (time.perf_counter() - started)
+        print(result["message"])
+        utilities.get_pool().close()
+
+    print(f"add_book w pętli: {loop_rate:>10.0f} wierszy/s")
+    print(f"add_books:        {bulk_rate:>10.0f} wierszy/s")
+    print(f"remove_books:     {remove_rate:>10.0f} wierszy/s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,69 @@
+# bench_changes.py
+"""
+Nocna synchronizacja: pełny eksport wszystkich tabel (export_all) vs eksport przyrostowy
+(export_changes) zmian od znacznika poprzedniej synchronizacji.
+
+Uruchomienie:
+    python -m benchmarks.bench_changes [liczba_zakupów] [liczba_zmian ...]
+
+Domyślnie 1 000 000 zakupów (klientów i książek odpowiednio mniej) oraz 100, 10 000
+i 100 000 zmian. Zmiany to po równo: nowe zakupy, zmiany cen książek i nowi klienci,
+z których co drugi jest potem usuwany. Baza tworzona jest w katalogu tymczasowym,
+baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime
+
+from bookstore import utilities, file_manager, cache
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+
+
+def apply_changes(count, round_no):
+    """Wprowadza ok. `count` zmian w trzech tabelach (bez użycia menedżerów, jednym zatwierdzeniem)."""
+    per_table = max(1, count // 3)
+    with utilities.get_connection() as conn:
+        books = [row[0] for row in conn.execute("SELECT BookID FROM Books ORDER BY BookID LIMIT ?;", (per_table,))]
+        conn.executemany("UPDATE Books SET Price = Price + 0.01 WHERE BookID = ?;", [(book,) for book in books])
+        customers = [(f"bench-{round_no}-{i}", f"Klient {i}", f"bench-{round_no}-{i}@example.com")
+                     for i in range(per_table)]
+        conn.executemany("INSERT INTO Customers (CustomerID, Name, Email) VALUES (?, ?, ?);", customers)
+        conn.executemany("DELETE FROM Customers WHERE CustomerID = ?;", [(row[0],) for row in customers[::2]])
+        conn.executemany("""
+                         INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate, UnitPrice, LineTotal)
+                         VALUES (?, ?, 1, '2026-01-02 10:00:00', 10.0, 10.0);
+                         """, [(customers[1][0], books[i % len(books)]) for i in range(per_table)])
+        conn.commit()
+
+
+def main(purchases=1_000_000, changes=None):
+    cache.disable()
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        generated = generate_database(db_path, "1k", end_date=END_DATE, books=max(1000, purchases // 50),
+                                      customers=max(1000, purchases // 20), purchases=purchases)
+        print(f"Wygenerowano {purchases} zakupów w {generated['seconds']:.0f} s.\n")
+        file_manager.CSV_DIR = directory
+
+        full = file_manager.export_all()
+        assert full["code"] == 200, full["message"]
+        watermark = full["data"]["watermark"]
+        print(f"{'zmian':>8} {'export_all [s]':>15} {'wierszy':>9} {'export_changes [s]':>19} {'wierszy':>9}")
+        for round_no, count in enumerate(changes or [100, 10_000, 100_000]):
+            apply_changes(count, round_no)
+            full = file_manager.export_all()
+            assert full["code"] == 200, full["message"]
+            delta = file_manager.export_changes(watermark)
+            assert delta["code"] == 200, delta["message"]
+            print(f"{count:>8} {full['data']['seconds']:>15.2f} {full['data']['rows']:>9} "
+                  f"{delta['data']['seconds']:>19.3f} {delta['data']['rows']:>9}")
+            watermark = delta["data"]["watermark"]
+        utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000, [int(count) for count in sys.argv[2:]] or None)
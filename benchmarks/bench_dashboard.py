@@ -0,0 +1,79 @@
+# bench_dashboard.py
+"""
+Widok statystyk: osobne wywołania funkcji monitor vs jedna migawka get_dashboard_snapshot().
+
+Uruchomienie:
+    python -m benchmarks.bench_dashboard [--scale 1k|100k|10m] [--repeat 200]
+
+Cache wyników jest wyłączony, aby mierzyć zapytania do bazy. Baza tworzona jest
+w katalogu tymczasowym, baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+from bookstore import utilities, monitor, cache
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+
+
+def render_separately():
+    """Widok statystyk złożony z osobnych wywołań (jak w menu statystyk)."""
+    return {
+        "total_books": monitor.get_total_books()["data"],
+        "ebooks_unavailable": monitor.get_ebooks_unavailable()["data"],
+        "total_customers": monitor.get_total_customers()["data"],
+        "total_purchases": monitor.get_total_purchases()["data"],
+        "units_sold": monitor.get_units_sold()["data"],
+        "popular_books": monitor.get_popular_books()["data"],
+        "recent_books": monitor.get_recent_books()["data"],
+        "revenue": monitor.get_revenue_statistics()["data"],
+        "low_stock_books": monitor.get_low_stock_books()["data"],
+    }
+
+
+def render_snapshot():
+    data = dict(monitor.get_dashboard_snapshot()["data"])
+    del data["snapshot_at"]
+    return data
+
+
+def measure(render, repeat):
+    checkouts = utilities.get_pool_stats()["checkouts"]
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = render()
+        durations.append(time.perf_counter() - started)
+    per_render = (utilities.get_pool_stats()["checkouts"] - checkouts) / repeat
+    return sorted(durations), per_render, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark migawki statystyk.")
+    parser.add_argument("--scale", default="100k")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    cache.disable()
+    with tempfile.TemporaryDirectory() as directory:
+        generated = generate_database(os.path.join(directory, "bench.db"), args.scale, end_date=END_DATE)
+        print(f"[{args.scale}] dane wygenerowane w {generated['seconds']:.1f} s\n")
+
+        print(f"{'wariant':<22} {'mediana [ms]':>13} {'min [ms]':>10} {'połączenia':>11}")
+        results = {}
+        for name, render in (("osobne wywołania", render_separately), ("get_dashboard_snapshot", render_snapshot)):
+            durations, connections, results[name] = measure(render, args.repeat)
+            print(f"{name:<22} {durations[len(durations) // 2] * 1000:>13.3f} {durations[0] * 1000:>10.3f} "
+                  f"{connections:>11.0f}")
+        # Bez równoległych zapisów oba warianty muszą dać ten sam wynik
+        assert results["osobne wywołania"] == results["get_dashboard_snapshot"]
+        utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
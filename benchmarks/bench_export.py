@@ -0,0 +1,79 @@
+# bench_export.py
+"""
+Eksport tabeli Purchases do CSV: dotychczasowa ścieżka pandas (read_sql_query + to_csv)
+vs strumieniowy export_data (kursor partiami, bez kompresji i z gzip).
+
+Uruchomienie:
+    python -m benchmarks.bench_export [liczba_zakupów ...]
+
+Domyślnie 200 000 i 1 000 000 zakupów - szczytowe zużycie pamięci (tracemalloc,
+osobny przebieg) pokazuje, czy rośnie ono z rozmiarem tabeli. Baza tworzona jest
+w katalogu tymczasowym, baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from bookstore import utilities, file_manager, cache
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+
+
+def export_pandas(path):
+    with utilities.get_connection() as conn:
+        df = pd.read_sql_query("SELECT * FROM Purchases;", conn)
+        df.to_csv(path, index=False)
+    return len(df)
+
+
+def export_streaming(path):
+    return file_manager.export_data("Purchases", os.path.basename(path))["data"]["rows"]
+
+
+def export_streaming_gzip(path):
+    return file_manager.export_data("Purchases", os.path.basename(path) + ".gz")["data"]["rows"]
+
+
+VARIANTS = [
+    ("pandas", export_pandas),
+    ("strumieniowo", export_streaming),
+    ("strumieniowo + gzip", export_streaming_gzip),
+]
+
+
+def measure(export, path):
+    started = time.perf_counter()
+    rows = export(path)
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    export(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, seconds, peak
+
+
+def main(sizes):
+    cache.disable()
+    for purchases in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            generate_database(os.path.join(directory, "bench.db"), "1k", end_date=END_DATE,
+                              books=max(1000, purchases // 50), customers=max(1000, purchases // 20),
+                              purchases=purchases)
+            file_manager.CSV_DIR = directory
+            print(f"\n{purchases} zakupów")
+            print(f"{'wariant':<22} {'czas [s]':>9} {'wiersze/s':>11} {'szczyt pamięci [MB]':>20}")
+            for name, export in VARIANTS:
+                rows, seconds, peak = measure(export, os.path.join(directory, "purchases.csv"))
+                print(f"{name:<22} {seconds:>9.2f} {rows / seconds:>11.0f} {peak / 2 ** 20:>20.1f}")
+            utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [200_000, 1_000_000])
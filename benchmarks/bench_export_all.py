@@ -0,0 +1,96 @@
+# bench_export_all.py
+"""
+Eksport i import wszystkich tabel: kolejne wywołania export_data / import_data dla
+Customers, Books i Purchases (jak opcje 12 i 13 menu) vs export_all / import_all
+(wspólna migawka i wątki zapisu plików; równoległe parsowanie i jeden zapis do bazy).
+
+Uruchomienie:
+    python -m benchmarks.bench_export_all [liczba_zakupów] [format ...]
+
+Domyślnie 1 000 000 zakupów (klientów i książek odpowiednio mniej) oraz formaty
+csv, csv+gzip i parquet (parquet wymaga pakietu pyarrow). Każdy import wykonywany
+jest na świeżej kopii bazy. Baza tworzona jest w katalogu tymczasowym, baza projektu
+nie jest modyfikowana.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime
+
+from bookstore import utilities, file_manager, cache
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+TABLES = ["Customers", "Books", "Purchases"]
+FORMATS = {"csv": ("csv", None), "csv+gzip": ("csv", "gzip"), "parquet": ("parquet", None)}
+
+
+def export_serial(file_format, compression):
+    for table in TABLES:
+        result = file_manager.export_data(table, compression=compression, file_format=file_format)
+        assert result["code"] == 200, result["message"]
+
+
+def export_parallel(file_format, compression):
+    result = file_manager.export_all(TABLES, file_format, compression)
+    assert result["code"] == 200, result["message"]
+
+
+def import_serial(file_format, compression):
+    for table in TABLES:
+        filename = file_manager._default_filename(table, file_format, compression)
+        result = file_manager.import_data(table, filename, file_format)
+        assert result["code"] == 200, result["message"]
+
+
+def import_parallel(file_format, compression):
+    result = file_manager.import_all(TABLES, file_format, compression)
+    assert result["code"] == 200, result["message"]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def fresh_copy(source, target):
+    """Podmienia bazę docelową na kopię źródłowej (pula zamknięta przed nadpisaniem pliku)."""
+    utilities.get_pool().close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    shutil.copy(source, target)
+    utilities.configure_pool(target)
+
+
+def main(purchases=1_000_000, formats=None):
+    cache.disable()
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.db")
+        generated = generate_database(source, "1k", end_date=END_DATE, books=max(1000, purchases // 50),
+                                      customers=max(1000, purchases // 20), purchases=purchases)
+        print(f"Wygenerowano {purchases} zakupów w {generated['seconds']:.0f} s.\n")
+        target = os.path.join(directory, "target.db")
+        file_manager.CSV_DIR = directory
+
+        print(f"{'format':<10} {'operacja':<8} {'kolejno [s]':>12} {'równolegle [s]':>15} {'przyspieszenie':>15}")
+        for name in formats or FORMATS:
+            file_format, compression = FORMATS[name]
+            fresh_copy(source, target)
+            serial = timed(export_serial, file_format, compression)
+            parallel = timed(export_parallel, file_format, compression)
+            print(f"{name:<10} {'eksport':<8} {serial:>12.2f} {parallel:>15.2f} {serial / parallel:>14.2f}x")
+
+            fresh_copy(source, target)
+            serial = timed(import_serial, file_format, compression)
+            fresh_copy(source, target)
+            parallel = timed(import_parallel, file_format, compression)
+            print(f"{name:<10} {'import':<8} {serial:>12.2f} {parallel:>15.2f} {serial / parallel:>14.2f}x")
+        utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000, sys.argv[2:] or None)
@@ -0,0 +1,76 @@
+# bench_formats.py
+"""
+Formaty plików export_data / import_data: CSV (bez kompresji i z gzip), Parquet
+(snappy i zstd) oraz Arrow IPC - rozmiar pliku, czas eksportu i czas importu
+każdej tabeli.
+
+Uruchomienie:
+    python -m benchmarks.bench_formats [liczba_wierszy]
+
+Domyślnie 1 000 000 wierszy w każdej tabeli (Customers, Books, Purchases). Każdy
+format importowany jest do świeżej kopii bazy (Customers i Books aktualizują istniejące
+wiersze, Purchases dodaje nowe). Formaty kolumnowe wymagają pakietu pyarrow - bez
+niego są pomijane. Baza tworzona jest w katalogu tymczasowym, baza projektu nie jest
+modyfikowana.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime
+
+from bookstore import utilities, file_manager, cache
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+TABLES = ["Customers", "Books", "Purchases"]
+
+# (nazwa, format, kompresja)
+VARIANTS = [
+    ("csv", "csv", None),
+    ("csv + gzip", "csv", "gzip"),
+    ("parquet (snappy)", "parquet", None),
+    ("parquet + zstd", "parquet", "zstd"),
+    ("arrow", "arrow", None),
+]
+
+
+def main(rows=1_000_000):
+    cache.disable()
+    try:
+        import pyarrow  # noqa: F401
+        variants = VARIANTS
+    except ImportError:
+        print("Brak pakietu pyarrow - pomijanie formatów Parquet i Arrow.")
+        variants = [variant for variant in VARIANTS if variant[1] == "csv"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.db")
+        generated = generate_database(source, "1k", end_date=END_DATE, books=rows, customers=rows, purchases=rows)
+        utilities.get_pool().close()
+        print(f"Wygenerowano po {rows} wierszy w {generated['seconds']:.0f} s.\n")
+        file_manager.CSV_DIR = directory
+
+        print(f"{'tabela':<10} {'format':<17} {'rozmiar [MB]':>13} {'eksport [s]':>12} {'import [s]':>11}")
+        for name, file_format, compression in variants:
+            target = os.path.join(directory, "target.db")
+            shutil.copy(source, target)
+            utilities.configure_pool(target)
+            for table in TABLES:
+                exported = file_manager.export_data(table, compression=compression, file_format=file_format)
+                assert exported["code"] == 200, exported["message"]
+                started = time.perf_counter()
+                imported = file_manager.import_data(table, os.path.basename(exported["data"]["path"]))
+                import_seconds = time.perf_counter() - started
+                assert imported["code"] == 200, imported["message"]
+                assert imported["data"]["rows"] == exported["data"]["rows"], name
+                print(f"{table:<10} {name:<17} {exported['data']['bytes'] / 2 ** 20:>13.1f} "
+                      f"{exported['data']['seconds']:>12.2f} {import_seconds:>11.2f}")
+                os.remove(exported["data"]["path"])
+            utilities.get_pool().close()
+            os.remove(target)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,91 @@
+# bench_import.py
+"""
+Import zakupów z CSV: dotychczasowa ścieżka wiersz po wierszu (iterrows, dwa zapytania
+sprawdzające i INSERT na wiersz) vs import_data przez tabelę pośrednią.
+
+Uruchomienie:
+    python -m benchmarks.bench_import [liczba_zakupów ...]
+
+Domyślnie 100 000 i 1 000 000 zakupów. Każdy wariant importuje ten sam plik do
+świeżej kopii bazy. Baza tworzona jest w katalogu tymczasowym, baza projektu nie
+jest modyfikowana.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+from bookstore import utilities, file_manager, cache
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+
+
+def import_iterrows(path):
+    """Import zakupów w postaci sprzed tabeli pośredniej (bez komunikatów o pominięciu)."""
+    df = pd.read_csv(path)
+    with utilities.get_connection() as conn:
+        for _, row in df.iterrows():
+            customer_exists = conn.execute("SELECT 1 FROM Customers WHERE CustomerID = ?;",
+                                           (row['CustomerID'],)).fetchone()
+            book_exists = conn.execute("SELECT Price FROM Books WHERE BookID = ?;", (row['BookID'],)).fetchone()
+            if not customer_exists or not book_exists:
+                continue
+            try:
+                purchase_date = pd.to_datetime(row['PurchaseDate']).strftime('%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                purchase_date = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+            unit_price = row['UnitPrice'] if pd.notna(row['UnitPrice']) else book_exists[0]
+            conn.execute("""
+                         INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate, UnitPrice, LineTotal)
+                         VALUES (?, ?, ?, ?, ?, ?);
+                         """, (row['CustomerID'], row['BookID'], row['Quantity'], purchase_date,
+                               unit_price, unit_price * row['Quantity']))
+        conn.commit()
+    return len(df)
+
+
+def import_staging(path):
+    result = file_manager.import_data("Purchases", os.path.basename(path))
+    assert result["code"] == 200, result["message"]
+    return result["data"]["rows"]
+
+
+VARIANTS = [
+    ("iterrows", import_iterrows),
+    ("tabela pośrednia", import_staging),
+]
+
+
+def main(sizes):
+    cache.disable()
+    for purchases in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "source.db")
+            generate_database(source, "1k", end_date=END_DATE, books=max(1000, purchases // 50),
+                              customers=max(1000, purchases // 20), purchases=purchases)
+            file_manager.CSV_DIR = directory
+            file_manager.export_data("Purchases")
+            utilities.get_pool().close()
+
+            print(f"\n{purchases} zakupów")
+            print(f"{'wariant':<18} {'czas [s]':>9} {'wiersze/s':>11} {'zakupy po imporcie':>19}")
+            for name, variant in VARIANTS:
+                target = os.path.join(directory, "target.db")
+                shutil.copy(source, target)
+                utilities.configure_pool(target)
+                started = time.perf_counter()
+                rows = variant(os.path.join(directory, "purchases.csv"))
+                seconds = time.perf_counter() - started
+                with utilities.get_connection() as conn:
+                    total = conn.execute("SELECT COUNT(*) FROM Purchases;").fetchone()[0]
+                print(f"{name:<18} {seconds:>9.2f} {rows / seconds:>11.0f} {total:>19}")
+                utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100_000, 1_000_000])
@@ -0,0 +1,72 @@
+# bench_importtime.py
+"""
+Czas startu aplikacji: import bookstore.main (CLI) i frontend.gui (GUI) mierzony przez
+`python -X importtime` w osobnych procesach (każdy pomiar na czystym interpreterze).
+
+Uruchomienie:
+    python -m benchmarks.bench_importtime [liczba_powtórzeń]
+
+Dla każdego modułu wypisywane jest minimum łącznego czasu importu z powtórzeń oraz
+najcięższe importowane moduły. Kod wyjścia wynosi 1, gdy czas przekracza budżet
+(IMPORT_BUDGETS_MS) albo przy starcie ładowany jest któryś z ciężkich pakietów
+importowanych leniwie (LAZY_MODULES, np. pandas tylko przy eksporcie i imporcie).
+To samo sprawdzenie wykonują testy (tests/test_importtime.py) i harness (benchmarks.harness).
+"""
+import os
+import sys
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGETS_MS = {"bookstore.main": 150.0, "frontend.gui": 150.0}
+LAZY_MODULES = ("pandas", "pyarrow", "numpy", "zstandard")
+RUNS = 5
+TOP_MODULES = 5
+
+
+def measure(module):
+    """Jeden import modułu w nowym interpreterze: (łączny czas ms, najcięższe moduły, załadowane LAZY_MODULES)."""
+    code = (f"import sys, {module}; "
+            f"print(' '.join(name for name in {LAZY_MODULES!r} if name in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    # Linie w formacie "import time: <własny us> | <łączny us> | <moduł>"
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((int(cumulative) / 1000, name.strip(), name.rstrip() == f" {module}"))
+    total = next(ms for ms, _, top in timings if top)
+    heaviest = sorted(((ms, name) for ms, name, top in timings if not top), reverse=True)[:TOP_MODULES]
+    return total, heaviest, result.stdout.split()
+
+
+def check(runs=RUNS, verbose=False):
+    """Sprawdza budżety startu; zwraca listę naruszeń (opisy), pusta lista oznacza brak przekroczeń."""
+    violations = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        measurements = [measure(module) for _ in range(runs)]
+        total, heaviest, loaded = min(measurements, key=lambda measurement: measurement[0])
+        if verbose:
+            print(f"{module:<16} {total:>8.1f} ms (budżet {budget:.0f} ms)")
+            for ms, name in heaviest:
+                print(f"    {name:<32} {ms:>8.1f} ms")
+        if total > budget:
+            violations.append(f"import {module}: {total:.1f} ms > budżet {budget:.0f} ms")
+        if loaded:
+            violations.append(f"import {module} ładuje {', '.join(loaded)} (powinny być importowane leniwie)")
+    return violations
+
+
+def main(runs=RUNS):
+    violations = check(runs, verbose=True)
+    for violation in violations:
+        print(f"PRZEKROCZENIE: {violation}")
+    if not violations:
+        print("Czas startu w budżecie.")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS))
@@ -0,0 +1,98 @@
+# bench_purchase_totals.py
+"""
+Agregaty przychodów i historii: złączenie Purchases × Books (Quantity * Price) vs zapisana
+wartość pozycji (LineTotal) odczytywana z indeksu pokrywającego.
+
+Uruchomienie:
+    python -m benchmarks.bench_purchase_totals [liczba_zakupów]
+
+Domyślnie 5 000 000 zakupów (generowanie trwa kilka minut). Baza tworzona jest
+w katalogu tymczasowym, baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime
+
+from bookstore import utilities
+from benchmarks.datagen import generate_database
+
+END_DATE = datetime(2026, 1, 1)
+REPEAT = 3
+
+# (opis, zapytanie przez złączenie z Books, zapytanie po LineTotal, parametry)
+QUERIES = [
+    ("przychód z 30 dni",
+     """SELECT SUM(p.Quantity * b.Price) FROM Purchases p JOIN Books b ON p.BookID = b.BookID
+        WHERE p.PurchaseDate >= ? AND p.PurchaseDate < ?;""",
+     "SELECT SUM(LineTotal) FROM Purchases WHERE PurchaseDate >= ? AND PurchaseDate < ?;",
+     ("2025-12-02", "2026-01-01")),
+    ("przychód z roku",
+     """SELECT SUM(p.Quantity * b.Price) FROM Purchases p JOIN Books b ON p.BookID = b.BookID
+        WHERE p.PurchaseDate >= ? AND p.PurchaseDate < ?;""",
+     "SELECT SUM(LineTotal) FROM Purchases WHERE PurchaseDate >= ? AND PurchaseDate < ?;",
+     ("2025-01-01", "2026-01-01")),
+    ("przychód całkowity",
+     "SELECT SUM(p.Quantity * b.Price) FROM Purchases p JOIN Books b ON p.BookID = b.BookID;",
+     "SELECT SUM(LineTotal) FROM Purchases INDEXED BY idx_purchases_date_total;",
+     ()),
+    ("przychód wg miesięcy",
+     """SELECT date(p.PurchaseDate, 'start of month') AS Month, SUM(p.Quantity * b.Price)
+        FROM Purchases p JOIN Books b ON p.BookID = b.BookID GROUP BY Month;""",
+     """SELECT date(PurchaseDate, 'start of month') AS Month, SUM(LineTotal)
+        FROM Purchases INDEXED BY idx_purchases_date_total GROUP BY Month;""",
+     ()),
+    ("historia klienta",
+     """SELECT p.PurchaseID, p.Quantity, p.PurchaseDate, b.Price, p.Quantity * b.Price
+        FROM Purchases p JOIN Books b ON p.BookID = b.BookID
+        WHERE p.CustomerID = ? ORDER BY p.PurchaseDate DESC;""",
+     """SELECT PurchaseID, Quantity, PurchaseDate, UnitPrice, LineTotal
+        FROM Purchases WHERE CustomerID = ? ORDER BY PurchaseDate DESC;""",
+     None),  # parametr: najaktywniejszy klient
+]
+
+
+def _rounded(rows):
+    return sorted(tuple(round(value, 2) if isinstance(value, float) else value for value in row) for row in rows)
+
+
+def timed(conn, sql, params):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        result = conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - started) / REPEAT, result
+
+
+def main(purchases=5_000_000):
+    with tempfile.TemporaryDirectory() as directory:
+        generated = generate_database(os.path.join(directory, "bench.db"), "1k", end_date=END_DATE,
+                                      books=max(1000, purchases // 50), customers=max(1000, purchases // 50),
+                                      purchases=purchases)
+        print(f"Wygenerowano {purchases} zakupów w {generated['seconds']:.0f} s.\n")
+
+        with utilities.get_connection() as conn:
+            customer = conn.execute("""
+                                    SELECT CustomerID FROM Purchases
+                                    GROUP BY CustomerID ORDER BY COUNT(*) DESC LIMIT 1;
+                                    """).fetchone()
+            print(f"{'zapytanie':<22} {'złączenie [ms]':>15} {'LineTotal [ms]':>15} {'przyspieszenie':>15}")
+            for name, join_sql, line_total_sql, params in QUERIES:
+                params = customer if params is None else params
+                join_time, join_result = timed(conn, join_sql, params)
+                line_total_time, line_total_result = timed(conn, line_total_sql, params)
+                # Ceny w generatorze się nie zmieniają, więc oba warianty muszą dać ten sam wynik
+                assert _rounded(join_result) == _rounded(line_total_result), name
+                print(f"{name:<22} {join_time * 1000:>15.1f} {line_total_time * 1000:>15.1f} "
+                      f"{join_time / line_total_time:>14.1f}x")
+
+            print("\nPlany zapytań po LineTotal:")
+            for name, _, line_total_sql, params in QUERIES:
+                params = customer if params is None else params
+                plan = utilities.explain_query_plan(conn, line_total_sql, params)["plan"]
+                print(f"  {name}: {'; '.join(plan)}")
+        utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
@@ -0,0 +1,88 @@
+# bench_search.py
+"""
+Porównanie wyszukiwania książek: LIKE '%...%' vs indeks pełnotekstowy FTS5 (search_books).
+
+Uruchomienie:
+    python -m benchmarks.bench_search [liczba_książek ...]
+
+Domyślnie mierzone są katalogi 10k, 100k i 1M książek. Każda baza tworzona jest
+w katalogu tymczasowym, baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+from bookstore import utilities
+from bookstore.book_Manager import search_books
+
+SYLLABLES = ["ka", "ro", "mi", "sel", "dra", "gon", "ta", "lin", "vor", "es", "py", "thon", "ne", "ri", "ul", "sha"]
+AUTHORS = [f"{first} {last}" for first in ["John", "Sarah", "Mark", "Anna", "Piotr", "Maria"]
+           for last in ["Smith", "Johnson", "Nowak", "Kowalska", "Evans", "Green"]]
+GENRES = ["Fantasy", "Thriller", "Romance", "Education", "Technology", "Adventure", "Poezja"]
+REPEAT = 5
+
+
+def make_vocabulary(rng, size=20000):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def fill_books(db_path, count, seed=42):
+    """Wypełnia bazę książkami, których tytuły losowane są ze słownika ~20k słów (rozkład Zipfa)."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    utilities.configure_pool(db_path)
+    utilities.initialize_database()
+    with utilities.get_connection() as conn:
+        batch = []
+        for _ in range(count):
+            title = " ".join(word.capitalize() for word in rng.choices(vocabulary, weights, k=rng.randint(2, 5)))
+            batch.append((title, rng.choice(AUTHORS), rng.choice(GENRES),
+                          round(rng.uniform(5, 80), 2), rng.randint(0, 200)))
+            if len(batch) == 50000:
+                conn.executemany("INSERT INTO Books (Title, Author, Genre, Price, Stock) VALUES (?, ?, ?, ?, ?);",
+                                 batch)
+                batch.clear()
+        conn.executemany("INSERT INTO Books (Title, Author, Genre, Price, Stock) VALUES (?, ?, ?, ?, ?);", batch)
+        conn.commit()
+    return vocabulary
+
+
+def time_like(query):
+    """Dotychczasowa ścieżka get_book(tytuł): pełny skan z LIKE '%...%'."""
+    with utilities.get_connection() as conn:
+        started = time.perf_counter()
+        for _ in range(REPEAT):
+            conn.execute("SELECT * FROM Books WHERE Title LIKE ?;", (f"%{query}%",)).fetchall()
+        return (time.perf_counter() - started) / REPEAT
+
+
+def time_fts(query):
+    """Nowa ścieżka get_book(tytuł): wszystkie trafienia z indeksu FTS5, ranking BM25."""
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        search_books(query, limit=None, columns=("Title",))
+    return (time.perf_counter() - started) / REPEAT
+
+
+def main(sizes):
+    print(f"{'książki':>10} {'zapytanie':<20} {'LIKE [ms]':>10} {'FTS5 [ms]':>10} {'przyspieszenie':>15}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            vocabulary = fill_books(os.path.join(directory, "bench.db"), size)
+            # Zapytania: słowo częste, średnio częste, rzadkie, prefiks oraz dwa słowa
+            queries = [vocabulary[0], vocabulary[100], vocabulary[5000], vocabulary[200][:4],
+                       f"{vocabulary[1]} {vocabulary[50]}"]
+            for query in queries:
+                like, fts = time_like(query), time_fts(query)
+                print(f"{size:>10} {query:<20} {like * 1000:>10.2f} {fts * 1000:>10.2f} {like / fts:>14.1f}x")
+            utilities.get_pool().close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
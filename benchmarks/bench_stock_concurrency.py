@@ -0,0 +1,102 @@
+# bench_stock_concurrency.py
+"""
+Test obciążeniowy współbieżnych zakupów: brak sprzedaży ponad stan i przepustowość.
+
+Wiele wątków kupuje po jednym egzemplarzu tej samej książki, aż do wyczerpania stanu.
+Porównywane są:
+    - dotychczasowa ścieżka (odczyt stanu, sprawdzenie w Pythonie, osobny UPDATE,
+      nowe połączenie przy każdym wywołaniu),
+    - buy_book z warunkowym UPDATE ... RETURNING na połączeniach z puli.
+
+Uruchomienie:
+    python -m benchmarks.bench_stock_concurrency [wątki] [stan_początkowy]
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+
+from bookstore import utilities
+from bookstore.customer_Manager import buy_book, register_customer
+
+
+def legacy_buy_book(db_path, customer_id, book_id, quantity):
+    """Odtworzenie poprzedniej implementacji: sprawdzenie stanu i zmniejszenie w osobnych zapytaniach."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        stock = conn.execute("SELECT Stock FROM Books WHERE BookID = ?;", (book_id,)).fetchone()[0]
+        if stock < quantity:
+            return {"code": 400}
+        conn.execute("INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate) VALUES (?, ?, ?, ?);",
+                     (customer_id, book_id, quantity, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        conn.execute("UPDATE Books SET Stock = Stock - ? WHERE BookID = ?;", (quantity, book_id))
+        conn.commit()
+        return {"code": 200}
+    finally:
+        conn.close()
+
+
+def prepare(db_path, stock):
+    utilities.configure_pool(db_path, max_size=16)
+    utilities.initialize_database()
+    register_customer({"Name": "Klient Testowy", "Email": "test@example.com"})
+    with utilities.get_connection() as conn:
+        conn.execute("INSERT INTO Books (Title, Author, Genre, Price, Stock) VALUES ('Bestseller', 'Autor', 'Test', 10.0, ?);",
+                     (stock,))
+        conn.commit()
+        customer_id = conn.execute("SELECT CustomerID FROM Customers;").fetchone()[0]
+        book_id = conn.execute("SELECT BookID FROM Books;").fetchone()[0]
+    return customer_id, book_id
+
+
+def run(name, purchase, threads, db_path, stock):
+    sold = [0] * threads
+
+    def worker(index):
+        while True:
+            result = purchase()
+            if result["code"] == 200:
+                sold[index] += 1
+            elif result["code"] == 400:
+                return
+            # Inne kody (np. chwilowa blokada bazy) - ponowienie próby
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with utilities.get_connection() as conn:
+        final_stock = conn.execute("SELECT Stock FROM Books;").fetchone()[0]
+        units = conn.execute("SELECT COALESCE(SUM(Quantity), 0) FROM Purchases;").fetchone()[0]
+    oversold = max(0, units - stock)
+    print(f"{name:<28} sprzedano={sum(sold):>6} stan_końcowy={final_stock:>5} "
+          f"ponad_stan={oversold:>4} czas={elapsed:>6.2f}s zakupy/s={sum(sold) / elapsed:>8.0f}")
+    return oversold
+
+
+def main(threads=16, stock=2000):
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "legacy.db")
+        customer_id, book_id = prepare(db_path, stock)
+        run("poprzednia implementacja", lambda: legacy_buy_book(db_path, customer_id, book_id, 1),
+            threads, db_path, stock)
+        utilities.get_pool().close()
+
+        db_path = os.path.join(directory, "atomic.db")
+        customer_id, book_id = prepare(db_path, stock)
+        oversold = run("buy_book (warunkowy UPDATE)", lambda: buy_book(customer_id, str(book_id), 1),
+                       threads, db_path, stock)
+        utilities.get_pool().close()
+    if oversold:
+        sys.exit("BŁĄD: buy_book sprzedał więcej egzemplarzy niż było w magazynie.")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
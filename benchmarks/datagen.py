@@ -0,0 +1,196 @@
+# datagen.py
+"""
+Powtarzalny generator danych syntetycznych dla tabel Books, Customers i Purchases.
+
+Uruchomienie:
+    python -m benchmarks.datagen ŚCIEŻKA_BAZY [--scale 1k|100k|10m] [--seed 42] [--end-date RRRR-MM-DD]
+
+Rozkłady: popularność książek i aktywność klientów według prawa Zipfa, autorzy
+i gatunki skośne (kilku autorów/gatunków ma większość katalogu), daty zakupów
+rozłożone równomiernie na DAYS_OF_HISTORY dni przed `end_date`. Ten sam seed
+i ta sama data końcowa dają identyczną bazę.
+"""
+import sys
+import uuid
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+from bookstore import utilities
+from bookstore.migrations import SQL_STATS_RECOMPUTE
+
+# Skale danych: nazwa -> liczba książek, klientów i zakupów
+SCALES = {
+    "1k": {"books": 500, "customers": 200, "purchases": 1_000},
+    "100k": {"books": 20_000, "customers": 10_000, "purchases": 100_000},
+    "10m": {"books": 1_000_000, "customers": 500_000, "purchases": 10_000_000},
+}
+INSERT_BATCH_SIZE = 50_000
+DAYS_OF_HISTORY = 730
+
+SYLLABLES = ["ka", "ro", "mi", "sel", "dra", "gon", "ta", "lin", "vor", "es", "py", "thon", "ne", "ri", "ul", "sha"]
+FIRST_NAMES = ["Anna", "Piotr", "Maria", "Jan", "Katarzyna", "Tomasz", "Zofia", "Michał", "Agnieszka", "Paweł",
+               "John", "Sarah", "Mark", "Emma", "Lucas", "Olivia"]
+LAST_NAMES = ["Nowak", "Kowalski", "Wiśniewska", "Wójcik", "Kamińska", "Lewandowski", "Zielińska", "Szymański",
+              "Smith", "Johnson", "Evans", "Green", "Brown", "Taylor", "Wilson", "Moore"]
+GENRES = ["Fantasy", "Kryminał", "Romans", "Thriller", "Science Fiction", "Literatura piękna", "Biografia",
+          "Historia", "Poradnik", "Technologia", "Edukacja", "Przygodowa", "Horror", "Poezja", "Dla dzieci"]
+
+
+def zipf_cum_weights(count, exponent=1.0):
+    """Skumulowane wagi rozkładu Zipfa dla rang 1..count (do random.choices)."""
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cum_weights.append(total)
+    return cum_weights
+
+
+def _make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _generate_books(rng, count, end_date):
+    vocabulary = _make_vocabulary(rng, min(20_000, max(200, count // 2)))
+    word_weights = zipf_cum_weights(len(vocabulary))
+    authors = [f"{rng.choice(FIRST_NAMES)} {surname.capitalize()}"
+               for surname in _make_vocabulary(rng, max(10, count // 20))]
+    author_weights = zipf_cum_weights(len(authors), 1.1)
+    genre_weights = zipf_cum_weights(len(GENRES), 1.2)
+    start = end_date - timedelta(days=DAYS_OF_HISTORY)
+
+    for _ in range(count):
+        title = " ".join(word.capitalize()
+                         for word in rng.choices(vocabulary, cum_weights=word_weights, k=rng.randint(1, 4)))
+        # Około 5% książek wyprzedanych, reszta z długim ogonem stanów magazynowych
+        stock = 0 if rng.random() < 0.05 else int(rng.paretovariate(1.5) * 10)
+        added = start + timedelta(seconds=rng.randrange(DAYS_OF_HISTORY * 86400))
+        yield (title,
+               rng.choices(authors, cum_weights=author_weights)[0],
+               rng.choices(GENRES, cum_weights=genre_weights)[0],
+               round(min(rng.lognormvariate(3.3, 0.45), 400.0), 2),
+               stock,
+               added.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def _generate_customers(rng, count):
+    for index in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield (str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+               f"{first} {last}",
+               f"{first.lower()}.{last.lower()}.{index}@example.com")
+
+
+def _generate_purchases(rng, count, prices, customer_ids, end_date):
+    # Ranga popularności niezależna od BookID: losowa permutacja identyfikatorów
+    popularity = list(prices)
+    rng.shuffle(popularity)
+    book_weights = zipf_cum_weights(len(popularity))
+    activity = list(customer_ids)
+    rng.shuffle(activity)
+    customer_weights = zipf_cum_weights(len(activity), 0.8)
+
+    # Zakupy generowane w oknach czasowych, aby PurchaseID rosło razem z datą
+    start = (end_date - timedelta(days=DAYS_OF_HISTORY)).timestamp()
+    span = DAYS_OF_HISTORY * 86400
+    windows = max(1, -(-count // INSERT_BATCH_SIZE))
+    for window in range(windows):
+        size = min(INSERT_BATCH_SIZE, count - window * INSERT_BATCH_SIZE)
+        window_start = start + span * window / windows
+        window_span = span / windows
+        dates = sorted(window_start + rng.random() * window_span for _ in range(size))
+        books = rng.choices(popularity, cum_weights=book_weights, k=size)
+        customers = rng.choices(activity, cum_weights=customer_weights, k=size)
+        quantities = rng.choices((1, 2, 3, 5), weights=(80, 14, 5, 1), k=size)
+        yield [(customer, book, quantity, datetime.fromtimestamp(date).strftime('%Y-%m-%d %H:%M:%S'),
+                prices[book], prices[book] * quantity)
+               for customer, book, quantity, date in zip(customers, books, quantities, dates)]
+
+
+def _batched(rows, size=INSERT_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_database(db_path, scale="1k", seed=42, end_date=None, **counts):
+    """
+    Tworzy (lub uzupełnia) bazę pod `db_path` i wypełnia ją danymi syntetycznymi.
+
+    Args:
+        db_path (str): Ścieżka do pliku bazy danych.
+        scale (str, optional): Klucz ze SCALES.
+        seed (int, optional): Ziarno generatora liczb losowych.
+        end_date (datetime, optional): Data ostatniego zakupu. Domyślnie dzisiejsza północ.
+        **counts: Nadpisanie liczności (books, customers, purchases).
+
+    Returns:
+        dict: Liczności wygenerowanych tabel oraz czas generowania w sekundach.
+    """
+    sizes = {**SCALES[scale], **counts}
+    if end_date is None:
+        end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    utilities.configure_pool(db_path)
+    utilities.initialize_database()
+    with utilities.get_connection() as conn:
+        # Wyzwalacze FTS i Stats wyłączone na czas ładowania, dane pochodne przeliczane jednorazowo
+        conn.execute("INSERT INTO BulkLoad (TableName) VALUES ('Books');")
+        for batch in _batched(_generate_books(rng, sizes["books"], end_date)):
+            conn.executemany("""
+                             INSERT INTO Books (Title, Author, Genre, Price, Stock, DateAdded)
+                             VALUES (?, ?, ?, ?, ?, ?);
+                             """, batch)
+        conn.execute("INSERT INTO BooksFTS (BooksFTS) VALUES ('rebuild');")
+        conn.execute("INSERT OR REPLACE INTO Stats (Name, Value) " + SQL_STATS_RECOMPUTE + ";")
+        conn.execute("DELETE FROM BulkLoad WHERE TableName = 'Books';")
+        conn.commit()
+
+        for batch in _batched(_generate_customers(rng, sizes["customers"])):
+            conn.executemany("INSERT INTO Customers (CustomerID, Name, Email) VALUES (?, ?, ?);", batch)
+        conn.commit()
+
+        prices = dict(conn.execute("SELECT BookID, Price FROM Books ORDER BY BookID;").fetchall())
+        customer_ids = [row[0] for row in conn.execute("SELECT CustomerID FROM Customers ORDER BY CustomerID;")]
+        for batch in _generate_purchases(rng, sizes["purchases"], prices, customer_ids, end_date):
+            conn.executemany("""
+                             INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate, UnitPrice, LineTotal)
+                             VALUES (?, ?, ?, ?, ?, ?);
+                             """, batch)
+            conn.commit()
+        # Wygenerowane dane to stan początkowy (jak po pełnym eksporcie), a nie zmiany do eksportu przyrostowego
+        conn.execute("DELETE FROM ChangeLog;")
+        conn.commit()
+        # Pełne statystyki planera dla wszystkich tabel (częściowe prowadzą do złych planów złączeń)
+        conn.execute("ANALYZE;")
+
+    return {**sizes, "seconds": time.perf_counter() - started}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generator danych syntetycznych księgarni.")
+    parser.add_argument("db_path", help="Ścieżka do pliku bazy danych (nie używaj bazy projektu).")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=lambda value: datetime.strptime(value, "%Y-%m-%d"), default=None)
+    args = parser.parse_args(argv)
+
+    result = generate_database(args.db_path, args.scale, args.seed, args.end_date)
+    print(f"Wygenerowano {result['books']} książek, {result['customers']} klientów i "
+          f"{result['purchases']} zakupów w {result['seconds']:.1f} s.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
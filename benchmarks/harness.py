@@ -0,0 +1,298 @@
+# harness.py
+"""
+Pomiar czasu wszystkich publicznych funkcji book_Manager, customer_Manager, monitor
+i file_manager na danych z generatora (benchmarks.datagen) w wybranych skalach.
+
+Uruchomienie:
+    python -m benchmarks.harness [--scales 1k 100k] [--output wyniki.json]
+                                 [--baseline benchmarks/baseline.json] [--update-baseline]
+                                 [--tolerance 2.0] [--min-delta-ms 1.0]
+
+Wyniki zapisywane są jako JSON (mediana i minimum czasu, liczba powtórzeń, kod
+odpowiedzi). Przy porównaniu z baseline'em regresją jest wzrost minimum (mniej
+wrażliwego na obciążenie maszyny niż mediana) ponad `tolerance` razy i o więcej
+niż `min-delta-ms`; wtedy kod wyjścia wynosi 1. Kod wyjścia 1 także przy przekroczeniu
+budżetu czasu startu bookstore.main i frontend.gui (benchmarks.bench_importtime).
+Bazy tworzone są w katalogu tymczasowym, baza projektu nie jest modyfikowana.
+"""
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import sqlite3
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+
+from bookstore import utilities, book_Manager, customer_Manager, monitor, file_manager, backup, migrations, cache
+from benchmarks.datagen import generate_database
+from benchmarks import bench_importtime
+
+MODULES = (book_Manager, customer_Manager, monitor, file_manager, backup)
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+END_DATE = datetime(2026, 1, 1)  # Stała data końcowa, aby dane były identyczne między uruchomieniami
+MIN_TIME = 0.3  # Minimalny łączny czas pomiaru jednej funkcji (s)
+MAX_RUNS = 25
+
+
+class Context:
+    """Próbki danych dla wywołań (najpopularniejsza książka, najaktywniejszy klient itp.)."""
+
+    def __init__(self):
+        self.counter = 0
+        with utilities.get_connection() as conn:
+            self.book_id, self.title = conn.execute("""
+                                                    SELECT b.BookID, b.Title
+                                                    FROM Purchases p
+                                                             JOIN Books b ON b.BookID = p.BookID
+                                                    GROUP BY p.BookID
+                                                    ORDER BY COUNT(*) DESC
+                                                    LIMIT 1;
+                                                    """).fetchone()
+            # Znacznik dziennika zmian przed przypadkami (zmiany wprowadzają przypadki add_book(s), remove_book(s))
+            self.watermark = conn.execute(migrations.SQL_CHANGE_WATERMARK).fetchone()[0]
+            self.in_stock = [row[0] for row in conn.execute(
+                "SELECT BookID FROM Books WHERE Stock > 0 ORDER BY BookID LIMIT 5;")]
+            self.customer_id, self.customer_name = conn.execute("""
+                                                                SELECT c.CustomerID, c.Name
+                                                                FROM Purchases p
+                                                                         JOIN Customers c ON c.CustomerID = p.CustomerID
+                                                                GROUP BY p.CustomerID
+                                                                ORDER BY COUNT(*) DESC
+                                                                LIMIT 1;
+                                                                """).fetchone()
+            self.author, self.genre = conn.execute(
+                "SELECT Author, Genre FROM Books WHERE BookID = ?;", (self.book_id,)).fetchone()
+        self.word = self.title.split()[0]
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix} {self.counter}"
+
+    def new_book(self):
+        return {"Title": self.unique("Benchmark"), "Author": "Benchmark", "Genre": "Test", "Price": 10.0, "Stock": 1000}
+
+    def insert_books(self, count):
+        """Wstawia książki poza pomiarem i zwraca ich ID."""
+        result = book_Manager.add_books([self.new_book() for _ in range(count)])
+        assert result["code"] == 201, result["message"]
+        with utilities.get_connection() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT BookID FROM Books ORDER BY BookID DESC LIMIT ?;", (count,))]
+
+    def export_customers(self):
+        """Przygotowuje plik CSV dla import_data (poza pomiarem)."""
+        file_manager.export_data("Customers", "bench_customers.csv")
+        return ()
+
+    def restock(self):
+        """Uzupełnia stan książek kupowanych w pomiarze (poza pomiarem)."""
+        with utilities.get_connection() as conn:
+            conn.executemany("UPDATE Books SET Stock = 1000 WHERE BookID = ?;",
+                             [(book_id,) for book_id in self.in_stock])
+            conn.commit()
+        return ()
+
+    def new_customer_id(self):
+        name = self.unique("Benchmark Klient")
+        customer_Manager.register_customer({"Name": name, "Email": f"bench{self.counter}@example.com"})
+        with utilities.get_connection() as conn:
+            return conn.execute("SELECT CustomerID FROM Customers WHERE Name = ?;", (name,)).fetchone()[0]
+
+
+def build_cases(ctx):
+    """
+    Zwraca listę przypadków (nazwa, przygotowanie, wywołanie). Przygotowanie nie jest
+    mierzone i zwraca krotkę argumentów dla wywołania. Nazwa to moduł.funkcja[wariant].
+    """
+    start = (END_DATE - timedelta(days=30)).strftime('%Y-%m-%d')
+    end = END_DATE.strftime('%Y-%m-%d')
+    none = lambda: ()
+    return [
+        ("book_Manager.get_book", none, lambda: book_Manager.get_book()),
+        ("book_Manager.get_book[page]", none, lambda: book_Manager.get_book(page_size=100)),
+        ("book_Manager.get_book[id]", none, lambda: book_Manager.get_book(str(ctx.book_id))),
+        ("book_Manager.get_book[title]", none, lambda: book_Manager.get_book(ctx.word)),
+        ("book_Manager.iter_books", none, lambda: sum(1 for _ in book_Manager.iter_books())),
+        ("book_Manager.search_books", none, lambda: book_Manager.search_books(ctx.word)),
+        ("book_Manager.add_book", lambda: (ctx.new_book(),), book_Manager.add_book),
+        ("book_Manager.add_books[1000]", lambda: ([ctx.new_book() for _ in range(1000)],), book_Manager.add_books),
+        ("book_Manager.remove_book", lambda: (str(ctx.insert_books(1)[0]),), book_Manager.remove_book),
+        ("book_Manager.remove_books[1000]", lambda: (ctx.insert_books(1000),), book_Manager.remove_books),
+        ("book_Manager.update_book_stock", none, lambda: book_Manager.update_book_stock(ctx.book_id, 1)),
+
+        ("customer_Manager.get_customers", none, lambda: customer_Manager.get_customers()),
+        ("customer_Manager.get_customers[page]", none, lambda: customer_Manager.get_customers(page_size=100)),
+        ("customer_Manager.get_customers[name]", none,
+         lambda: customer_Manager.get_customers(ctx.customer_name)),
+        ("customer_Manager.iter_customers", none, lambda: sum(1 for _ in customer_Manager.iter_customers())),
+        ("customer_Manager.register_customer",
+         lambda: ({"Name": ctx.unique("Nowy Klient"), "Email": f"new{ctx.counter}@example.com"},),
+         customer_Manager.register_customer),
+        ("customer_Manager.remove_customer", lambda: (ctx.new_customer_id(),), customer_Manager.remove_customer),
+        ("customer_Manager.buy_book", ctx.restock,
+         lambda: customer_Manager.buy_book(ctx.customer_id, str(ctx.in_stock[0]), 1)),
+        ("customer_Manager.buy_books", ctx.restock,
+         lambda: customer_Manager.buy_books(ctx.customer_id, [(str(book_id), 1) for book_id in ctx.in_stock])),
+        ("customer_Manager.get_customer_purchases", none,
+         lambda: customer_Manager.get_customer_purchases(ctx.customer_id)),
+
+        ("monitor.get_total_books", none, monitor.get_total_books),
+        ("monitor.get_books_by_author", none, lambda: monitor.get_books_by_author(ctx.author)),
+        ("monitor.get_ebooks_unavailable", none, monitor.get_ebooks_unavailable),
+        ("monitor.get_total_customers", none, monitor.get_total_customers),
+        ("monitor.get_total_purchases", none, monitor.get_total_purchases),
+        ("monitor.get_units_sold", none, monitor.get_units_sold),
+        ("monitor.get_popular_books", none, monitor.get_popular_books),
+        ("monitor.get_popular_books[7d]", none, lambda: monitor.get_popular_books(days=7, end_date=end)),
+        ("monitor.get_popular_books[30d]", none, lambda: monitor.get_popular_books(days=30, end_date=end)),
+        ("monitor.get_recent_books", none, monitor.get_recent_books),
+        ("monitor.get_books_by_genre", none, lambda: monitor.get_books_by_genre(ctx.genre)),
+        ("monitor.get_revenue_statistics", none, monitor.get_revenue_statistics),
+        ("monitor.get_revenue[day]", none, lambda: monitor.get_revenue(start, end, "day")),
+        ("monitor.get_revenue[week]", none, lambda: monitor.get_revenue("2024-01-03", end, "week")),
+        ("monitor.get_revenue[month]", none, lambda: monitor.get_revenue(granularity="month")),
+        ("monitor.get_low_stock_books", none, monitor.get_low_stock_books),
+        ("monitor.get_dashboard_snapshot", none, monitor.get_dashboard_snapshot),
+        ("monitor.get_purchase_history", none, monitor.get_purchase_history),
+        ("monitor.get_purchase_history[30d]", none, lambda: monitor.get_purchase_history(start, end)),
+        ("monitor.get_purchase_history[page]", none,
+         lambda: monitor.get_purchase_history("2025-01-01", end, page_size=100)),
+        ("monitor.iter_purchase_history", none,
+         lambda: sum(len(batch) for batch in monitor.iter_purchase_history(start, end))),
+        ("monitor.get_query_plan_report", none, monitor.get_query_plan_report),
+        ("monitor.check_stats_consistency", none, monitor.check_stats_consistency),
+
+        ("file_manager.export_data", none, lambda: file_manager.export_data("Books", "bench_books.csv")),
+        ("file_manager.import_data",
+         ctx.export_customers,
+         lambda: file_manager.import_data("Customers", "bench_customers.csv")),
+        ("file_manager.export_all", none, lambda: file_manager.export_all()),
+        ("file_manager.import_all[Customers]", none, lambda: file_manager.import_all(["Customers"])),
+        ("file_manager.export_changes", none, lambda: file_manager.export_changes(ctx.watermark)),
+        ("file_manager.purge_changes", none, lambda: file_manager.purge_changes(ctx.watermark)),
+
+        ("backup.backup_database", none, lambda: backup.backup_database("bench_backup.db")),
+        ("backup.restore_database", none, lambda: backup.restore_database("bench_backup.db")),
+    ]
+
+
+def public_functions():
+    """Zwraca nazwy publicznych funkcji mierzonych modułów (moduł.funkcja)."""
+    names = set()
+    for module in MODULES:
+        short_name = module.__name__.rsplit(".", 1)[-1]
+        for name, obj in vars(module).items():
+            if inspect.isfunction(obj) and obj.__module__ == module.__name__ and not name.startswith("_"):
+                names.add(f"{short_name}.{name}")
+    return names
+
+
+def time_case(setup, call):
+    """Powtarza wywołanie, aż łączny czas przekroczy MIN_TIME (co najmniej raz, najwyżej MAX_RUNS)."""
+    durations = []
+    result = None
+    while len(durations) < MAX_RUNS and (not durations or sum(durations) < MIN_TIME):
+        args = setup()
+        started = time.perf_counter()
+        result = call(*args)
+        durations.append(time.perf_counter() - started)
+    return {
+        "median_ms": statistics.median(durations) * 1000,
+        "min_ms": min(durations) * 1000,
+        "runs": len(durations),
+        "code": result.get("code") if isinstance(result, dict) else None,
+    }
+
+
+def run_scale(scale, seed=42):
+    with tempfile.TemporaryDirectory() as directory:
+        generated = generate_database(os.path.join(directory, "bench.db"), scale, seed, END_DATE)
+        print(f"[{scale}] dane wygenerowane w {generated['seconds']:.1f} s")
+        file_manager.CSV_DIR = directory
+        backup.BACKUP_DIR = os.path.join(directory, "backups")
+        ctx = Context()
+        results = {}
+        for name, setup, call in build_cases(ctx):
+            results[name] = time_case(setup, call)
+            print(f"[{scale}] {name:<45} {results[name]['median_ms']:>10.2f} ms  "
+                  f"(n={results[name]['runs']}, kod {results[name]['code']})")
+        utilities.get_pool().close()
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Zwraca listę regresji względem baseline'u: (skala, nazwa, baseline ms, obecnie ms) - minimum czasu."""
+    regressions = []
+    for scale, cases in results.items():
+        for name, current in cases.items():
+            previous = baseline.get("results", {}).get(scale, {}).get(name)
+            if previous is None:
+                continue
+            if (current["min_ms"] > previous["min_ms"] * tolerance
+                    and current["min_ms"] - previous["min_ms"] > min_delta_ms):
+                regressions.append((scale, name, previous["min_ms"], current["min_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark wszystkich publicznych funkcji księgarni.")
+    parser.add_argument("--scales", nargs="+", default=["1k", "100k"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Plik JSON z wynikami.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Zapisz wyniki jako nowy baseline.")
+    parser.add_argument("--tolerance", type=float, default=2.0)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+    # Mierzone są zapytania do bazy, a nie trafienia w cache wyników statystyk
+    cache.disable()
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "results": {scale: run_scale(scale, args.seed) for scale in args.scales},
+    }
+
+    covered = {name.split("[")[0] for cases in report["results"].values() for name in cases}
+    missing = sorted(public_functions() - covered)
+    if missing:
+        print(f"Funkcje bez przypadku testowego: {', '.join(missing)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f"Baseline zapisany do {args.baseline}.")
+        return 0
+
+    violations = bench_importtime.check()
+    for violation in violations:
+        print(f"PRZEKROCZENIE: {violation}")
+
+    if not os.path.exists(args.baseline):
+        print(f"Brak baseline'u {args.baseline} - porównanie pominięte.")
+        return 1 if violations else 0
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    regressions = compare(report["results"], baseline, args.tolerance, args.min_delta_ms)
+    for scale, name, previous, current in regressions:
+        print(f"REGRESJA [{scale}] {name}: {previous:.2f} ms -> {current:.2f} ms")
+    if not regressions:
+        print("Brak regresji względem baseline'u.")
+    return 1 if regressions or violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,257 @@
+# __main__.py
+"""
+Nieinteraktywny interfejs księgarni.
+
+Uruchomienie:
+    python -m bookstore                                   # menu interaktywne (bookstore.main)
+    python -m bookstore [--db PLIK] <funkcja> [argumenty]  # jedna operacja, wynik jako JSON
+    python -m bookstore [--db PLIK] batch operacje.jsonl [--group-size N] [--output wyniki.jsonl]
+
+Podkomendy odpowiadają publicznym funkcjom book_Manager, customer_Manager, monitor,
+file_manager i backup (`python -m bookstore <funkcja> -h` wyświetla jej dokumentację).
+Parametry bez wartości domyślnej są pozycyjne, pozostałe podawane jako `--nazwa`.
+Wartości w formacie JSON (liczby, słowniki, listy, true/false/null) są dekodowane,
+pozostałe przekazywane jako tekst. Kod wyjścia wynosi 1, gdy kod odpowiedzi jest >= 400.
+"""
+import sys
+import json
+import time
+import inspect
+import sqlite3
+import argparse
+import itertools
+from collections import Counter
+from contextlib import nullcontext
+
+from bookstore import book_Manager, customer_Manager, monitor, file_manager, backup
+from bookstore.utilities import initialize_database, configure_pool, get_connection, transaction_group
+
+MODULES = (book_Manager, customer_Manager, monitor, file_manager, backup)
+BATCH_GROUP_SIZE = 1000  # Liczba operacji zatwierdzanych razem w jednej transakcji w trybie wsadowym
+BATCH_EXCLUDED = {"backup_database", "restore_database"}  # Operują na całym pliku bazy, nie w transakcji grupy
+SKIPPED_PARAMETERS = {"progress"}  # Funkcje zwrotne niedostępne z wiersza poleceń
+# Identyfikatory i nazwy przekazywane zawsze jako tekst (np. tytuł "1984" lub imię złożone z cyfr)
+TEXT_PARAMETERS = {"data", "customer_data", "book_data", "author", "genre", "query", "table_name", "filename"}
+# Wyjątki z argumentów o złym typie lub kształcie (np. lista zamiast słownika książki) - kod 400
+ARGUMENT_ERRORS = (TypeError, ValueError, AttributeError, KeyError, IndexError)
+
+
+def commands():
+    """Zwraca słownik nazwa -> funkcja publicznych funkcji modułów MODULES (w kolejności definicji)."""
+    functions = {}
+    for module in MODULES:
+        for name, obj in vars(module).items():
+            if inspect.isfunction(obj) and obj.__module__ == module.__name__ and not name.startswith("_"):
+                functions[name] = obj
+    return functions
+
+
+def _value(text):
+    """Wartość argumentu z wiersza poleceń: zdekodowany JSON albo tekst."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def build_parser(functions):
+    parser = argparse.ArgumentParser(prog="python -m bookstore",
+                                     description="Operacje księgarni z wiersza poleceń. "
+                                                 "Bez polecenia uruchamiane jest menu interaktywne.")
+    parser.add_argument("--db", help="Plik bazy danych (domyślnie DATABASE/bookstore_main.db).")
+    subparsers = parser.add_subparsers(dest="command", metavar="polecenie")
+
+    batch = subparsers.add_parser("batch", help="Wykonuje operacje z pliku JSONL w grupach transakcji.",
+                                  description="Każda linia pliku to operacja {\"op\": \"nazwa_funkcji\", "
+                                              "\"args\": {...} lub [...]}. Operacje wykonywane są na jednym "
+                                              "połączeniu z puli, po --group-size w jednej transakcji.")
+    batch.add_argument("path", help="Plik JSONL z operacjami.")
+    batch.add_argument("--group-size", type=int, default=BATCH_GROUP_SIZE,
+                       help=f"Liczba operacji w jednej transakcji (domyślnie {BATCH_GROUP_SIZE}).")
+    batch.add_argument("--output", help="Plik JSONL z wynikami operacji (numer linii, kod, komunikat, dane).")
+
+    for name, func in functions.items():
+        doc = inspect.getdoc(func) or ""
+        summary = " ".join(doc.split("\n\n")[0].split())
+        subparser = subparsers.add_parser(name, help=summary or None, description=doc,
+                                          formatter_class=argparse.RawDescriptionHelpFormatter)
+        for param_name, param in inspect.signature(func).parameters.items():
+            if param_name in SKIPPED_PARAMETERS:
+                continue
+            value_type = str if param_name in TEXT_PARAMETERS or isinstance(param.default, str) else _value
+            if param.default is inspect.Parameter.empty:
+                subparser.add_argument(param_name, type=value_type)
+            else:
+                # Pominięty argument - obowiązuje wartość domyślna funkcji
+                subparser.add_argument(f"--{param_name.replace('_', '-')}", dest=param_name, type=value_type,
+                                       default=argparse.SUPPRESS, help=f"domyślnie {param.default!r}")
+    return parser
+
+
+def _parse_operation(line, functions):
+    """Zwraca (funkcja, args, kwargs) operacji z linii JSONL albo odpowiedź z błędem."""
+    try:
+        operation = json.loads(line)
+    except ValueError as e:
+        return {"code": 400, "message": f"Nieprawidłowy JSON: {e}"}
+    if not isinstance(operation, dict):
+        return {"code": 400, "message": "Operacja musi być obiektem JSON z polem 'op'."}
+
+    name = operation.get("op")
+    func = functions.get(name)
+    if func is None:
+        return {"code": 400, "message": f"Nieznana operacja: {name}."}
+    if name in BATCH_EXCLUDED or inspect.isgeneratorfunction(func):
+        return {"code": 400, "message": f"Operacja {name} jest niedostępna w trybie wsadowym."}
+
+    args = operation.get("args", {})
+    if isinstance(args, dict):
+        return func, (), args
+    if isinstance(args, list):
+        return func, args, {}
+    return {"code": 400, "message": "Pole 'args' musi być obiektem (argumenty nazwane) lub listą."}
+
+
+def _error_result(func, error):
+    """Odpowiedź z błędem dla wyjątku zgłoszonego przez funkcję operacji."""
+    if isinstance(error, ARGUMENT_ERRORS):
+        return {"code": 400, "message": f"Nieprawidłowe argumenty operacji {func.__name__}: {error}"}
+    if isinstance(error, sqlite3.Error):
+        return {"code": 500, "message": f"Błąd bazy danych w operacji {func.__name__}: {error}"}
+    return {"code": 500, "message": f"Nieoczekiwany błąd operacji {func.__name__}: {error!r}"}
+
+
+def _run_operation(group, line, functions):
+    parsed = _parse_operation(line, functions)
+    if isinstance(parsed, dict):
+        return parsed
+    func, args, kwargs = parsed
+    with group.operation():
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.Error as e:
+            # Transakcja grupy przerwana przez SQLite (np. błąd zapisu) - wycofanie całej grupy
+            if not group.in_transaction:
+                raise
+            return _error_result(func, e)
+        except Exception as e:
+            # Zmiany operacji wycofuje punkt zapisu, pozostałe operacje grupy są wykonywane dalej
+            return _error_result(func, e)
+
+
+def run_batch(path, group_size=BATCH_GROUP_SIZE, output=None):
+    """
+    Wykonuje operacje z pliku JSONL na jednym połączeniu z puli, po `group_size` operacji
+    w jednej transakcji (transaction_group).
+
+    Każda operacja działa jak osobne wywołanie funkcji: jej niezatwierdzone zmiany są
+    wycofywane (punkt zapisu), a błąd operacji - także wyjątek zgłoszony przez funkcję
+    (400 dla błędnych argumentów, inaczej 500) - nie przerywa grupy. Tylko błąd bazy
+    danych, który przerwał transakcję, wycofuje całą grupę - jej operacje otrzymują kod 500.
+
+    Args:
+        path (str): Plik JSONL; każda linia to {"op": nazwa funkcji, "args": obiekt lub lista}.
+        group_size (int, optional): Liczba operacji w jednej transakcji.
+        output (str, optional): Plik JSONL z wynikami (pole "line" - numer linii operacji).
+
+    Returns:
+        dict: Słownik zawierający kod odpowiedzi, komunikat (z przepustowością) i dane:
+              operations, groups, codes (liczba odpowiedzi według kodu), failed, seconds, ops_per_sec.
+    """
+    if group_size < 1:
+        return {
+            "code": 400,
+            "message": "Rozmiar grupy musi być liczbą dodatnią."
+        }
+
+    functions = commands()
+    codes = Counter()
+    groups = 0
+    started = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8") as file, \
+                (open(output, "w", encoding="utf-8") if output else nullcontext()) as results, \
+                get_connection():
+            lines = ((number, line) for number, line in enumerate(file, 1) if line.strip())
+            while chunk := list(itertools.islice(lines, group_size)):
+                try:
+                    with transaction_group() as group:
+                        done = [(number, _run_operation(group, line, functions)) for number, line in chunk]
+                except sqlite3.Error as e:
+                    done = [(number, {"code": 500, "message": f"Grupa operacji wycofana - błąd bazy danych: {e}"})
+                            for number, _ in chunk]
+                groups += 1
+                for number, result in done:
+                    codes[result.get("code")] += 1
+                    if results is not None:
+                        results.write(json.dumps({"line": number, **result}, ensure_ascii=False, default=str) + "\n")
+    except FileNotFoundError:
+        return {
+            "code": 404,
+            "message": f"Plik '{path}' nie istnieje."
+        }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych w trybie wsadowym: {e}"
+        }
+
+    seconds = time.perf_counter() - started
+    operations = sum(codes.values())
+    failed = sum(count for code, count in codes.items() if not isinstance(code, int) or code >= 400)
+    ops_per_sec = operations / seconds if seconds else 0.0
+    return {
+        "code": 200,
+        "message": f"Wykonano {operations} operacji ({failed} z błędem) w {groups} transakcjach "
+                   f"w {seconds:.2f} s ({ops_per_sec:.0f} operacji/s).",
+        "data": {
+            "operations": operations,
+            "groups": groups,
+            "codes": dict(sorted(codes.items(), key=lambda item: str(item[0]))),
+            "failed": failed,
+            "seconds": seconds,
+            "ops_per_sec": ops_per_sec
+        }
+    }
+
+
+def _print_result(result):
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+
+
+def main(argv=None):
+    functions = commands()
+    args = vars(build_parser(functions).parse_args(argv))
+    db_path = args.pop("db")
+    command = args.pop("command")
+    if db_path:
+        configure_pool(db_path)
+
+    if command is None:
+        from bookstore.main import __main__ as interactive_menu
+        interactive_menu()
+        return 0
+
+    initialize_database()
+    if command == "batch":
+        result = run_batch(**args)
+        _print_result(result)
+        return 0 if result["code"] == 200 and not result["data"]["failed"] else 1
+
+    func = functions[command]
+    try:
+        result = func(**args)
+        if inspect.isgenerator(result):
+            # iter_*: partie wierszy wypisywane jako kolejne linie JSON
+            for batch in result:
+                for row in batch:
+                    print(json.dumps(row, ensure_ascii=False, default=str))
+            return 0
+    except Exception as e:
+        result = _error_result(func, e)
+    _print_result(result)
+    return 0 if result.get("code", 500) < 400 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+# bookstore/backup.py
+import os
+import gzip
+import time
+import shutil
+import sqlite3
+from datetime import datetime
+from urllib.parse import quote
+
+from bookstore.utilities import get_connection, get_pool, FILE_DIR
+from bookstore.migrations import MIGRATIONS, SQL_CHANGE_WATERMARK, migrate
+from bookstore.metrics import instrument
+from bookstore.cache import invalidates, clear as clear_cache
+
+BACKUP_DIR = os.path.join(FILE_DIR, "backups")
+BACKUP_PAGES_PER_STEP = 1024  # Strony kopiowane w jednym kroku API backup (4 MB przy stronie 4 KiB)
+BACKUP_COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}  # kompresja -> rozszerzenie pliku
+BACKUP_GZIP_LEVEL = 1  # Plik bazy jest duży: poziom 1 kompresuje ok. 2,7x szybciej niż 6, plik większy o ok. 10%
+BACKUP_ZSTD_LEVEL = 3
+BACKUP_COPY_BUFFER = 1024 * 1024  # Rozmiar bufora przy kompresji i dekompresji pliku kopii
+# Weryfikacja kopii: tryb -> PRAGMA (quick_check pomija porównanie indeksów z tabelami)
+BACKUP_VERIFY_PRAGMAS = {"quick": "quick_check", "full": "integrity_check"}
+BACKUP_REQUIRED_TABLES = ("Customers", "Books", "Purchases")
+
+
+def _open_compressed(path, mode, compression):
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=BACKUP_GZIP_LEVEL) if mode == "wb" else gzip.open(path, mode)
+    import zstandard  # opcjonalna zależność, potrzebna tylko dla kompresji zstd
+    if mode == "wb":
+        # Suma kontrolna ramki sprawdzana przy dekompresji
+        compressor = zstandard.ZstdCompressor(level=BACKUP_ZSTD_LEVEL, write_checksum=True)
+        return compressor.stream_writer(open(path, "wb"))
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+def _compression(filename):
+    return next((name for name, suffix in BACKUP_COMPRESSIONS.items() if filename.endswith(suffix)), None)
+
+
+def _remove(path):
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _copy_pages(source, target, pages, progress):
+    """Kopiuje bazę API backup w krokach po `pages` stron; zwraca (liczba stron, liczba kroków)."""
+    steps = 0
+    total = 0
+
+    def on_step(status, remaining, page_count):
+        nonlocal steps, total
+        steps += 1
+        total = page_count
+        if progress is not None:
+            progress(page_count - remaining, page_count)
+
+    source.backup(target, pages=pages, progress=on_step)
+    return total, steps
+
+
+def _reset_change_log(conn, watermark):
+    """
+    Po przywróceniu kopii usuwa dziennik zmian i przesuwa jego licznik za znacznik sprzed
+    przywrócenia, aby nowe zmiany nie dostały znaczników widzianych już przez odbiorców
+    export_changes. Każdy wcześniejszy znacznik otrzymuje wtedy 409 (potrzebny pełny eksport).
+    """
+    conn.execute("BEGIN IMMEDIATE;")
+    conn.execute("DELETE FROM ChangeLog;")
+    seq = max(watermark, conn.execute(SQL_CHANGE_WATERMARK).fetchone()[0]) + 1
+    if not conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'ChangeLog';", (seq,)).rowcount:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('ChangeLog', ?);", (seq,))
+    conn.commit()
+
+
+def _verify(conn, verify):
+    """Sprawdza spójność bazy; zwraca listę błędów (pusta, gdy baza jest poprawna)."""
+    if verify is None:
+        return []
+    rows = [row[0] for row in conn.execute(f"PRAGMA {BACKUP_VERIFY_PRAGMAS[verify]};")]
+    return [] if rows == ["ok"] else rows
+
+
+@instrument
+def backup_database(filename=None, compression=None, verify="quick", pages=BACKUP_PAGES_PER_STEP, progress=None):
+    """
+    Tworzy kopię zapasową bazy danych na działającej bazie (API backup SQLite).
+
+    Baza kopiowana jest krokami po `pages` stron wewnątrz jednej transakcji odczytu, więc
+    kopia odpowiada jednej migawce WAL, a zapisy innych połączeń nie są blokowane i nie
+    powodują ponownego rozpoczęcia kopiowania. Kopia zapisywana jest najpierw do pliku
+    tymczasowego, przełączana w tryb dziennika DELETE (jeden plik bez -wal), sprawdzana
+    (PRAGMA quick_check lub integrity_check) i opcjonalnie kompresowana. Przerwana kopia
+    nie zostawia niepełnego pliku.
+
+    Args:
+        filename (str, optional): Nazwa pliku w folderze DATABASE/backups (lub pełna ścieżka).
+                                  Domyślnie 'bookstore_RRRRMMDD_GGMMSS.db' z rozszerzeniem kompresji.
+        compression (str, optional): None, "gzip" lub "zstd" (wymaga pakietu zstandard).
+                                     Domyślnie wykrywana z rozszerzenia pliku (.gz, .zst).
+        verify (str, optional): "quick" (domyślnie), "full" lub None (bez weryfikacji).
+        pages (int, optional): Liczba stron kopiowanych w jednym kroku.
+        progress (callable, optional): Wywoływana po każdym kroku jako progress(skopiowane_strony, wszystkie_strony).
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (nieznana kompresja lub tryb weryfikacji, brak pakietu),
+              500 (błąd bazy, nieudana weryfikacja lub błąd ogólny).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict, tylko przy code=200): path, pages, page_size, steps, bytes (rozmiar bazy),
+              file_bytes (rozmiar pliku kopii), seconds, copy_seconds, verify_seconds, compress_seconds,
+              pages_per_sec i mb_per_sec (szybkość kopiowania stron).
+    """
+    if filename and compression is None:
+        compression = _compression(filename)
+    if compression is not None and compression not in BACKUP_COMPRESSIONS:
+        return {
+            "code": 400,
+            "message": f"Nieznana kompresja: {compression}. Dostępne: {', '.join(BACKUP_COMPRESSIONS)}."
+        }
+    if verify is not None and verify not in BACKUP_VERIFY_PRAGMAS:
+        return {
+            "code": 400,
+            "message": f"Nieznany tryb weryfikacji: {verify}. Dostępne: {', '.join(BACKUP_VERIFY_PRAGMAS)}."
+        }
+
+    filename = filename or (datetime.now().strftime("bookstore_%Y%m%d_%H%M%S.db")
+                            + BACKUP_COMPRESSIONS.get(compression, ""))
+    full_path = os.path.join(BACKUP_DIR, filename)
+    temp_path = f"{full_path}.tmp"
+    compressed_path = f"{full_path}.part"
+    started = time.perf_counter()
+
+    try:
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        target = sqlite3.connect(temp_path)
+        try:
+            with get_connection() as conn:
+                own_transaction = not conn.in_transaction
+                if own_transaction:
+                    # Migawka WAL ustalana przy pierwszym odczycie i utrzymywana między krokami
+                    conn.execute("BEGIN;")
+                    conn.execute("SELECT 1 FROM sqlite_master LIMIT 1;").fetchone()
+                try:
+                    copy_started = time.perf_counter()
+                    total_pages, steps = _copy_pages(conn, target, pages, progress)
+                    copy_seconds = time.perf_counter() - copy_started
+                finally:
+                    if own_transaction:
+                        conn.rollback()
+
+            page_size = target.execute("PRAGMA page_size;").fetchone()[0]
+            target.execute("PRAGMA journal_mode = DELETE;")
+            verify_started = time.perf_counter()
+            errors = _verify(target, verify)
+            verify_seconds = time.perf_counter() - verify_started
+        finally:
+            target.close()
+        if errors:
+            return {
+                "code": 500,
+                "message": f"Weryfikacja kopii zapasowej nie powiodła się: {'; '.join(errors[:5])}"
+            }
+
+        compress_started = time.perf_counter()
+        if compression is None:
+            os.replace(temp_path, full_path)
+        else:
+            with open(temp_path, "rb") as source, _open_compressed(compressed_path, "wb", compression) as output:
+                shutil.copyfileobj(source, output, BACKUP_COPY_BUFFER)
+            os.replace(compressed_path, full_path)
+        compress_seconds = time.perf_counter() - compress_started
+
+        database_bytes = total_pages * page_size
+        return {
+            "code": 200,
+            "message": f"Kopia zapasowa bazy danych zapisana do '{full_path}'.",
+            "data": {
+                "path": full_path,
+                "pages": total_pages,
+                "page_size": page_size,
+                "steps": steps,
+                "bytes": database_bytes,
+                "file_bytes": os.path.getsize(full_path),
+                "seconds": time.perf_counter() - started,
+                "copy_seconds": copy_seconds,
+                "verify_seconds": verify_seconds,
+                "compress_seconds": compress_seconds,
+                "pages_per_sec": total_pages / copy_seconds if copy_seconds else None,
+                "mb_per_sec": database_bytes / 2 ** 20 / copy_seconds if copy_seconds else None
+            }
+        }
+    except ImportError as e:
+        package = e.name.split(".")[0]
+        return {
+            "code": 400,
+            "message": f"Wybrana kompresja wymaga pakietu '{package}' (pip install {package})."
+        }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas tworzenia kopii zapasowej: {e}"
+        }
+    except Exception as e:
+        return {
+            "code": 500,
+            "message": f"Wystąpił nieoczekiwany błąd podczas tworzenia kopii zapasowej: {e}"
+        }
+    finally:
+        _remove(temp_path)
+        _remove(compressed_path)
+
+
+@instrument
+@invalidates("Customers", "Books", "Purchases")
+def restore_database(filename, verify="quick", pages=BACKUP_PAGES_PER_STEP, progress=None):
+    """
+    Przywraca bazę danych z kopii zapasowej utworzonej przez backup_database.
+
+    Kopia (po dekompresji do pliku tymczasowego obok bazy) jest najpierw sprawdzana:
+    spójność (PRAGMA quick_check lub integrity_check), obecność tabel księgarni i wersja
+    schematu nie nowsza niż obsługiwana. Dopiero wtedy jest kopiowana do działającej
+    bazy API backup, krokami po `pages` stron, w jednej transakcji zapisu - inne
+    połączenia do końca widzą poprzednią zawartość. Kopia ze starszą wersją schematu
+    jest następnie migrowana, a cache wyników statystyk czyszczony. Na koniec punkt
+    kontrolny WAL przenosi przywrócone strony do pliku bazy.
+
+    Args:
+        filename (str): Nazwa pliku w folderze DATABASE/backups (lub pełna ścieżka); .gz i .zst są dekompresowane.
+        verify (str, optional): "quick" (domyślnie), "full" lub None (bez weryfikacji).
+        pages (int, optional): Liczba stron kopiowanych w jednym kroku.
+        progress (callable, optional): Wywoływana po każdym kroku jako progress(skopiowane_strony, wszystkie_strony).
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (nieprawidłowa kopia lub tryb weryfikacji, brak pakietu),
+              404 (brak pliku), 409 (kopia z nowszej wersji schematu), 500 (błąd bazy lub ogólny).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict, tylko przy code=200): path, pages, steps, schema_version, seconds,
+              decompress_seconds, verify_seconds, copy_seconds, checkpoint_seconds i pages_per_sec.
+    """
+    if verify is not None and verify not in BACKUP_VERIFY_PRAGMAS:
+        return {
+            "code": 400,
+            "message": f"Nieznany tryb weryfikacji: {verify}. Dostępne: {', '.join(BACKUP_VERIFY_PRAGMAS)}."
+        }
+    full_path = os.path.join(BACKUP_DIR, filename)
+    if not os.path.exists(full_path):
+        return {
+            "code": 404,
+            "message": f"Nie znaleziono pliku kopii zapasowej: '{full_path}'."
+        }
+
+    compression = _compression(full_path)
+    temp_path = f"{get_pool().db_path}.restore"
+    started = time.perf_counter()
+
+    try:
+        decompress_started = time.perf_counter()
+        if compression is not None:
+            with _open_compressed(full_path, "rb", compression) as source, open(temp_path, "wb") as output:
+                shutil.copyfileobj(source, output, BACKUP_COPY_BUFFER)
+        decompress_seconds = time.perf_counter() - decompress_started
+
+        # Kopia otwierana tylko do odczytu, bez plików -wal/-shm
+        source_path = temp_path if compression is not None else full_path
+        source = sqlite3.connect(f"file:{quote(source_path)}?mode=ro&immutable=1", uri=True)
+        try:
+            verify_started = time.perf_counter()
+            try:
+                errors = _verify(source, verify)
+                tables = {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+            except sqlite3.DatabaseError as e:
+                errors = [str(e)]
+            verify_seconds = time.perf_counter() - verify_started
+            missing = [table for table in BACKUP_REQUIRED_TABLES if not errors and table not in tables]
+            if errors or missing:
+                return {
+                    "code": 400,
+                    "message": f"Plik '{full_path}' nie jest poprawną kopią bazy księgarni: "
+                               + "; ".join(errors[:5] or [f"brak tabeli {table}" for table in missing])
+                }
+            schema_version = source.execute("PRAGMA user_version;").fetchone()[0]
+            latest_version = MIGRATIONS[-1][0]
+            if schema_version > latest_version:
+                return {
+                    "code": 409,
+                    "message": f"Kopia ma schemat w wersji {schema_version}, nowszej niż obsługiwana ({latest_version})."
+                }
+
+            with get_connection() as conn:
+                if conn.in_transaction:
+                    conn.commit()
+                watermark = conn.execute(SQL_CHANGE_WATERMARK).fetchone()[0]
+                copy_started = time.perf_counter()
+                total_pages, steps = _copy_pages(source, conn, pages, progress)
+                copy_seconds = time.perf_counter() - copy_started
+        finally:
+            source.close()
+
+        clear_cache()
+        if schema_version < latest_version:
+            result = migrate()
+            if result["code"] != 200:
+                return result
+        with get_connection() as conn:
+            _reset_change_log(conn, watermark)
+            # Przywrócone strony trafiły do pliku WAL - przeniesienie ich do bazy i skrócenie WAL
+            checkpoint_started = time.perf_counter()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            checkpoint_seconds = time.perf_counter() - checkpoint_started
+
+        return {
+            "code": 200,
+            "message": f"Baza danych przywrócona z kopii '{full_path}' (schemat w wersji {schema_version}"
+                       + (f", zmigrowany do {latest_version})." if schema_version < latest_version else ")."),
+            "data": {
+                "path": full_path,
+                "pages": total_pages,
+                "steps": steps,
+                "schema_version": schema_version,
+                "seconds": time.perf_counter() - started,
+                "decompress_seconds": decompress_seconds,
+                "verify_seconds": verify_seconds,
+                "copy_seconds": copy_seconds,
+                "checkpoint_seconds": checkpoint_seconds,
+                "pages_per_sec": total_pages / copy_seconds if copy_seconds else None
+            }
+        }
+    except ImportError as e:
+        package = e.name.split(".")[0]
+        return {
+            "code": 400,
+            "message": f"Kopia skompresowana zstd wymaga pakietu '{package}' (pip install {package})."
+        }
+    except (OSError, EOFError) as e:
+        return {
+            "code": 400,
+            "message": f"Nie udało się odczytać pliku kopii zapasowej '{full_path}': {e}"
+        }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas przywracania kopii zapasowej: {e}"
+        }
+    except Exception as e:
+        return {
+            "code": 500,
+            "message": f"Wystąpił nieoczekiwany błąd podczas przywracania kopii zapasowej: {e}"
+        }
+    finally:
+        _remove(temp_path)
@@ -1,29 +1,46 @@
 # book_Manager.py
 import sqlite3
-from bookstore.utilities import DB_PATH
+from bookstore.utilities import get_connection, build_fts_query, apply_stock_change, adjust_book_stats, \
+    log_book_changes
+from bookstore.metrics import instrument
+from bookstore.cache import invalidates
 from datetime import datetime
-import time
 
+# Wyszukiwanie pełnotekstowe z rankingiem BM25 (waga: tytuł > autor > gatunek)
+SQL_SEARCH_BOOKS = """
+                   SELECT b.BookID, b.Title, b.Author, b.Genre, b.Price, b.Stock, b.DateAdded
+                   FROM BooksFTS
+                            JOIN Books b ON b.BookID = BooksFTS.rowid
+                   WHERE BooksFTS MATCH ?
+                   ORDER BY bm25(BooksFTS, 10.0, 5.0, 1.0)
+                   LIMIT ? OFFSET ?;
+                   """
 
-def log_performance(func):
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Funkcja '{func.__name__}' wykonana w {end_time - start_time:.4f} sekund.")
-        return result
+# Paginacja po kluczu (keyset): kolejna strona zaczyna się za ostatnim BookID poprzedniej
+SQL_BOOKS_PAGE = "SELECT * FROM Books WHERE BookID > ? ORDER BY BookID LIMIT ?;"
 
-    return wrapper
 
-
-def get_book(data=None):
+@instrument
+def get_book(data=None, page_size=None, after_id=0):
     """
     Pobiera książki z bazy danych. Można pobrać wszystkie książki, książki o
     określonym ID lub książki o określonym tytule.
 
+    Tytuł wyszukiwany jest w indeksie pełnotekstowym (patrz `search_books`):
+    każde słowo musi wystąpić w tytule jako całe słowo lub jego początek, a wyniki
+    posortowane są według trafności. Fragment ze środka słowa nie jest dopasowywany
+    ("pot" znajdzie "Potter", "otter" - nie).
+
+    Listę wszystkich książek można pobierać stronami (paginacja po kluczu BookID):
+    należy podać `page_size`, a kolejną stronę pobrać przekazując `next_cursor`
+    z poprzedniej odpowiedzi jako `after_id`.
+
     Args:
         data (str, optional): ID książki (jako string) lub tytuł książki (jako string).
                               Jeśli brak argumentu (domyślnie None), pobierane są wszystkie książki.
+        page_size (int, optional): Rozmiar strony przy pobieraniu wszystkich książek.
+                                   Domyślnie None - wszystkie książki naraz.
+        after_id (int, optional): Zwraca książki o BookID większym od podanego (kursor strony).
 
     Returns:
         dict: Słownik zawierający:
@@ -40,43 +57,169 @@ def get_book(data=None):
                 - Price (float): Cena książki.
                 - Stock (int): Stan magazynowy książki.
                 - DateAdded (str): Data dodania książki (ISO format YYYY-MM-DD HH:MM:SS).
+
+            - next_cursor (int | None, tylko przy `page_size`): `after_id` następnej strony lub None dla ostatniej.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            if data is None and page_size:
+                books = cursor.execute(SQL_BOOKS_PAGE, (after_id, page_size)).fetchall()
+                if books:
+                    return {
+                        "code": 200,
+                        "message": "Znaleziono książki.",
+                        "data": books,
+                        "next_cursor": books[-1][0] if len(books) == page_size else None
+                    }
+                else:
+                    return {
+                        "code": 404,
+                        "message": "Brak książek spełniających kryteria.",
+                        "next_cursor": None
+                    }
+            elif data is None:
+                cursor.execute("SELECT * FROM Books;")
+            elif str(data).isdigit():  # Sprawdź, czy dane to cyfra (ID)
+                cursor.execute("SELECT * FROM Books WHERE BookID = ?;", (data,))
+            elif build_fts_query(data) is None:  # Tekst bez słów (np. same znaki interpunkcyjne)
+                cursor.execute("SELECT * FROM Books WHERE Title LIKE ?;", (f"%{data}%",))
+            else:  # Zakładamy, że to tytuł - wyszukiwanie w indeksie pełnotekstowym
+                cursor.execute(SQL_SEARCH_BOOKS, (build_fts_query(data, columns=("Title",)), -1, 0))
+
+            books = cursor.fetchall()
+
+            if books:
+                return {
+                    "code": 200,
+                    "message": "Znaleziono książki.",
+                    "data": books
+                }
+            else:
+                return {
+                    "code": 404,
+                    "message": "Brak książek spełniających kryteria."
+                }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas pobierania książek: {e}"
+        }
 
-        if data is None:
-            cursor.execute("SELECT * FROM Books;")
-        elif str(data).isdigit():  # Sprawdź, czy dane to cyfra (ID)
-            cursor.execute("SELECT * FROM Books WHERE BookID = ?;", (data,))
-        else:  # Zakładamy, że to tytuł
-            cursor.execute("SELECT * FROM Books WHERE Title LIKE ?;", (f"%{data}%",))
 
-        books = cursor.fetchall()
+@instrument
+def iter_books(batch_size=1000):
+    """
+    Generator zwracający wszystkie książki partiami o stałym rozmiarze.
 
-        if books:
-            return {
-                "code": 200,
-                "message": "Znaleziono książki.",
-                "data": books
-            }
-        else:
-            return {
-                "code": 404,
-                "message": "Brak książek spełniających kryteria."
-            }
+    Każda partia pobierana jest osobnym zapytaniem z paginacją po kluczu BookID,
+    więc zużycie pamięci nie zależy od liczby książek w bazie, a połączenie
+    nie jest zajmowane pomiędzy partiami.
+
+    Args:
+        batch_size (int, optional): Liczba książek w partii (domyślnie 1000).
+
+    Yields:
+        list: Lista krotek z danymi książek (jak w `get_book`), posortowana według BookID.
+
+    Raises:
+        sqlite3.Error: W przypadku błędu bazy danych.
+    """
+    after_id = 0
+    while True:
+        with get_connection() as conn:
+            books = conn.execute(SQL_BOOKS_PAGE, (after_id, batch_size)).fetchall()
+        if not books:
+            return
+        yield books
+        if len(books) < batch_size:
+            return
+        after_id = books[-1][0]
+
+
+@instrument
+def search_books(query, limit=20, offset=0, columns=None):
+    """
+    Wyszukuje książki w indeksie pełnotekstowym (FTS5) po tytule, autorze i gatunku.
+
+    Każde słowo zapytania dopasowywane jest prefiksowo ("pot" znajdzie "Potter",
+    ale "otter" - nie), wszystkie słowa muszą wystąpić. Wyniki są posortowane
+    według trafności (BM25).
+
+    Args:
+        query (str): Tekst wyszukiwania, np. "harry pot".
+        limit (int, optional): Maksymalna liczba wyników (domyślnie 20). None oznacza brak limitu.
+        offset (int, optional): Liczba wyników do pominięcia (stronicowanie).
+        columns (tuple, optional): Kolumny, do których ograniczyć wyszukiwanie, np. ("Title",).
+
+    Returns:
+        dict: Słownik zawierający:
+
+            - code (int): Kod HTTP. 200 jeśli znaleziono książki, 400 przy pustym zapytaniu, 404 jeśli brak wyników.
+
+            - message (str): Komunikat o wyniku operacji.
+
+            - data (list, jeżeli kod = 200): Lista krotek z danymi książek (jak w `get_book`).
+    """
+    match = build_fts_query(query, columns)
+    if match is None:
+        return {
+            "code": 400,
+            "message": "Zapytanie wyszukiwania nie zawiera żadnego słowa."
+        }
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_SEARCH_BOOKS, (match, -1 if limit is None else limit, offset))
+            books = cursor.fetchall()
+
+            if books:
+                return {
+                    "code": 200,
+                    "message": "Znaleziono książki.",
+                    "data": books
+                }
+            else:
+                return {
+                    "code": 404,
+                    "message": "Brak książek spełniających kryteria."
+                }
     except sqlite3.Error as e:
         return {
             "code": 500,
-            "message": f"Błąd bazy danych podczas pobierania książek: {e}"
+            "message": f"Błąd bazy danych podczas wyszukiwania książek: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 
-@log_performance
+def _validate_book_info(bookInfo):
+    """Zwraca słownik błędu walidacji (code 400) dla danych książki lub None, jeśli dane są poprawne."""
+    title = bookInfo.get('Title')
+    author = bookInfo.get('Author')
+    price = bookInfo.get('Price')
+    stock = bookInfo.get('Stock')
+
+    if not all([title, author, price is not None, stock is not None]):
+        return {
+            "code": 400,
+            "message": "Brakuje wymaganych pól: Tytuł, Autor, Cena, Stan magazynowy."
+        }
+    if not isinstance(price, (int, float)) or price < 0:
+        return {
+            "code": 400,
+            "message": "Cena musi być liczbą nieujemną."
+        }
+    if not isinstance(stock, int) or stock < 0:
+        return {
+            "code": 400,
+            "message": "Stan magazynowy musi być liczbą całkowitą nieujemną."
+        }
+    return None
+
+
+@instrument
+@invalidates("Books")
 def add_book(bookInfo):
     """
     Dodaje nową książkę do bazy danych.
@@ -92,45 +235,31 @@ def add_book(bookInfo):
     Returns:
         dict: Słownik zawierający kod odpowiedzi i komunikat.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        title = bookInfo.get('Title')
-        author = bookInfo.get('Author')
-        genre = bookInfo.get('Genre')
-        price = bookInfo.get('Price')
-        stock = bookInfo.get('Stock')
-
-        if not all([title, author, price is not None, stock is not None]):
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            error = _validate_book_info(bookInfo)
+            if error:
+                return error
+
+            title = bookInfo.get('Title')
+            author = bookInfo.get('Author')
+            genre = bookInfo.get('Genre')
+            price = bookInfo.get('Price')
+            stock = bookInfo.get('Stock')
+
+            date_added = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+            cursor.execute("""
+                           INSERT INTO Books (Title, Author, Genre, Price, Stock, DateAdded)
+                           VALUES (?, ?, ?, ?, ?, ?);
+                           """, (title, author, genre, price, stock, date_added))
+            conn.commit()
             return {
-                "code": 400,
-                "message": "Brakuje wymaganych pól: Tytuł, Autor, Cena, Stan magazynowy."
+                "code": 201,
+                "message": f"Książka '{title}' została pomyślnie dodana."
             }
-
-        if not isinstance(price, (int, float)) or price < 0:
-            return {
-                "code": 400,
-                "message": "Cena musi być liczbą nieujemną."
-            }
-        if not isinstance(stock, int) or stock < 0:
-            return {
-                "code": 400,
-                "message": "Stan magazynowy musi być liczbą całkowitą nieujemną."
-            }
-
-        date_added = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        cursor.execute("""
-                       INSERT INTO Books (Title, Author, Genre, Price, Stock, DateAdded)
-                       VALUES (?, ?, ?, ?, ?, ?);
-                       """, (title, author, genre, price, stock, date_added))
-        conn.commit()
-        return {
-            "code": 201,
-            "message": f"Książka '{title}' została pomyślnie dodana."
-        }
     except sqlite3.IntegrityError as e:
         return {
             "code": 409,  # Conflict
@@ -141,11 +270,86 @@ def add_book(bookInfo):
             "code": 500,
             "message": f"Błąd bazy danych podczas dodawania książki: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@invalidates("Books")
+def add_books(books, batch_size=5000):
+    """
+    Dodaje wiele książek naraz (np. przy odświeżaniu katalogu od dostawcy).
+
+    Wszystkie książki są najpierw walidowane w jednym przebiegu, a poprawne wstawiane
+    przez executemany w partiach po `batch_size`, każda partia w osobnej transakcji.
+    Indeks pełnotekstowy i liczniki Stats aktualizowane są raz na partię zamiast
+    wyzwalaczami dla każdego wiersza. Błędna książka nie przerywa importu pozostałych.
+
+    Args:
+        books (iterable): Słowniki z danymi książek (jak w `add_book`).
+        batch_size (int, optional): Liczba książek wstawianych w jednej transakcji.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 201 (wszystkie dodane), 200 (część dodana), 400 (żadna nie przeszła walidacji), 500 (błąd bazy).
+            - message (str): Komunikat z liczbą dodanych książek.
+            - data (list): Status każdej książki - słowniki (index, code, message), w kolejności wejścia.
+    """
+    date_added = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    statuses = []
+    rows = []
+    for index, bookInfo in enumerate(books):
+        error = _validate_book_info(bookInfo)
+        if error:
+            statuses.append({"index": index, **error})
+            continue
+        statuses.append({"index": index, "code": 201, "message": "OK"})
+        rows.append((index, (bookInfo['Title'], bookInfo['Author'], bookInfo.get('Genre'),
+                             bookInfo['Price'], bookInfo['Stock'], date_added)))
+
+    added = 0
+    try:
+        with get_connection() as conn:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                try:
+                    # Wyzwalacze FTS, Stats i ChangeLog pomijane - dane pochodne aktualizowane raz na partię
+                    conn.execute("INSERT INTO BulkLoad (TableName) VALUES ('Books');")
+                    last_id = conn.execute("SELECT COALESCE(MAX(BookID), 0) FROM Books;").fetchone()[0]
+                    conn.executemany("""
+                                     INSERT INTO Books (Title, Author, Genre, Price, Stock, DateAdded)
+                                     VALUES (?, ?, ?, ?, ?, ?);
+                                     """, [row for _, row in batch])
+                    conn.execute("""
+                                 INSERT INTO BooksFTS (rowid, Title, Author, Genre)
+                                 SELECT BookID, Title, Author, Genre
+                                 FROM Books
+                                 WHERE BookID > ?;
+                                 """, (last_id,))
+                    log_book_changes(conn, "I", "BookID > ?", (last_id,))
+                    adjust_book_stats(conn, len(batch), sum(1 for _, row in batch if row[4] == 0))
+                    conn.execute("DELETE FROM BulkLoad WHERE TableName = 'Books';")
+                    conn.commit()
+                    added += len(batch)
+                except sqlite3.IntegrityError as e:
+                    conn.rollback()
+                    for index, _ in batch:
+                        statuses[index] = {"index": index, "code": 409,
+                                           "message": f"Błąd integralności danych w partii: {e}"}
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas dodawania książek: {e}. Dodano {added} książek.",
+            "data": statuses
+        }
+
+    return {
+        "code": 201 if added == len(statuses) else 200 if added else 400,
+        "message": f"Dodano {added} z {len(statuses)} książek.",
+        "data": statuses
+    }
+
+
+@instrument
+@invalidates("Books")
 def remove_book(data):
     """
     Usuwa książkę z bazy danych.
@@ -156,84 +360,135 @@ def remove_book(data):
     Returns:
         dict: Słownik zawierający kod odpowiedzi i komunikat.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with get_connection() as conn:
+            cursor = conn.cursor()
 
-        if str(data).isdigit():  # Jeśli dane to cyfra (ID)
-            cursor.execute("DELETE FROM Books WHERE BookID = ?;", (data,))
-        else:  # Zakładamy, że to tytuł
-            cursor.execute("DELETE FROM Books WHERE Title = ?;", (data,))
+            if str(data).isdigit():  # Jeśli dane to cyfra (ID)
+                cursor.execute("DELETE FROM Books WHERE BookID = ?;", (data,))
+            else:  # Zakładamy, że to tytuł
+                cursor.execute("DELETE FROM Books WHERE Title = ?;", (data,))
 
-        deleted = cursor.rowcount
-        conn.commit()
-        return {
-            "code": 200 if deleted > 0 else 404,
-            "message": f"Usunięto {deleted} książkę(ki) z bazy danych." if deleted > 0 else "Nie znaleziono książki do usunięcia."
-        }
+            deleted = cursor.rowcount
+            conn.commit()
+            return {
+                "code": 200 if deleted > 0 else 404,
+                "message": f"Usunięto {deleted} książkę(ki) z bazy danych." if deleted > 0 else "Nie znaleziono książki do usunięcia."
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas usuwania książki: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 
-def update_book_stock(book_id, quantity_change):
+@instrument
+@invalidates("Books")
+def remove_books(ids, batch_size=5000):
     """
-    Aktualizuje stan magazynowy książki.
+    Usuwa wiele książek naraz według ID.
+
+    Istnienie książek sprawdzane jest jednym zapytaniem na partię, a usuwanie wykonywane
+    przez executemany w partiach po `batch_size`, każda partia w osobnej transakcji.
 
     Args:
-        book_id (int): ID książki.
-        quantity_change (int): Zmiana ilości (może być ujemna przy zakupie).
+        ids (iterable): ID książek (int lub string z cyframi).
+        batch_size (int, optional): Liczba książek usuwanych w jednej transakcji.
 
     Returns:
-        dict: Słownik zawierający kod odpowiedzi i komunikat.
+        dict: Słownik zawierający:
+            - code (int): 200 (usunięto co najmniej jedną), 404 (nic nie usunięto), 500 (błąd bazy).
+            - message (str): Komunikat z liczbą usuniętych książek.
+            - data (list): Status każdego ID - słowniki (index, book_id, code, message), w kolejności wejścia.
     """
-    conn = None
+    statuses = []
+    valid = []
+    for index, book_id in enumerate(ids):
+        if str(book_id).isdecimal():  # isdigit() przepuszcza np. "²", którego int() nie przyjmuje
+            statuses.append({"index": index, "book_id": int(book_id), "code": 200, "message": "OK"})
+            valid.append((index, int(book_id)))
+        else:
+            statuses.append({"index": index, "book_id": book_id, "code": 400,
+                             "message": "ID książki musi być liczbą całkowitą."})
+
+    deleted = 0
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with get_connection() as conn:
+            for start in range(0, len(valid), batch_size):
+                batch = valid[start:start + batch_size]
+                placeholders = ", ".join("?" * len(batch))
+                # Wyzwalacze FTS, Stats i ChangeLog pomijane - dane pochodne aktualizowane raz na partię
+                conn.execute("INSERT INTO BulkLoad (TableName) VALUES ('Books');")
+                existing = dict(conn.execute(
+                    f"SELECT BookID, Stock IS 0 FROM Books WHERE BookID IN ({placeholders});",
+                    [book_id for _, book_id in batch]).fetchall())
+                for index, book_id in batch:
+                    if book_id not in existing:
+                        statuses[index].update(code=404, message="Nie znaleziono książki do usunięcia.")
+                conn.execute(f"""
+                             INSERT INTO BooksFTS (BooksFTS, rowid, Title, Author, Genre)
+                             SELECT 'delete', BookID, Title, Author, Genre
+                             FROM Books
+                             WHERE BookID IN ({placeholders});
+                             """, [book_id for _, book_id in batch])
+                log_book_changes(conn, "D", f"BookID IN ({placeholders})", [book_id for _, book_id in batch])
+                conn.executemany("DELETE FROM Books WHERE BookID = ?;", [(book_id,) for book_id in existing])
+                adjust_book_stats(conn, -len(existing), -sum(existing.values()))
+                conn.execute("DELETE FROM BulkLoad WHERE TableName = 'Books';")
+                conn.commit()
+                deleted += len(existing)
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas usuwania książek: {e}. Usunięto {deleted} książek.",
+            "data": statuses
+        }
 
-        cursor.execute("SELECT Stock FROM Books WHERE BookID = ?;", (book_id,))
-        result = cursor.fetchone()
+    return {
+        "code": 200 if deleted else 404,
+        "message": f"Usunięto {deleted} z {len(statuses)} książek.",
+        "data": statuses
+    }
 
-        if not result:
-            return {
-                "code": 404,
-                "message": "Nie znaleziono książki."
-            }
 
-        current_stock = result[0]
-        new_stock = current_stock + quantity_change
+@instrument
+@invalidates("Books")
+def update_book_stock(book_id, quantity_change):
+    """
+    Aktualizuje stan magazynowy książki.
 
-        if new_stock < 0:
-            return {
-                "code": 400,
-                "message": f"Nie można ustawić ujemnego stanu magazynowego. Obecny stan: {current_stock}, żądana zmiana: {quantity_change}"
-            }
+    Sprawdzenie i zmiana stanu wykonywane są atomowo, jednym warunkowym UPDATE.
 
-        cursor.execute("UPDATE Books SET Stock = ? WHERE BookID = ?;", (new_stock, book_id))
-        conn.commit()
+    Args:
+        book_id (int): ID książki.
+        quantity_change (int): Zmiana ilości (może być ujemna przy zakupie).
 
-        if cursor.rowcount > 0:
+    Returns:
+        dict: Słownik zawierający kod odpowiedzi i komunikat.
+    """
+    try:
+        with get_connection() as conn:
+            updated, stock = apply_stock_change(conn, book_id, quantity_change)
+
+            if stock is None:
+                return {
+                    "code": 404,
+                    "message": "Nie znaleziono książki."
+                }
+
+            if not updated:
+                return {
+                    "code": 400,
+                    "message": f"Nie można ustawić ujemnego stanu magazynowego. Obecny stan: {stock}, żądana zmiana: {quantity_change}"
+                }
+
+            conn.commit()
             return {
                 "code": 200,
-                "message": f"Stan magazynowy książki o ID {book_id} zaktualizowany na {new_stock}."
-            }
-        else:
-            return {
-                "code": 404,
-                "message": "Nie znaleziono książki do aktualizacji stanu magazynowego."
+                "message": f"Stan magazynowy książki o ID {book_id} zaktualizowany na {stock}."
             }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas aktualizacji stanu magazynowego: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
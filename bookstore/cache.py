@@ -0,0 +1,207 @@
+# cache.py
+import os
+import copy
+import time
+import inspect
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+CACHE_MAX_ENTRIES = 256  # Maksymalna liczba zapamiętanych wyników (najdawniej używane są usuwane)
+CACHE_DEFAULT_TTL = 30.0  # Domyślny czas ważności wyniku (sekundy)
+
+# Cache włączony domyślnie; BOOKSTORE_CACHE=0 albo disable() wyłącza go
+_enabled = os.environ.get("BOOKSTORE_CACHE", "1") not in ("", "0", "false", "no")
+_lock = threading.Lock()
+_entries = OrderedDict()  # klucz -> (wersje tabel, czas wygaśnięcia, wynik)
+_versions = {}  # tabela -> wersja danych
+_stats = {}  # funkcja -> [trafienia, chybienia]
+_evictions = 0
+_local = threading.local()  # pending: tabele zmienione w bloku deferred_invalidation() bieżącego wątku
+
+
+def enable():
+    """Włącza cache wyników."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Wyłącza cache wyników i usuwa zapamiętane wyniki."""
+    global _enabled
+    _enabled = False
+    clear()
+
+
+def is_enabled():
+    """Zwraca True, jeśli cache wyników jest włączony."""
+    return _enabled
+
+
+def clear():
+    """Usuwa wszystkie zapamiętane wyniki (np. po zmianie bazy danych w configure_pool)."""
+    with _lock:
+        _entries.clear()
+
+
+def reset():
+    """Usuwa zapamiętane wyniki oraz liczniki trafień i chybień."""
+    global _evictions
+    with _lock:
+        _entries.clear()
+        _stats.clear()
+        _evictions = 0
+
+
+def bump_data_version(*tables):
+    """
+    Zwiększa wersję danych podanych tabel, unieważniając wyniki, które od nich zależą.
+
+    Args:
+        *tables (str): Nazwy zmienionych tabel (np. "Books", "Purchases").
+    """
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+
+@contextmanager
+def deferred_invalidation():
+    """
+    Odkłada unieważnianie (@invalidates) w bieżącym wątku do końca bloku, np. do zatwierdzenia
+    grupy transakcji. Wcześniejsze zwiększenie wersji pozwoliłoby innym wątkom zapamiętać pod
+    nową wersją wynik odczytany z migawki sprzed zatwierdzenia. W bloku funkcje @cached
+    wykonywane są bez cache, bo ich wyniki mogą zawierać niezatwierdzone zmiany.
+    """
+    if getattr(_local, "pending", None) is not None:  # Blok zagnieżdżony - unieważnia blok zewnętrzny
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+    finally:
+        tables = _local.pending
+        _local.pending = None
+        bump_data_version(*tables)
+
+
+def get_data_version(table):
+    """Zwraca bieżącą wersję danych tabeli (0, jeśli tabela nie była zmieniana)."""
+    return _versions.get(table, 0)
+
+
+def invalidates(*tables):
+    """
+    Dekorator funkcji zapisujących: po każdym wywołaniu (także zakończonym błędem,
+    bo operacje partiami mogły zatwierdzić część zmian) zwiększa wersję danych `tables`.
+    W bloku deferred_invalidation() wersja zwiększana jest dopiero na końcu bloku.
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            raise TypeError("invalidates nie obsługuje generatorów.")
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                pending = getattr(_local, "pending", None)
+                if pending is not None:
+                    pending.update(tables)
+                else:
+                    bump_data_version(*tables)
+
+        return wrapper
+
+    return decorator
+
+
+def cached(tables, ttl=CACHE_DEFAULT_TTL):
+    """
+    Dekorator zapamiętujący wynik funkcji dla danych argumentów.
+
+    Wynik jest ważny przez `ttl` sekund i tylko dopóki wersja danych żadnej z tabel
+    `tables` się nie zmieni (bump_data_version). TTL ogranicza nieaktualność przy
+    zapisach wykonanych poza tym procesem. Zapamiętywane są tylko odpowiedzi z kodem
+    poniżej 500; przy przepełnieniu usuwany jest najdawniej używany wynik (LRU).
+    Wywołujący dostaje głęboką kopię wyniku, więc zmiana zwróconych danych nie zmienia cache.
+
+    Args:
+        tables (tuple): Tabele, z których funkcja czyta dane.
+        ttl (float, optional): Czas ważności wyniku w sekundach.
+    """
+    tables = tuple(tables)
+
+    def decorator(func):
+        name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled or getattr(_local, "pending", None) is not None:
+                return func(*args, **kwargs)
+            try:
+                # Wywołania f(5) i f(limit=5) mają ten sam klucz
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (name, tuple(bound.arguments.items()))
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)  # błędne lub niehaszowalne argumenty - bez cache
+
+            global _evictions
+            now = time.monotonic()
+            with _lock:
+                versions = tuple(_versions.get(table, 0) for table in tables)
+                counters = _stats.setdefault(name, [0, 0])
+                entry = _entries.get(key)
+                if entry is not None and entry[0] == versions and entry[1] > now:
+                    _entries.move_to_end(key)
+                    counters[0] += 1
+                    return copy.deepcopy(entry[2])
+                counters[1] += 1
+
+            # Wersje odczytane przed wywołaniem: zapis w trakcie obliczeń unieważni ten wynik
+            result = func(*args, **kwargs)
+            if isinstance(result, dict) and result.get("code", 500) < 500:
+                with _lock:
+                    _entries[key] = (versions, now + ttl, result)
+                    _entries.move_to_end(key)
+                    while len(_entries) > CACHE_MAX_ENTRIES:
+                        _entries.popitem(last=False)
+                        _evictions += 1
+                return copy.deepcopy(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def get_cache_stats():
+    """
+    Zwraca statystyki cache wyników.
+
+    Returns:
+        dict: enabled, size, max_size, hits, misses, hit_ratio, evictions, versions
+              (wersje danych tabel) oraz functions - słownik {funkcja: {hits, misses}}.
+    """
+    with _lock:
+        functions = {name: {"hits": hits, "misses": misses} for name, (hits, misses) in sorted(_stats.items())}
+        size = len(_entries)
+        evictions = _evictions
+        versions = dict(_versions)
+    hits = sum(counters["hits"] for counters in functions.values())
+    misses = sum(counters["misses"] for counters in functions.values())
+    return {
+        "enabled": _enabled,
+        "size": size,
+        "max_size": CACHE_MAX_ENTRIES,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        "evictions": evictions,
+        "versions": versions,
+        "functions": functions,
+    }
@@ -1,17 +1,89 @@
 # customer_Manager.py
 import sqlite3
-from bookstore.utilities import DB_PATH, generate_customer_id
+from collections import namedtuple
+from bookstore.utilities import get_connection, generate_customer_id, apply_stock_change
+from bookstore.metrics import instrument
+from bookstore.cache import invalidates
 from datetime import datetime
 
+# Paginacja po kluczu (keyset): kolejna strona zaczyna się za ostatnim CustomerID poprzedniej
+SQL_CUSTOMERS_PAGE = "SELECT * FROM Customers WHERE CustomerID > ? ORDER BY CustomerID LIMIT ?;"
 
-def get_customers(data=None):
+# Wiersz historii zakupów. Pierwsze pięć pól jak dawniej; pod indeksem 5 zamiast bieżącej ceny
+# książki jest cena z chwili zakupu, a LineTotal to nowe, siódme pole
+CustomerPurchase = namedtuple("CustomerPurchase",
+                              ["PurchaseID", "Name", "Title", "Quantity", "PurchaseDate", "UnitPrice", "LineTotal"])
+
+
+def _resolve_customer_id(cursor, customer_data):
+    """Zwraca CustomerID klienta podanego przez ID (UUID) lub imię i nazwisko, albo None."""
+    if len(customer_data) == 36 and '-' in customer_data:  # UUID format
+        cursor.execute("SELECT CustomerID FROM Customers WHERE CustomerID = ?;", (customer_data,))
+    else:
+        cursor.execute("SELECT CustomerID FROM Customers WHERE Name = ?;", (customer_data,))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+def _parse_book_id(book_data):
+    """
+    Zwraca ID książki z liczby całkowitej lub tekstu złożonego z cyfr dziesiętnych, albo None.
+    Teksty takie jak "²" spełniają isdigit(), ale int() ich nie przyjmuje - są traktowane jak tytuł.
+    """
+    if isinstance(book_data, bool):
+        return None
+    if isinstance(book_data, int):
+        return book_data
+    text = str(book_data)
+    if not text.isdecimal():
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def _find_book(book_data, by_id, by_title):
+    """
+    Wybiera książkę podaną przez ID lub tytuł ze słowników wyników wyszukiwania.
+    Tekst z samych cyfr to najpierw ID, a gdy takiej książki nie ma - tytuł (np. "1984").
+    """
+    found = by_id.get(_parse_book_id(book_data))
+    if found is None and isinstance(book_data, str):
+        found = by_title.get(book_data)
+    return found
+
+
+def _resolve_book(cursor, book_data):
+    """Zwraca (BookID, Price) książki podanej przez ID lub tytuł (zasady jak w _find_book), albo None."""
+    book_id = _parse_book_id(book_data)
+    if book_id is not None:
+        cursor.execute("SELECT BookID, Price FROM Books WHERE BookID = ?;", (book_id,))
+        result = cursor.fetchone()
+        if result:
+            return result
+    if not isinstance(book_data, str):
+        return None
+    cursor.execute("SELECT BookID, Price FROM Books WHERE Title = ?;", (book_data,))
+    return cursor.fetchone()
+
+
+@instrument
+def get_customers(data=None, page_size=None, after_id=""):
     """
     Pobiera klientów z bazy danych. Można pobrać wszystkich klientów, klientów o
     określonym ID lub klientów o określonym imieniu i nazwisku.
 
+    Listę wszystkich klientów można pobierać stronami (paginacja po kluczu CustomerID):
+    należy podać `page_size`, a kolejną stronę pobrać przekazując `next_cursor`
+    z poprzedniej odpowiedzi jako `after_id`.
+
     Args:
         data (str, optional): ID klienta (jako string) lub imię i nazwisko klienta (jako string).
                               Jeśli brak argumentu (domyślnie None), pobierani są wszyscy klienci.
+        page_size (int, optional): Rozmiar strony przy pobieraniu wszystkich klientów.
+                                   Domyślnie None - wszyscy klienci naraz.
+        after_id (str, optional): Zwraca klientów o CustomerID większym od podanego (kursor strony).
 
     Returns:
         dict: Słownik zawierający:
@@ -27,42 +99,86 @@ def get_customers(data=None):
                 - Name (str): Imię i nazwisko klienta.
 
                 - Email (str): Adres email klienta.
+
+            - next_cursor (str | None, tylko przy `page_size`): `after_id` następnej strony lub None dla ostatniej.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        if data is None:
-            cursor.execute("SELECT * FROM Customers;")
-        elif len(data) == 36 and '-' in data:  # Assume UUID format for ID
-            cursor.execute("SELECT * FROM Customers WHERE CustomerID = ?;", (data,))
-        else:  # Assume it's a name
-            cursor.execute("SELECT * FROM Customers WHERE Name LIKE ?;", (f"%{data}%",))
-
-        customers = cursor.fetchall()
-
-        if customers:
-            return {
-                "code": 200,
-                "message": "Znaleziono klientów.",
-                "data": customers
-            }
-        else:
-            return {
-                "code": 404,
-                "message": "Brak klientów spełniających kryteria."
-            }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            if data is None and page_size:
+                customers = cursor.execute(SQL_CUSTOMERS_PAGE, (after_id, page_size)).fetchall()
+                if customers:
+                    return {
+                        "code": 200,
+                        "message": "Znaleziono klientów.",
+                        "data": customers,
+                        "next_cursor": customers[-1][0] if len(customers) == page_size else None
+                    }
+                else:
+                    return {
+                        "code": 404,
+                        "message": "Brak klientów spełniających kryteria.",
+                        "next_cursor": None
+                    }
+            elif data is None:
+                cursor.execute("SELECT * FROM Customers;")
+            elif len(data) == 36 and '-' in data:  # Assume UUID format for ID
+                cursor.execute("SELECT * FROM Customers WHERE CustomerID = ?;", (data,))
+            else:  # Assume it's a name
+                cursor.execute("SELECT * FROM Customers WHERE Name LIKE ?;", (f"%{data}%",))
+
+            customers = cursor.fetchall()
+
+            if customers:
+                return {
+                    "code": 200,
+                    "message": "Znaleziono klientów.",
+                    "data": customers
+                }
+            else:
+                return {
+                    "code": 404,
+                    "message": "Brak klientów spełniających kryteria."
+                }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania klientów: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+def iter_customers(batch_size=1000):
+    """
+    Generator zwracający wszystkich klientów partiami o stałym rozmiarze.
+
+    Każda partia pobierana jest osobnym zapytaniem z paginacją po kluczu CustomerID,
+    więc zużycie pamięci nie zależy od liczby klientów w bazie.
+
+    Args:
+        batch_size (int, optional): Liczba klientów w partii (domyślnie 1000).
+
+    Yields:
+        list: Lista krotek (CustomerID, Name, Email), posortowana według CustomerID.
+
+    Raises:
+        sqlite3.Error: W przypadku błędu bazy danych.
+    """
+    after_id = ""
+    while True:
+        with get_connection() as conn:
+            customers = conn.execute(SQL_CUSTOMERS_PAGE, (after_id, batch_size)).fetchall()
+        if not customers:
+            return
+        yield customers
+        if len(customers) < batch_size:
+            return
+        after_id = customers[-1][0]
+
+
+@instrument
+@invalidates("Customers")
 def register_customer(clientInfo):
     """
     Rejestruje nowego klienta w bazie danych.
@@ -75,46 +191,44 @@ def register_customer(clientInfo):
     Returns:
         dict: Słownik zawierający kod odpowiedzi i komunikat.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        name = clientInfo.get('Name')
-        email = clientInfo.get('Email')
-
-        if not all([name, email]):
-            return {
-                "code": 400,
-                "message": "Brakuje wymaganych pól: Imię i nazwisko, Email."
-            }
-        cursor.execute("SELECT CustomerID FROM Customers WHERE Email = ?;", (email,))
-        if cursor.fetchone():
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            name = clientInfo.get('Name')
+            email = clientInfo.get('Email')
+
+            if not all([name, email]):
+                return {
+                    "code": 400,
+                    "message": "Brakuje wymaganych pól: Imię i nazwisko, Email."
+                }
+            cursor.execute("SELECT CustomerID FROM Customers WHERE Email = ?;", (email,))
+            if cursor.fetchone():
+                return {
+                    "code": 409,  # Conflict
+                    "message": "Klient z podanym adresem email już istnieje."
+                }
+
+            customer_id = generate_customer_id()
+            cursor.execute("""
+                           INSERT INTO Customers (CustomerID, Name, Email)
+                           VALUES (?, ?, ?);
+                           """, (customer_id, name, email))
+            conn.commit()
             return {
-                "code": 409,  # Conflict
-                "message": "Klient z podanym adresem email już istnieje."
+                "code": 201,
+                "message": f"Klient '{name}' został pomyślnie zarejestrowany. ID: {customer_id}"
             }
-
-        customer_id = generate_customer_id()
-        cursor.execute("""
-                       INSERT INTO Customers (CustomerID, Name, Email)
-                       VALUES (?, ?, ?);
-                       """, (customer_id, name, email))
-        conn.commit()
-        return {
-            "code": 201,
-            "message": f"Klient '{name}' został pomyślnie zarejestrowany. ID: {customer_id}"
-        }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas rejestracji klienta: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@invalidates("Customers", "Purchases")
 def remove_customer(data):
     """
     Usuwa klienta z bazy danych wraz z jego zakupami.
@@ -125,132 +239,241 @@ def remove_customer(data):
     Returns:
         dict: Słownik zawierający kod odpowiedzi i komunikat.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        customer_id = None
-        if len(data) == 36 and '-' in data:  # UUID format
-            customer_id = data
-        else:
-            cursor.execute("SELECT CustomerID FROM Customers WHERE Name = ?;", (data,))
-            result = cursor.fetchone()
-            if result:
-                customer_id = result[0]
-
-        if not customer_id:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            customer_id = None
+            if len(data) == 36 and '-' in data:  # UUID format
+                customer_id = data
+            else:
+                cursor.execute("SELECT CustomerID FROM Customers WHERE Name = ?;", (data,))
+                result = cursor.fetchone()
+                if result:
+                    customer_id = result[0]
+
+            if not customer_id:
+                return {
+                    "code": 404,
+                    "message": "Nie znaleziono klienta do usunięcia."
+                }
+
+            # Oba DELETE w jednej transakcji (niejawnie otwieranej przez sqlite3, także w grupie transakcji)
+            cursor.execute("DELETE FROM Purchases WHERE CustomerID = ?;", (customer_id,))
+            purchases_deleted = cursor.rowcount
+            cursor.execute("DELETE FROM Customers WHERE CustomerID = ?;", (customer_id,))
+            customer_deleted = cursor.rowcount
+            conn.commit()
             return {
-                "code": 404,
-                "message": "Nie znaleziono klienta do usunięcia."
+                "code": 200,
+                "message": f"Usunięto {customer_deleted} klienta i {purchases_deleted} zakupów z bazy danych."
             }
-
-        conn.execute("BEGIN TRANSACTION;")
-        cursor.execute("DELETE FROM Purchases WHERE CustomerID = ?;", (customer_id,))
-        purchases_deleted = cursor.rowcount
-        cursor.execute("DELETE FROM Customers WHERE CustomerID = ?;", (customer_id,))
-        customer_deleted = cursor.rowcount
-        conn.commit()
-        return {
-            "code": 200,
-            "message": f"Usunięto {customer_deleted} klienta i {purchases_deleted} zakupów z bazy danych."
-        }
     except sqlite3.Error as e:
-        if conn:
-            conn.rollback()
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas usuwania klienta: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@invalidates("Books", "Purchases")
 def buy_book(customer_data, book_data, quantity):
     """
     Obsługuje proces zakupu książki.
 
+    Stan magazynowy zmniejszany jest atomowo (warunkowy UPDATE), razem z zapisem
+    zakupu w jednej transakcji, więc współbieżni kupujący nie mogą przekroczyć stanu.
+
     Args:
         customer_data (str): ID klienta lub imię i nazwisko.
-        book_data (str): ID książki lub tytuł książki.
+        book_data (int | str): ID książki lub tytuł książki. Tekst z samych cyfr jest ID,
+                               a gdy książki o takim ID nie ma - tytułem (np. "1984").
         quantity (int): Liczba kupowanych książek.
 
     Returns:
         dict: Słownik zawierający kod odpowiedzi i komunikat.
     """
-    conn = None
+    # Ilość zerowa lub ujemna zwiększyłaby stan i zapisała ujemny LineTotal w przychodach
+    if not isinstance(quantity, int) or quantity <= 0:
+        return {
+            "code": 400,
+            "message": "Ilość musi być liczbą całkowitą dodatnią."
+        }
+
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        customer_id = None
-        if len(customer_data) == 36 and '-' in customer_data:  # UUID format
-            cursor.execute("SELECT CustomerID FROM Customers WHERE CustomerID = ?;", (customer_data,))
-            result = cursor.fetchone()
-            if result:
-                customer_id = result[0]
-        else:
-            cursor.execute("SELECT CustomerID FROM Customers WHERE Name = ?;", (customer_data,))
-            result = cursor.fetchone()
-            if result:
-                customer_id = result[0]
-
-        if not customer_id:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            customer_id = _resolve_customer_id(cursor, customer_data)
+
+            if not customer_id:
+                return {
+                    "code": 404,
+                    "message": "Nie znaleziono klienta."
+                }
+
+            # Cena zapisywana w zakupie (UnitPrice, LineTotal), aby późniejsze zmiany cen nie zmieniały historii
+            result = _resolve_book(cursor, book_data)
+
+            if not result:
+                return {
+                    "code": 404,
+                    "message": "Nie znaleziono książki."
+                }
+            book_id, price = result
+
+            # Warunkowe zmniejszenie stanu - nie dopuszcza do sprzedaży ponad stan przy współbieżnych zakupach
+            updated, stock = apply_stock_change(conn, book_id, -quantity)
+            if stock is None:  # Książka usunięta w międzyczasie
+                return {
+                    "code": 404,
+                    "message": "Nie znaleziono książki."
+                }
+            if not updated:
+                return {
+                    "code": 400,
+                    "message": f"Brak wystarczającej ilości książek w magazynie. Dostępne: {stock}"
+                }
+
+            purchase_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            cursor.execute("""
+                           INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate, UnitPrice, LineTotal)
+                           VALUES (?, ?, ?, ?, ?, ?);
+                           """, (customer_id, book_id, quantity, purchase_date, price, price * quantity))
+
+            conn.commit()
             return {
-                "code": 404,
-                "message": "Nie znaleziono klienta."
+                "code": 200,
+                "message": f"Zakup zrealizowany pomyślnie! Książka o ID {book_id} (Ilość: {quantity}) dla klienta o ID {customer_id}."
             }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas zakupu książki: {e}"
+        }
 
-        book_id = None
-        stock = 0
-        if str(book_data).isdigit():
-            cursor.execute("SELECT BookID, Stock, Price FROM Books WHERE BookID = ?;", (book_data,))
-            result = cursor.fetchone()
-            if result:
-                book_id, stock, price = result
-        else:
-            cursor.execute("SELECT BookID, Stock, Price FROM Books WHERE Title = ?;", (book_data,))
-            result = cursor.fetchone()
-            if result:
-                book_id, stock, price = result
-
-        if not book_id:
-            return {
-                "code": 404,
-                "message": "Nie znaleziono książki."
-            }
 
-        if stock < quantity:
-            return {
-                "code": 400,
-                "message": f"Brak wystarczającej ilości książek w magazynie. Dostępne: {stock}"
-            }
+@instrument
+@invalidates("Books", "Purchases")
+def buy_books(customer_data, items):
+    """
+    Obsługuje zakup wielu książek (koszyka) przez jednego klienta w jednej transakcji.
 
-        purchase_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        cursor.execute("""
-                       INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate)
-                       VALUES (?, ?, ?, ?);
-                       """, (customer_id, book_id, quantity, purchase_date))
+    Wszystkie książki wyszukiwane są jednym zapytaniem, stan magazynowy sprawdzany jest
+    dla wszystkich pozycji, a zakupy zapisywane są razem (executemany) i zatwierdzane raz.
+    Zamówienie jest realizowane w całości albo wcale - błąd dowolnej pozycji powoduje
+    odrzucenie całego koszyka.
 
-        cursor.execute("UPDATE Books SET Stock = Stock - ? WHERE BookID = ?;", (quantity, book_id))
+    Args:
+        customer_data (str): ID klienta lub imię i nazwisko.
+        items (list): Lista krotek (book_data, quantity), gdzie book_data to ID lub tytuł książki
+                      (rozpoznawane jak w buy_book).
 
-        conn.commit()
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (błędne pozycje lub brak stanu), 404 (brak klienta), 500 (błąd bazy).
+            - message (str): Komunikat o wyniku operacji.
+            - data (list, jeżeli klient istnieje): Wynik dla każdej pozycji - słowniki
+              (line, book, book_id, quantity, code, message).
+    """
+    items = list(items)
+    if not items:
         return {
-            "code": 200,
-            "message": f"Zakup zrealizowany pomyślnie! Książka o ID {book_id} (Ilość: {quantity}) dla klienta o ID {customer_id}."
+            "code": 400,
+            "message": "Koszyk jest pusty."
         }
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            customer_id = _resolve_customer_id(cursor, customer_data)
+            if not customer_id:
+                return {
+                    "code": 404,
+                    "message": "Nie znaleziono klienta."
+                }
+
+            # Wyszukanie wszystkich książek jednym zapytaniem - tekst z cyfr szukany po ID i po tytule (_find_book)
+            ids = sorted({book_id for book_id in (_parse_book_id(book) for book, _ in items) if book_id is not None})
+            titles = sorted({book for book, _ in items if isinstance(book, str)})
+            cursor.execute(f"""
+                           SELECT BookID, Title, Stock, Price
+                           FROM Books
+                           WHERE BookID IN ({", ".join("?" * len(ids)) or "NULL"})
+                              OR Title IN ({", ".join("?" * len(titles)) or "NULL"})
+                           ORDER BY BookID;
+                           """, ids + titles)
+            by_id = {}
+            by_title = {}
+            for book_id, title, stock, price in cursor.fetchall():
+                by_id[book_id] = (book_id, stock, price)
+                by_title.setdefault(title, (book_id, stock, price))
+
+            # Walidacja wszystkich pozycji (łączna ilość tej samej książki w koszyku)
+            lines = []
+            requested = {}
+            for line, (book, quantity) in enumerate(items, start=1):
+                found = _find_book(book, by_id, by_title)
+                entry = {"line": line, "book": book, "book_id": found[0] if found else None,
+                         "quantity": quantity, "code": 200, "message": "OK"}
+                if not isinstance(quantity, int) or quantity <= 0:
+                    entry.update(code=400, message="Ilość musi być liczbą całkowitą dodatnią.")
+                elif not found:
+                    entry.update(code=404, message="Nie znaleziono książki.")
+                else:
+                    requested[found[0]] = requested.get(found[0], 0) + quantity
+                lines.append(entry)
+
+            for entry in lines:
+                book_id = entry["book_id"]
+                if entry["code"] == 200 and requested[book_id] > by_id[book_id][1]:
+                    entry.update(code=400,
+                                 message=f"Brak wystarczającej ilości książek w magazynie. Dostępne: {by_id[book_id][1]}")
+
+            if any(entry["code"] != 200 for entry in lines):
+                return {
+                    "code": 400,
+                    "message": "Zamówienie odrzucone - popraw błędne pozycje koszyka.",
+                    "data": lines
+                }
+
+            # Warunkowe zmniejszenie stanów - stan mógł się zmienić od walidacji
+            for book_id, quantity in requested.items():
+                updated, stock = apply_stock_change(conn, book_id, -quantity)
+                if not updated:
+                    for entry in lines:
+                        if entry["book_id"] == book_id:
+                            entry.update(code=400,
+                                         message=f"Brak wystarczającej ilości książek w magazynie. Dostępne: {stock}")
+            if any(entry["code"] != 200 for entry in lines):
+                conn.rollback()
+                return {
+                    "code": 400,
+                    "message": "Zamówienie odrzucone - stan magazynowy zmienił się w trakcie realizacji.",
+                    "data": lines
+                }
+
+            purchase_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            cursor.executemany("""
+                               INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate, UnitPrice, LineTotal)
+                               VALUES (?, ?, ?, ?, ?, ?);
+                               """, [(customer_id, entry["book_id"], entry["quantity"], purchase_date,
+                                      by_id[entry["book_id"]][2], by_id[entry["book_id"]][2] * entry["quantity"])
+                                     for entry in lines])
+            conn.commit()
+            return {
+                "code": 200,
+                "message": f"Zamówienie zrealizowane pomyślnie! {len(lines)} pozycji "
+                           f"({sum(requested.values())} egz.) dla klienta o ID {customer_id}.",
+                "data": lines
+            }
     except sqlite3.Error as e:
-        if conn:
-            conn.rollback()
         return {
             "code": 500,
-            "message": f"Błąd bazy danych podczas zakupu książki: {e}"
+            "message": f"Błąd bazy danych podczas realizacji zamówienia: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
 def get_customer_purchases(customer_data):
     """
     Pobiera historię zakupów dla konkretnego klienta.
@@ -262,58 +485,45 @@ def get_customer_purchases(customer_data):
         dict: Słownik zawierający kod odpowiedzi i komunikat.
             - code (int): Kod HTTP (200, 404, 500).
             - message (str): Komunikat o wyniku operacji.
-            - data (list, jeżeli kod = 200): Lista krotek z danymi o zakupach.
+            - data (list, jeżeli kod = 200): Lista krotek nazwanych CustomerPurchase (PurchaseID, Name,
+              Title, Quantity, PurchaseDate, UnitPrice, LineTotal) - cena z chwili zakupu.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        customer_id = None
-        if len(customer_data) == 36 and '-' in customer_data:  # UUID format
-            cursor.execute("SELECT CustomerID FROM Customers WHERE CustomerID = ?;", (customer_data,))
-            result = cursor.fetchone()
-            if result:
-                customer_id = result[0]
-        else:
-            cursor.execute("SELECT CustomerID FROM Customers WHERE Name = ?;", (customer_data,))
-            result = cursor.fetchone()
-            if result:
-                customer_id = result[0]
-
-        if not customer_id:
-            return {
-                "code": 404,
-                "message": "Nie znaleziono klienta."
-            }
-
-        cursor.execute("""
-                       SELECT p.PurchaseID, c.Name, b.Title, p.Quantity, p.PurchaseDate, b.Price
-                       FROM Purchases p
-                                JOIN Books b ON p.BookID = b.BookID
-                                JOIN Customers c ON p.CustomerID = c.CustomerID
-                       WHERE p.CustomerID = ?
-                       ORDER BY p.PurchaseDate DESC;
-                       """, (customer_id,))
-
-        purchases = cursor.fetchall()
-
-        if purchases:
-            return {
-                "code": 200,
-                "message": "Znaleziono historię zakupów.",
-                "data": purchases
-            }
-        else:
-            return {
-                "code": 404,
-                "message": "Brak historii zakupów dla tego klienta."
-            }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            customer_id = _resolve_customer_id(cursor, customer_data)
+
+            if not customer_id:
+                return {
+                    "code": 404,
+                    "message": "Nie znaleziono klienta."
+                }
+
+            cursor.execute("""
+                           SELECT p.PurchaseID, c.Name, b.Title, p.Quantity, p.PurchaseDate, p.UnitPrice, p.LineTotal
+                           FROM Purchases p
+                                    JOIN Books b ON p.BookID = b.BookID
+                                    JOIN Customers c ON p.CustomerID = c.CustomerID
+                           WHERE p.CustomerID = ?
+                           ORDER BY p.PurchaseDate DESC;
+                           """, (customer_id,))
+
+            purchases = [CustomerPurchase._make(row) for row in cursor.fetchall()]
+
+            if purchases:
+                return {
+                    "code": 200,
+                    "message": "Znaleziono historię zakupów.",
+                    "data": purchases
+                }
+            else:
+                return {
+                    "code": 404,
+                    "message": "Brak historii zakupów dla tego klienta."
+                }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania historii zakupów klienta: {str(e)}"
         }
-    finally:
-        if conn:
-            conn.close()
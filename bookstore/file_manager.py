@@ -1,40 +1,278 @@
 # bookstore/file_manager.py
-import sqlite3
-import pandas as pd
+import io
 import os
-from bookstore.utilities import DB_PATH, FILE_DIR
+import csv
+import gzip
+import time
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from bookstore.utilities import get_connection, adjust_book_stats, log_book_changes, FILE_DIR
+from bookstore.metrics import instrument
+from bookstore.cache import invalidates
+from bookstore.migrations import SQL_CHANGE_WATERMARK
 
 CSV_DIR = FILE_DIR
 
-os.makedirs(CSV_DIR, exist_ok=True)
+# Tabele dostępne do eksportu -> licznik w tabeli Stats (całkowita liczba wierszy dla postępu)
+EXPORT_TABLES = {"Customers": "customers", "Books": "books", "Purchases": "purchases"}
+EXPORT_BATCH_SIZE = 10000  # Liczba wierszy pobieranych z kursora i zapisywanych naraz
+EXPORT_COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}  # kompresja -> rozszerzenie pliku
+EXPORT_GZIP_LEVEL = 6
+EXPORT_ZSTD_LEVEL = 3
+# Formaty plików -> rozszerzenie; Parquet i Arrow IPC wymagają opcjonalnego pakietu pyarrow
+FILE_FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+# Kompresje obsługiwane wewnątrz formatów kolumnowych (Arrow IPC nie obsługuje gzip)
+COLUMNAR_COMPRESSIONS = {"parquet": ("gzip", "zstd"), "arrow": ("zstd",)}
+# Typy kolumn w formatach kolumnowych (aliasy typów pyarrow); daty zapisywane jako znacznik czasu
+COLUMNAR_SCHEMAS = {
+    "Customers": {"CustomerID": "string", "Name": "string", "Email": "string"},
+    "Books": {"BookID": "int64", "Title": "string", "Author": "string", "Genre": "string", "Price": "double",
+              "Stock": "int64", "DateAdded": "timestamp[s]"},
+    "Purchases": {"PurchaseID": "int64", "CustomerID": "string", "BookID": "int64", "Quantity": "int64",
+                  "PurchaseDate": "timestamp[s]", "UnitPrice": "double", "LineTotal": "double"},
+}
+
+# Import: kolumny tabeli pośredniej z powinowactwem typów (konwersja tekstu z CSV na liczby)
+IMPORT_STAGING_COLUMNS = {
+    "Customers": {"CustomerID": "TEXT", "Name": "TEXT", "Email": "TEXT"},
+    "Books": {"Title": "TEXT", "Author": "TEXT", "Genre": "TEXT", "Price": "REAL", "Stock": "INTEGER",
+              "DateAdded": "TEXT"},
+    "Purchases": {"CustomerID": "TEXT", "BookID": "INTEGER", "Quantity": "INTEGER", "PurchaseDate": "TEXT",
+                  "UnitPrice": "REAL"},
+}
+IMPORT_OPTIONAL_COLUMNS = {"Purchases": ("UnitPrice",)}
+IMPORT_STAGING_INDEXES = {"Customers": ("Email",), "Books": ("Title, Author",)}
+# Reguły walidacji: (powód pominięcia, warunek dla wiersza `s` tabeli pośredniej), sprawdzane po kolei
+IMPORT_VALIDATION = {
+    "Customers": [
+        ("missing_values", "CustomerID IS NULL OR Name IS NULL OR Email IS NULL"),
+        ("email_exists", "EXISTS (SELECT 1 FROM main.Customers c WHERE c.Email = s.Email AND c.CustomerID <> s.CustomerID)"),
+        ("duplicate_email", "EXISTS (SELECT 1 FROM temp.ImportStaging d "
+                            "WHERE d.Email = s.Email AND d.CustomerID <> s.CustomerID AND d.RowNo < s.RowNo)"),
+    ],
+    "Books": [
+        ("missing_values", "Title IS NULL OR Author IS NULL OR Price IS NULL"),
+        # Te same zakresy co w add_book/update_book (_validate_book_info)
+        ("invalid_value", "typeof(Price) NOT IN ('integer', 'real') OR Price < 0 "
+                          "OR Stock IS NULL OR typeof(Stock) <> 'integer' OR Stock < 0"),
+        # Z kilku wierszy tej samej książki obowiązuje ostatni
+        ("duplicate_in_file", "EXISTS (SELECT 1 FROM temp.ImportStaging d "
+                              "WHERE d.Title = s.Title AND d.Author = s.Author AND d.RowNo > s.RowNo AND d.Skip IS NULL)"),
+    ],
+    "Purchases": [
+        ("missing_values", "CustomerID IS NULL OR BookID IS NULL OR Quantity IS NULL"),
+        # Ilość dodatnia jak w buy_book/buy_books
+        ("invalid_value", "typeof(BookID) <> 'integer' OR typeof(Quantity) <> 'integer' OR Quantity <= 0 "
+                          "OR (UnitPrice IS NOT NULL AND (typeof(UnitPrice) NOT IN ('integer', 'real') OR UnitPrice < 0))"),
+        ("unknown_customer", "NOT EXISTS (SELECT 1 FROM main.Customers c WHERE c.CustomerID = s.CustomerID)"),
+        ("unknown_book", "NOT EXISTS (SELECT 1 FROM main.Books b WHERE b.BookID = s.BookID)"),
+    ],
+}
+IMPORT_BATCH_SIZE = 50000  # Liczba wierszy pliku wczytywanych i wstawianych do tabeli pośredniej naraz
+IMPORT_SKIPPED_REPORT_LIMIT = 1000  # Maksymalna liczba pominiętych wierszy wymienionych w raporcie
+# Eksport/import wielu tabel: kolejność zależności (zakupy wymagają klientów i książek)
+# i rozmiary kolejek między wątkiem bazy a wątkami zapisu plików / parsowania
+IMPORT_ORDER = ("Customers", "Books", "Purchases")
+EXPORT_QUEUE_BATCHES = 4  # Partie kursora oczekujące na zapis do pliku (na tabelę)
+IMPORT_QUEUE_CHUNKS = 2  # Przygotowane partie pliku oczekujące na wstawienie (na tabelę)
+# Eksport przyrostowy (dziennik zmian ChangeLog, migracja 9): klucz główny każdej tabeli
+# i kolumny dodawane przed kolumnami tabeli w plikach zmian
+CHANGE_KEYS = {"Customers": "CustomerID", "Books": "BookID", "Purchases": "PurchaseID"}
+CHANGE_COLUMNS = {"ChangeID": "int64", "ChangeType": "string"}
+
+
+def _open_csv_writer(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=EXPORT_GZIP_LEVEL)
+    if compression == "zstd":
+        import zstandard  # opcjonalna zależność, potrzebna tylko dla kompresji zstd
+        raw = open(path, "wb")
+        writer = zstandard.ZstdCompressor(level=EXPORT_ZSTD_LEVEL).stream_writer(raw)
+        return io.TextIOWrapper(writer, encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _open_csv_reader(path):
+    if path.endswith(EXPORT_COMPRESSIONS["gzip"]):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    if path.endswith(EXPORT_COMPRESSIONS["zstd"]):
+        import zstandard
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8-sig", newline="")
+    return open(path, newline="", encoding="utf-8-sig")
+
+
+def _file_format(filename):
+    """Zwraca format pliku rozpoznany po rozszerzeniu (z pominięciem rozszerzenia kompresji); domyślnie CSV."""
+    name = filename
+    for suffix in EXPORT_COMPRESSIONS.values():
+        name = name.removesuffix(suffix)
+    return next((file_format for file_format, suffix in FILE_FORMATS.items() if name.endswith(suffix)), "csv")
 
 
-def export_data(table_name, filename=None):
+def _arrow_schema(table_name, columns=None):
+    import pyarrow as pa  # opcjonalna zależność, potrzebna tylko dla formatów Parquet i Arrow
+    types = {**CHANGE_COLUMNS, **COLUMNAR_SCHEMAS[table_name]}
+    return pa.schema([(name, pa.type_for_alias(types[name])) for name in columns or COLUMNAR_SCHEMAS[table_name]])
+
+
+def _record_batch(rows, schema):
+    """Buduje partię Arrow z wierszy kursora; daty (tekst) parsowane są do znacznika czasu."""
+    import pandas as pd  # import pandas (kilkaset ms) tylko przy eksporcie i imporcie, nie przy starcie aplikacji
+    import pyarrow as pa
+    arrays = []
+    for values, field in zip(zip(*rows), schema):
+        if pa.types.is_timestamp(field.type):
+            parsed = pd.to_datetime(pd.Series(values, dtype=object), format="mixed", errors="coerce")
+            arrays.append(pa.array(parsed, from_pandas=True).cast(field.type, safe=False))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_csv(path, columns, batches, compression):
+    with _open_csv_writer(path, compression) as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+
+
+def _write_columnar(path, table_name, columns, batches, file_format, compression):
+    # Każda partia kursora to osobna grupa wierszy Parquet / partia rekordów Arrow IPC
+    import pyarrow as pa
+    schema = _arrow_schema(table_name, columns)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema, compression=compression or "snappy")
+    else:
+        writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+    with writer:
+        for batch in batches:
+            writer.write_batch(_record_batch(batch, schema))
+
+
+def _export_query(table_name, file_format):
+    if file_format == "csv":
+        return f"SELECT * FROM {table_name};"
+    return f"SELECT {', '.join(COLUMNAR_SCHEMAS[table_name])} FROM {table_name};"
+
+
+def _write_export(path, table_name, columns, batches, file_format, compression):
+    if file_format == "csv":
+        _write_csv(path, columns, batches, compression)
+    else:
+        _write_columnar(path, table_name, columns, batches, file_format, compression)
+
+
+def _resolve_export_options(filename, compression, file_format):
+    """Ustala format i kompresję pliku; zwraca (format, kompresja) albo zgłasza ValueError z komunikatem."""
+    if file_format is None:
+        file_format = _file_format(filename) if filename else "csv"
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Nieznany format pliku: {file_format}. Dostępne: {', '.join(FILE_FORMATS)}.")
+    if compression is None and filename and file_format == "csv":
+        compression = next((name for name, suffix in EXPORT_COMPRESSIONS.items() if filename.endswith(suffix)), None)
+    allowed = COLUMNAR_COMPRESSIONS.get(file_format, tuple(EXPORT_COMPRESSIONS))
+    if compression is not None and compression not in allowed:
+        raise ValueError(f"Nieznana kompresja dla formatu {file_format}: {compression}. Dostępne: {', '.join(allowed)}.")
+    return file_format, compression
+
+
+def _default_filename(table_name, file_format, compression=None):
+    filename = table_name.lower() + FILE_FORMATS[file_format]
+    if file_format == "csv":
+        filename += EXPORT_COMPRESSIONS.get(compression, "")
+    return filename
+
+
+@instrument
+def export_data(table_name, filename=None, compression=None, batch_size=EXPORT_BATCH_SIZE, progress=None,
+                file_format=None):
     """
-    Eksportuje dane z podanej tabeli do pliku CSV w folderze DATABASE.
+    Eksportuje dane z podanej tabeli do pliku CSV, Parquet lub Arrow IPC w folderze DATABASE.
+
+    Wiersze pobierane są z kursora partiami po `batch_size` i od razu zapisywane do pliku,
+    więc zużycie pamięci nie zależy od rozmiaru tabeli. Jedno zapytanie odczytuje spójną
+    migawkę tabeli. Plik zapisywany jest przez plik tymczasowy, więc przerwany eksport
+    nie zostawia niepełnego pliku. W formatach kolumnowych każda partia to osobna grupa
+    wierszy, a kolumny mają typy z COLUMNAR_SCHEMAS (daty jako znacznik czasu).
 
     Args:
         table_name (str): Nazwa tabeli do eksportu ('Customers', 'Books', 'Purchases').
-        filename (str, optional): Nazwa pliku CSV. Domyślnie 'nazwa_tabeli.csv'.
+        filename (str, optional): Nazwa pliku. Domyślnie 'nazwa_tabeli' z rozszerzeniem formatu i kompresji.
+        compression (str, optional): None, "gzip" lub "zstd" (wymaga pakietu zstandard). W formatach
+                                     kolumnowych kodek wewnątrz pliku (Parquet: gzip, zstd, domyślnie snappy;
+                                     Arrow: zstd). Domyślnie wykrywana z rozszerzenia pliku CSV (.gz, .zst).
+        batch_size (int, optional): Liczba wierszy w partii.
+        progress (callable, optional): Wywoływana po każdej partii jako progress(zapisane_wiersze, wszystkie_wiersze).
+        file_format (str, optional): "csv", "parquet" lub "arrow" (wymagają pakietu pyarrow).
+                                     Domyślnie wykrywany z rozszerzenia pliku, w przeciwnym razie CSV.
 
     Returns:
-        dict: Słownik z kodem odpowiedzi i komunikatem.
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (nieznana tabela, format lub kompresja, brak pakietu),
+              404 (błąd bazy), 500 (błąd ogólny).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict, tylko przy code=200): path, rows, bytes (rozmiar pliku) i seconds.
     """
-    if filename is None:
-        csv_filename = f"{table_name.lower()}.csv"
-    else:
-        csv_filename = filename
+    if table_name not in EXPORT_TABLES:
+        return {
+            "code": 400,
+            "message": f"Nieznana nazwa tabeli: '{table_name}'."
+        }
+    try:
+        file_format, compression = _resolve_export_options(filename, compression, file_format)
+    except ValueError as e:
+        return {
+            "code": 400,
+            "message": str(e)
+        }
+
+    full_path = os.path.join(CSV_DIR, filename or _default_filename(table_name, file_format, compression))
+    # Katalog tworzony dopiero przy zapisie, nie przy imporcie modułu
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    temp_path = f"{full_path}.tmp"
+    started = time.perf_counter()
+    rows = 0
 
-    full_path = os.path.join(CSV_DIR, csv_filename)
+    def batches(cursor):
+        nonlocal rows
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+            rows += len(batch)
+            if progress is not None:
+                progress(rows, total)
 
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        df = pd.read_sql_query(f"SELECT * FROM {table_name};", conn)
-        df.to_csv(full_path, index=False)
+        with get_connection() as conn:
+            total = conn.execute("SELECT Value FROM Stats WHERE Name = ?;", (EXPORT_TABLES[table_name],)).fetchone()
+            total = total[0] if total else None
+            cursor = conn.execute(_export_query(table_name, file_format))
+            _write_export(temp_path, table_name, [column[0] for column in cursor.description], batches(cursor),
+                          file_format, compression)
+            os.replace(temp_path, full_path)
+            return {
+                "code": 200,
+                "message": f"Dane z tabeli '{table_name}' zostały pomyślnie wyeksportowane do '{full_path}'.",
+                "data": {
+                    "path": full_path,
+                    "rows": rows,
+                    "bytes": os.path.getsize(full_path),
+                    "seconds": time.perf_counter() - started
+                }
+            }
+    except ImportError as e:
+        package = e.name.split(".")[0]
         return {
-            "code": 200,
-            "message": f"Dane z tabeli '{table_name}' zostały pomyślnie wyeksportowane do '{full_path}'."
+            "code": 400,
+            "message": f"Wybrany format lub kompresja wymaga pakietu '{package}' (pip install {package})."
         }
     except sqlite3.Error as e:
         return {
@@ -47,137 +285,674 @@ def export_data(table_name, filename=None):
             "message": f"Wystąpił nieoczekiwany błąd podczas eksportu danych: {e}"
         }
     finally:
-        if conn:
-            conn.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 
-def import_data(table_name, filename=None):
+def _export_worker(path, table_name, columns, batches_queue, file_format, compression, failed):
+    batches = iter(batches_queue.get, None)
+    try:
+        _write_export(path, table_name, columns, batches, file_format, compression)
+    except Exception:
+        failed.set()
+        raise
+    finally:
+        # Po błędzie zapisu kolejka jest opróżniana do końca, aby wątek odczytu się nie zablokował
+        for _ in batches:
+            pass
+
+
+@instrument
+def export_all(tables=None, file_format="csv", compression=None, batch_size=EXPORT_BATCH_SIZE, progress=None):
     """
-    Importuje dane z pliku CSV z folderu DATABASE do podanej tabeli.
+    Eksportuje kilka tabel naraz ze spójnej migawki bazy do plików w folderze DATABASE.
+
+    Wszystkie tabele odczytywane są jednym połączeniem w jednej transakcji odczytu
+    (wspólna migawka WAL - pliki odpowiadają stanowi bazy z jednej chwili). Kursory
+    tabel pobierają partie na zmianę, a każdą tabelę zapisuje do pliku osobny wątek
+    (kodowanie CSV / Arrow, kompresja i zapis równolegle z odczytem). Pliki zapisywane
+    są przez pliki tymczasowe i podmieniane dopiero po wyeksportowaniu wszystkich tabel.
 
     Args:
-        table_name (str): Nazwa tabeli do importu ('Customers', 'Books', 'Purchases').
-        filename (str, optional): Nazwa pliku CSV. Domyślnie 'nazwa_tabeli.csv'.
+        tables (list, optional): Tabele do eksportu. Domyślnie wszystkie (EXPORT_TABLES).
+        file_format (str, optional): "csv", "parquet" lub "arrow" (wymagają pakietu pyarrow).
+        compression (str, optional): Kompresja jak w export_data.
+        batch_size (int, optional): Liczba wierszy w partii.
+        progress (callable, optional): Wywoływana po każdej partii jako
+                                       progress(tabela, zapisane_wiersze, wszystkie_wiersze).
 
     Returns:
-        dict: Słownik z kodem odpowiedzi i komunikatem.
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (nieznana tabela, format lub kompresja, brak pakietu),
+              404 (błąd bazy), 500 (błąd ogólny).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict, tylko przy code=200): tables ({tabela: {path, rows, bytes}}), rows, seconds
+              i watermark (znacznik dziennika zmian w chwili migawki - początek kolejnego export_changes).
     """
-    if filename is None:
-        csv_filename = f"{table_name.lower()}.csv"
-    else:
-        csv_filename = filename
+    tables = list(tables or EXPORT_TABLES)
+    unknown = [table for table in tables if table not in EXPORT_TABLES]
+    if unknown:
+        return {
+            "code": 400,
+            "message": f"Nieznana nazwa tabeli: '{unknown[0]}'."
+        }
+    try:
+        file_format, compression = _resolve_export_options(None, compression, file_format)
+    except ValueError as e:
+        return {
+            "code": 400,
+            "message": str(e)
+        }
 
-    full_path = os.path.join(CSV_DIR, csv_filename)
+    paths = {table: os.path.join(CSV_DIR, _default_filename(table, file_format, compression)) for table in tables}
+    temp_paths = {table: f"{path}.tmp" for table, path in paths.items()}
+    os.makedirs(CSV_DIR, exist_ok=True)
+    rows = dict.fromkeys(tables, 0)
+    started = time.perf_counter()
 
-    if not os.path.exists(full_path):
+    try:
+        with get_connection() as conn, ThreadPoolExecutor(max_workers=len(tables),
+                                                          thread_name_prefix="export") as executor:
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                # Migawka WAL ustalana przy pierwszym odczycie i wspólna dla wszystkich tabel
+                conn.execute("BEGIN;")
+            active = {}
+            writers = {}
+            failed = threading.Event()
+            try:
+                totals = dict(conn.execute("SELECT Name, Value FROM Stats;").fetchall())
+                watermark = conn.execute(SQL_CHANGE_WATERMARK).fetchone()[0]
+                for table in tables:
+                    cursor = conn.execute(_export_query(table, file_format))
+                    batches_queue = queue.Queue(maxsize=EXPORT_QUEUE_BATCHES)
+                    writers[table] = executor.submit(_export_worker, temp_paths[table], table,
+                                                     [column[0] for column in cursor.description],
+                                                     batches_queue, file_format, compression, failed)
+                    active[table] = (cursor, batches_queue)
+                # Błąd wątku zapisu przerywa odczyt; wyjątek zgłasza writer.result() poniżej
+                while active and not failed.is_set():
+                    for table in list(active):
+                        cursor, batches_queue = active[table]
+                        batch = cursor.fetchmany(batch_size)
+                        if not batch:
+                            del active[table]
+                            batches_queue.put(None)
+                            continue
+                        batches_queue.put(batch)
+                        rows[table] += len(batch)
+                        if progress is not None:
+                            progress(table, rows[table], totals.get(EXPORT_TABLES[table]))
+            finally:
+                for _, batches_queue in active.values():
+                    batches_queue.put(None)
+                if own_transaction:
+                    conn.rollback()
+            for writer in writers.values():
+                writer.result()
+
+        for table in tables:
+            os.replace(temp_paths[table], paths[table])
+        exported = {table: {"path": paths[table], "rows": rows[table], "bytes": os.path.getsize(paths[table])}
+                    for table in tables}
+        return {
+            "code": 200,
+            "message": f"Wyeksportowano tabele {', '.join(tables)} ({sum(rows.values())} wierszy) do '{CSV_DIR}'.",
+            "data": {
+                "tables": exported,
+                "rows": sum(rows.values()),
+                "seconds": time.perf_counter() - started,
+                "watermark": watermark
+            }
+        }
+    except ImportError as e:
+        package = e.name.split(".")[0]
+        return {
+            "code": 400,
+            "message": f"Wybrany format lub kompresja wymaga pakietu '{package}' (pip install {package})."
+        }
+    except sqlite3.Error as e:
         return {
             "code": 404,
-            "message": f"Plik '{full_path}' nie został znaleziony."
+            "message": f"Błąd bazy danych podczas eksportu tabel: {e}"
         }
+    except Exception as e:
+        return {
+            "code": 500,
+            "message": f"Wystąpił nieoczekiwany błąd podczas eksportu danych: {e}"
+        }
+    finally:
+        for temp_path in temp_paths.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def _changes_query(table_name):
+    """
+    Zapytanie o zmiany tabeli w zakresie znaczników (ChangeID > ? AND ChangeID <= ?).
 
-    conn = None
+    Kilka zmian tego samego wiersza łączonych jest w jedną: wiersz istniejący jest
+    zapisywany z bieżącymi wartościami ('insert', jeśli pierwszą zmianą w zakresie było
+    wstawienie, inaczej 'update'), a usunięty - jako 'delete' z samym kluczem. Wiersz
+    wstawiony i usunięty w tym samym zakresie jest pomijany.
+    """
+    key = CHANGE_KEYS[table_name]
+    columns = ", ".join(f"t.{column}" for column in COLUMNAR_SCHEMAS[table_name] if column != key)
+    return f"""
+            WITH Changed AS (SELECT RowKey, MIN(ChangeID) AS FirstChange, MAX(ChangeID) AS LastChange
+                             FROM ChangeLog
+                             WHERE TableName = '{table_name}'
+                               AND ChangeID > ?
+                               AND ChangeID <= ?
+                             GROUP BY RowKey)
+            SELECT c.LastChange AS ChangeID,
+                   CASE
+                       WHEN t.{key} IS NULL THEN 'delete'
+                       WHEN f.Operation = 'I' THEN 'insert'
+                       ELSE 'update'
+                   END AS ChangeType,
+                   c.RowKey AS {key}, {columns}
+            FROM Changed c
+                     JOIN ChangeLog f ON f.ChangeID = c.FirstChange
+                     LEFT JOIN {table_name} t ON t.{key} = c.RowKey
+            WHERE t.{key} IS NOT NULL
+               OR f.Operation <> 'I'
+            ORDER BY c.LastChange;
+            """
+
+
+@instrument
+def export_changes(since_watermark=0, tables=None, file_format="csv", compression=None,
+                   batch_size=EXPORT_BATCH_SIZE):
+    """
+    Eksportuje tylko wiersze wstawione, zmienione lub usunięte od podanego znacznika (eksport przyrostowy).
+
+    Zmiany odczytywane są z dziennika ChangeLog (utrzymywanego przez wyzwalacze, migracja 9)
+    zakresem indeksu, więc koszt zależy od liczby zmian, a nie od rozmiaru tabel. Dla każdej
+    tabeli powstaje plik 'nazwa_tabeli_changes_<od>_<do>' z kolumnami ChangeID, ChangeType
+    ('insert', 'update', 'delete') i kolumnami tabeli (dla usuniętych wierszy tylko klucz).
+    Wszystkie tabele i nowy znacznik odczytywane są z jednej migawki. Pierwszą synchronizację
+    wykonuje się przez export_all, które zwraca znacznik swojej migawki.
+
+    Args:
+        since_watermark (int, optional): Znacznik z poprzedniego eksportu (export_all lub export_changes).
+                                         0 oznacza wszystkie zmiany od utworzenia dziennika.
+        tables (list, optional): Tabele do eksportu. Domyślnie wszystkie (EXPORT_TABLES).
+        file_format (str, optional): "csv", "parquet" lub "arrow" (wymagają pakietu pyarrow).
+        compression (str, optional): Kompresja jak w export_data.
+        batch_size (int, optional): Liczba wierszy w partii.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (nieznana tabela, format, kompresja lub znacznik, brak pakietu),
+              404 (błąd bazy), 409 (zmiany po znaczniku nie są już kompletne - potrzebny pełny eksport),
+              500 (błąd ogólny).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict, tylko przy code=200): tables ({tabela: {path, rows, bytes, inserted, updated,
+              deleted}}; puste, gdy brak zmian), rows, seconds i watermark (znacznik dla kolejnego wywołania).
+    """
+    tables = list(tables or EXPORT_TABLES)
+    unknown = [table for table in tables if table not in EXPORT_TABLES]
+    if unknown:
+        return {
+            "code": 400,
+            "message": f"Nieznana nazwa tabeli: '{unknown[0]}'."
+        }
+    if not isinstance(since_watermark, int) or since_watermark < 0:
+        return {
+            "code": 400,
+            "message": f"Nieprawidłowy znacznik zmian: {since_watermark}."
+        }
     try:
-        conn = sqlite3.connect(DB_PATH)
-        df = pd.read_csv(full_path)
-
-        if table_name == 'Customers':
-            for index, row in df.iterrows():
-                try:
-                    conn.execute("""
-                                 INSERT INTO Customers (CustomerID, Name, Email)
-                                 VALUES (?, ?, ?)
-                                 ON CONFLICT(CustomerID) DO UPDATE SET Name=excluded.Name,
-                                                                       Email=excluded.Email;
-                                 """, (row['CustomerID'], row['Name'], row['Email']))
-                except sqlite3.IntegrityError as e:
-                    if "UNIQUE constraint failed: Customers.Email" in str(e):
-                        print(
-                            f"Ostrzeżenie: Klient z adresem email '{row['Email']}' już istnieje. Pomijanie wiersza {index + 2}.")
-                    else:
-                        print(
-                            f"Błąd integralności danych podczas importu Customers w wierszu {index + 2}: {e}. Pomijanie wiersza.")
-                        continue
-            conn.commit()
-            return {
-                "code": 200,
-                "message": f"Dane do tabeli '{table_name}' zostały pomyślnie zaimportowane z '{full_path}'."
+        file_format, compression = _resolve_export_options(None, compression, file_format)
+    except ValueError as e:
+        return {
+            "code": 400,
+            "message": str(e)
+        }
+
+    os.makedirs(CSV_DIR, exist_ok=True)
+    started = time.perf_counter()
+    exported = {}
+    temp_paths = []
+
+    try:
+        with get_connection() as conn:
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                conn.execute("BEGIN;")
+            try:
+                watermark = conn.execute(SQL_CHANGE_WATERMARK).fetchone()[0]
+                if since_watermark > watermark:
+                    return {
+                        "code": 400,
+                        "message": f"Znacznik {since_watermark} jest większy od bieżącego ({watermark})."
+                    }
+                # Po purge_changes najstarsze zmiany nie są już dostępne
+                oldest = conn.execute("SELECT MIN(ChangeID) FROM ChangeLog;").fetchone()[0]
+                if since_watermark < (watermark + 1 if oldest is None else oldest) - 1:
+                    return {
+                        "code": 409,
+                        "message": f"Zmiany po znaczniku {since_watermark} zostały już usunięte z dziennika. "
+                                   f"Wykonaj pełny eksport (export_all)."
+                    }
+
+                if watermark > since_watermark:
+                    for table in tables:
+                        filename = (f"{table.lower()}_changes_{since_watermark}_{watermark}"
+                                    + FILE_FORMATS[file_format]
+                                    + (EXPORT_COMPRESSIONS.get(compression, "") if file_format == "csv" else ""))
+                        path = os.path.join(CSV_DIR, filename)
+                        temp_paths.append(f"{path}.tmp")
+                        counts = dict.fromkeys(("insert", "update", "delete"), 0)
+
+                        def batches(cursor):
+                            while True:
+                                batch = cursor.fetchmany(batch_size)
+                                if not batch:
+                                    break
+                                for row in batch:
+                                    counts[row[1]] += 1
+                                yield batch
+
+                        cursor = conn.execute(_changes_query(table), (since_watermark, watermark))
+                        _write_export(temp_paths[-1], table, [column[0] for column in cursor.description],
+                                      batches(cursor), file_format, compression)
+                        exported[table] = {"path": path, "rows": sum(counts.values()),
+                                           "inserted": counts["insert"], "updated": counts["update"],
+                                           "deleted": counts["delete"]}
+            finally:
+                if own_transaction:
+                    conn.rollback()
+
+        for table, temp_path in zip(exported, temp_paths):
+            os.replace(temp_path, exported[table]["path"])
+            exported[table]["bytes"] = os.path.getsize(exported[table]["path"])
+        rows = sum(table["rows"] for table in exported.values())
+        return {
+            "code": 200,
+            "message": (f"Wyeksportowano {rows} zmienionych wierszy (znaczniki {since_watermark}-{watermark}) "
+                        f"do '{CSV_DIR}'." if exported else f"Brak zmian od znacznika {since_watermark}."),
+            "data": {
+                "tables": exported,
+                "rows": rows,
+                "seconds": time.perf_counter() - started,
+                "watermark": watermark
             }
+        }
+    except ImportError as e:
+        package = e.name.split(".")[0]
+        return {
+            "code": 400,
+            "message": f"Wybrany format lub kompresja wymaga pakietu '{package}' (pip install {package})."
+        }
+    except sqlite3.Error as e:
+        return {
+            "code": 404,
+            "message": f"Błąd bazy danych podczas eksportu zmian: {e}"
+        }
+    except Exception as e:
+        return {
+            "code": 500,
+            "message": f"Wystąpił nieoczekiwany błąd podczas eksportu zmian: {e}"
+        }
+    finally:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def purge_changes(up_to_watermark):
+    """
+    Usuwa z dziennika zmian wpisy do podanego znacznika włącznie (np. po potwierdzonej synchronizacji).
+
+    Kolejne export_changes ze znacznikiem mniejszym niż usunięty zwróci 409.
 
-        elif table_name == 'Books':
-            for index, row in df.iterrows():
-                cursor = conn.execute("SELECT BookID FROM Books WHERE Title = ? AND Author = ?;",
-                                      (row['Title'], row['Author']))
-                existing_book = cursor.fetchone()
-                if existing_book:
-                    conn.execute("""
-                                 UPDATE Books
-                                 SET Genre=?,
-                                     Price=?,
-                                     Stock=?,
-                                     DateAdded=?
-                                 WHERE BookID = ?;
-                                 """, (row['Genre'], row['Price'], row['Stock'], row['DateAdded'], existing_book[0]))
-                else:
-                    conn.execute("""
-                                 INSERT INTO Books (Title, Author, Genre, Price, Stock, DateAdded)
-                                 VALUES (?, ?, ?, ?, ?, ?);
-                                 """, (row['Title'], row['Author'], row['Genre'], row['Price'], row['Stock'],
-                                       row['DateAdded']))
+    Args:
+        up_to_watermark (int): Znacznik, do którego zmiany zostały już wyeksportowane.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (nieprawidłowy znacznik), 500 (błąd bazy).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict, tylko przy code=200): deleted (liczba usuniętych wpisów).
+    """
+    if not isinstance(up_to_watermark, int) or up_to_watermark < 0:
+        return {
+            "code": 400,
+            "message": f"Nieprawidłowy znacznik zmian: {up_to_watermark}."
+        }
+    try:
+        with get_connection() as conn:
+            cursor = conn.execute("DELETE FROM ChangeLog WHERE ChangeID <= ?;", (up_to_watermark,))
             conn.commit()
             return {
                 "code": 200,
-                "message": f"Dane do tabeli '{table_name}' zostały pomyślnie zaimportowane z '{full_path}'."
+                "message": f"Usunięto {cursor.rowcount} wpisów dziennika zmian do znacznika {up_to_watermark}.",
+                "data": {"deleted": cursor.rowcount}
             }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas czyszczenia dziennika zmian: {e}"
+        }
 
-        elif table_name == 'Purchases':
-            expected_columns = ['CustomerID', 'BookID', 'Quantity', 'PurchaseDate']
-            if not all(col in df.columns for col in expected_columns):
-                return {
-                    "code": 400,
-                    "message": f"Plik CSV dla 'Purchases' ({full_path}) musi zawierać kolumny: CustomerID, BookID, Quantity, PurchaseDate."
-                }
 
-            for index, row in df.iterrows():
-                customer_exists = conn.execute("SELECT 1 FROM Customers WHERE CustomerID = ?;",
-                                               (row['CustomerID'],)).fetchone()
-                book_exists = conn.execute("SELECT 1 FROM Books WHERE BookID = ?;", (row['BookID'],)).fetchone()
-
-                if not customer_exists:
-                    print(
-                        f"Ostrzeżenie: CustomerID '{row['CustomerID']}' nie istnieje w bazie danych. Pomijanie zakupu w wierszu {index + 2} z pliku '{filename}'.")
-                    continue
-                if not book_exists:
-                    print(
-                        f"Ostrzeżenie: BookID '{row['BookID']}' nie istnieje w bazie danych. Pomijanie zakupu w wierszu {index + 2} z pliku '{filename}'.")
-                    continue
-
-                try:
-                    purchase_date = pd.to_datetime(row['PurchaseDate']).strftime('%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    print(
-                        f"Ostrzeżenie: Nieprawidłowy format daty '{row['PurchaseDate']}' w wierszu {index + 2} z pliku '{filename}'. Użyto bieżącej daty.")
-                    purchase_date = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                try:
-                    conn.execute("""
-                                 INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate)
-                                 VALUES (?, ?, ?, ?);
-                                 """, (row['CustomerID'], row['BookID'], row['Quantity'], purchase_date))
-                except sqlite3.IntegrityError as e:
-                    print(
-                        f"Błąd integralności danych podczas importu Purchases w wierszu {index + 2} z pliku '{filename}': {e}. Pomijanie wiersza.")
-                    continue
+def _read_header(full_path, file_format):
+    """Zwraca listę kolumn pliku (pusta lista dla pustego pliku CSV)."""
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_schema(full_path).names
+    if file_format == "arrow":
+        import pyarrow as pa
+        with pa.memory_map(full_path) as source:
+            return pa.ipc.open_file(source).schema.names
+    with _open_csv_reader(full_path) as file:
+        return next(csv.reader(file), [])
+
+
+def _read_columnar_batches(full_path, file_format, columns):
+    """
+    Zwraca kolejne partie rekordów (pyarrow.RecordBatch) pliku Parquet lub Arrow IPC z kolumnami
+    `columns` obecnymi w pliku. Plik zamykany jest po ostatniej partii albo przy zamknięciu
+    generatora (np. gdy import zostanie przerwany) - otwarte mapowanie blokowałoby plik w Windows.
+    """
+    import pyarrow as pa
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        with pq.ParquetFile(full_path) as parquet_file:
+            selected = [name for name in parquet_file.schema_arrow.names if name in columns]
+            yield from parquet_file.iter_batches(batch_size=IMPORT_BATCH_SIZE, columns=selected)
+        return
+    with pa.memory_map(full_path) as source:
+        reader = pa.ipc.open_file(source)
+        selected = [name for name in reader.schema.names if name in columns]
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).select(selected)
+
+
+def _read_chunks(full_path, file_format, columns):
+    """
+    Czyta plik partiami jako DataFrame indeksowane numerem wiersza (RowNo): numer linii
+    w CSV (nagłówek to linia 1), a w Parquet/Arrow numer wiersza liczony od 1. Pliki
+    kolumnowe czytane są leniwie - po jednej grupie wierszy / partii rekordów.
+    """
+    import pandas as pd
+    if file_format == "csv":
+        # Wszystkie kolumny jako tekst: liczby konwertuje powinowactwo kolumn tabeli tymczasowej
+        with pd.read_csv(full_path, dtype=str, usecols=lambda name: name in columns,
+                         chunksize=IMPORT_BATCH_SIZE) as reader:
+            for chunk in reader:
+                chunk.index = chunk.index + 2
+                yield chunk
+        return
+
+    first = 1
+    batches = _read_columnar_batches(full_path, file_format, columns)
+    try:
+        for batch in batches:
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(first, first + len(chunk))
+            first += len(chunk)
+            yield chunk
+    finally:
+        batches.close()
+
+
+def _prepare_chunks(table_name, full_path, file_format):
+    """
+    Czyta plik partiami i przygotowuje wiersze tabeli pośredniej (RowNo i kolumny
+    IMPORT_STAGING_COLUMNS); zwraca pary (lista wierszy, liczba błędnych dat).
+    """
+    import pandas as pd
+    columns = IMPORT_STAGING_COLUMNS[table_name]
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Wartości, których nie da się skonwertować na liczby, odrzuca walidacja w SQL
+    for chunk in _read_chunks(full_path, file_format, columns):
+        chunk = chunk.reindex(columns=list(columns))
+        invalid_dates = 0
+        if "PurchaseDate" in columns:
+            parsed = pd.to_datetime(chunk["PurchaseDate"], errors="coerce", format="mixed")
+            invalid_dates = int(parsed.isna().sum())
+            chunk["PurchaseDate"] = parsed.dt.strftime('%Y-%m-%d %H:%M:%S').fillna(now)
+        # Znaczniki czasu z plików kolumnowych zapisywane w formacie dat bazy
+        for name in chunk.columns[[pd.api.types.is_datetime64_any_dtype(dtype) for dtype in chunk.dtypes]]:
+            chunk[name] = chunk[name].dt.strftime('%Y-%m-%d %H:%M:%S')
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield list(chunk.itertuples(name=None)), invalid_dates
+
+
+def _load_staging(conn, table_name, chunks):
+    """Wstawia przygotowane partie do tymczasowej tabeli ImportStaging; zwraca (liczba wierszy, błędne daty)."""
+    columns = IMPORT_STAGING_COLUMNS[table_name]
+    definitions = ", ".join(f"{name} {affinity}" for name, affinity in columns.items())
+    conn.execute("DROP TABLE IF EXISTS temp.ImportStaging;")
+    # RowNo to numer wiersza w pliku (zob. _read_chunks), Skip - powód pominięcia wiersza
+    conn.execute(f"CREATE TEMP TABLE ImportStaging (RowNo INTEGER PRIMARY KEY, {definitions}, Skip TEXT);")
+    for index in IMPORT_STAGING_INDEXES.get(table_name, ()):
+        conn.execute(f"CREATE INDEX temp.idx_import_staging_{index.replace(', ', '_').lower()} "
+                     f"ON ImportStaging ({index});")
+    insert_sql = (f"INSERT INTO temp.ImportStaging (RowNo, {', '.join(columns)}) "
+                  f"VALUES (?{', ?' * len(columns)});")
+
+    rows = invalid_dates = 0
+    for records, chunk_invalid_dates in chunks:
+        conn.executemany(insert_sql, records)
+        rows += len(records)
+        invalid_dates += chunk_invalid_dates
+    return rows, invalid_dates
+
+
+def _import_customers(conn):
+    # Liczbę nowych klientów podaje licznik Stats (wyzwalacz przy INSERT), resztę zmian stanowią aktualizacje
+    count_sql = "SELECT Value FROM Stats WHERE Name = 'customers';"
+    before = conn.execute(count_sql).fetchone()[0]
+    changed = conn.execute("""
+                            INSERT INTO Customers (CustomerID, Name, Email)
+                            SELECT CustomerID, Name, Email
+                            FROM temp.ImportStaging
+                            WHERE Skip IS NULL
+                            ORDER BY RowNo
+                            ON CONFLICT(CustomerID) DO UPDATE SET Name=excluded.Name,
+                                                                  Email=excluded.Email;
+                            """).rowcount
+    inserted = conn.execute(count_sql).fetchone()[0] - before
+    return inserted, changed - inserted
+
+
+def _import_books(conn):
+    # Książki o tym samym tytule i autorze są aktualizowane, pozostałe dodawane
+    updated = conn.execute("""
+                           UPDATE Books
+                           SET Genre=s.Genre,
+                               Price=s.Price,
+                               Stock=s.Stock,
+                               DateAdded=s.DateAdded
+                           FROM temp.ImportStaging s
+                           WHERE s.Skip IS NULL
+                             AND Books.Title = s.Title
+                             AND Books.Author = s.Author;
+                           """).rowcount
+
+    # Wyzwalacze FTS, Stats i ChangeLog pomijane - dane pochodne aktualizowane raz dla wszystkich nowych książek
+    conn.execute("INSERT INTO BulkLoad (TableName) VALUES ('Books');")
+    last_id = conn.execute("SELECT COALESCE(MAX(BookID), 0) FROM Books;").fetchone()[0]
+    inserted = conn.execute("""
+                            INSERT INTO Books (Title, Author, Genre, Price, Stock, DateAdded)
+                            SELECT Title, Author, Genre, Price, Stock, DateAdded
+                            FROM temp.ImportStaging s
+                            WHERE Skip IS NULL
+                              AND NOT EXISTS (SELECT 1 FROM main.Books b WHERE b.Title = s.Title AND b.Author = s.Author)
+                            ORDER BY RowNo;
+                            """).rowcount
+    conn.execute("""
+                 INSERT INTO BooksFTS (rowid, Title, Author, Genre)
+                 SELECT BookID, Title, Author, Genre
+                 FROM Books
+                 WHERE BookID > ?;
+                 """, (last_id,))
+    log_book_changes(conn, "I", "BookID > ?", (last_id,))
+    out_of_stock = conn.execute("SELECT COALESCE(SUM(Stock IS 0), 0) FROM Books WHERE BookID > ?;",
+                                (last_id,)).fetchone()[0]
+    adjust_book_stats(conn, inserted, out_of_stock)
+    conn.execute("DELETE FROM BulkLoad WHERE TableName = 'Books';")
+    return inserted, updated
+
+
+def _import_purchases(conn):
+    # Cena z pliku (eksport z UnitPrice), w przeciwnym razie bieżąca cena książki
+    inserted = conn.execute("""
+                            INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate, UnitPrice, LineTotal)
+                            SELECT s.CustomerID,
+                                   s.BookID,
+                                   s.Quantity,
+                                   s.PurchaseDate,
+                                   COALESCE(s.UnitPrice, b.Price),
+                                   COALESCE(s.UnitPrice, b.Price) * s.Quantity
+                            FROM temp.ImportStaging s
+                                     JOIN main.Books b ON b.BookID = s.BookID
+                            WHERE s.Skip IS NULL
+                            ORDER BY s.RowNo;
+                            """).rowcount
+    return inserted, 0
+
+
+IMPORTERS = {"Customers": _import_customers, "Books": _import_books, "Purchases": _import_purchases}
+
+
+def _import_table(conn, table_name, chunks):
+    """Wczytuje partie do tabeli pośredniej, waliduje je i zapisuje do tabeli docelowej (w bieżącej transakcji)."""
+    rows, invalid_dates = _load_staging(conn, table_name, chunks)
+    for reason, condition in IMPORT_VALIDATION[table_name]:
+        conn.execute(f"UPDATE temp.ImportStaging AS s SET Skip = ? WHERE Skip IS NULL AND ({condition});",
+                     (reason,))
+    inserted, updated = IMPORTERS[table_name](conn)
+    skipped = dict(conn.execute("""
+                                SELECT Skip, COUNT(*)
+                                FROM temp.ImportStaging
+                                WHERE Skip IS NOT NULL
+                                GROUP BY Skip;
+                                """).fetchall())
+    skipped_rows = conn.execute("""
+                                SELECT RowNo, Skip
+                                FROM temp.ImportStaging
+                                WHERE Skip IS NOT NULL
+                                ORDER BY RowNo
+                                LIMIT ?;
+                                """, (IMPORT_SKIPPED_REPORT_LIMIT,)).fetchall()
+    conn.execute("DROP TABLE temp.ImportStaging;")
+    return {
+        "rows": rows,
+        "inserted": inserted,
+        "updated": updated,
+        "invalid_dates": invalid_dates,
+        "skipped": skipped,
+        "skipped_rows": skipped_rows
+    }
+
+
+def _import_summary(table_name, full_path, data):
+    message = (f"Zaimportowano dane do tabeli '{table_name}' z '{full_path}': dodano {data['inserted']}, "
+               f"zaktualizowano {data['updated']}, pominięto {sum(data['skipped'].values())} z {data['rows']} wierszy.")
+    if data["invalid_dates"]:
+        message += f" Nieprawidłowe daty zastąpione bieżącą datą: {data['invalid_dates']}."
+    return message
+
+
+def _check_import_file(table_name, full_path, file_format):
+    """Sprawdza istnienie pliku i jego kolumny; zwraca słownik błędu albo None."""
+    if not os.path.exists(full_path):
+        return {
+            "code": 404,
+            "message": f"Plik '{full_path}' nie został znaleziony."
+        }
+    try:
+        header = _read_header(full_path, file_format)
+    except ImportError as e:
+        package = e.name.split(".")[0]
+        return {
+            "code": 400,
+            "message": f"Format {file_format} wymaga pakietu '{package}' (pip install {package})."
+        }
+    except (OSError, ValueError) as e:
+        return {
+            "code": 400,
+            "message": f"Nie można odczytać pliku '{full_path}': {e}"
+        }
+    if not header:
+        return {
+            "code": 400,
+            "message": f"Plik '{full_path}' jest pusty lub nie zawiera danych."
+        }
+    required = [name for name in IMPORT_STAGING_COLUMNS[table_name]
+                if name not in IMPORT_OPTIONAL_COLUMNS.get(table_name, ())]
+    if not all(name in header for name in required):
+        return {
+            "code": 400,
+            "message": f"Plik dla '{table_name}' ({full_path}) musi zawierać kolumny: {', '.join(required)}."
+        }
+    return None
+
+
+@instrument
+@invalidates("Customers", "Books", "Purchases")
+def import_data(table_name, filename=None, file_format=None):
+    """
+    Importuje dane z pliku CSV, Parquet lub Arrow IPC z folderu DATABASE do podanej tabeli.
+
+    Plik wczytywany jest partiami (daty parsowane wektorowo, pliki kolumnowe po jednej
+    grupie wierszy) do tymczasowej tabeli pośredniej przez executemany. Walidacja
+    (brakujące i błędne wartości, nieistniejący klienci i książki, powtórzone adresy
+    email) oraz zapis do tabeli docelowej (INSERT ... ON CONFLICT, UPDATE ... FROM)
+    wykonywane są zbiorczo w SQL, w jednej transakcji. Pominięte wiersze zwracane są
+    w raporcie zamiast wypisywania.
+
+    Args:
+        table_name (str): Nazwa tabeli do importu ('Customers', 'Books', 'Purchases').
+        filename (str, optional): Nazwa pliku. Domyślnie 'nazwa_tabeli' z rozszerzeniem formatu.
+        file_format (str, optional): "csv", "parquet" lub "arrow" (wymagają pakietu pyarrow).
+                                     Domyślnie wykrywany z rozszerzenia pliku, w przeciwnym razie CSV.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (błędny plik, tabela lub format, brak pakietu), 404 (brak pliku),
+              409 (konflikt danych), 500 (błąd bazy lub nieoczekiwany).
+            - message (str): Komunikat z podsumowaniem importu.
+            - data (dict, tylko przy code=200): rows, inserted, updated, invalid_dates (zastąpione
+              bieżącą datą), skipped ({powód: liczba}) i skipped_rows - lista par (numer wiersza, powód),
+              najwyżej IMPORT_SKIPPED_REPORT_LIMIT.
+    """
+    if table_name not in IMPORTERS:
+        return {
+            "code": 400,
+            "message": f"Nieznana nazwa tabeli: '{table_name}'."
+        }
+
+    if file_format is None:
+        file_format = _file_format(filename) if filename else "csv"
+    if file_format not in FILE_FORMATS:
+        return {
+            "code": 400,
+            "message": f"Nieznany format pliku: {file_format}. Dostępne: {', '.join(FILE_FORMATS)}."
+        }
 
+    full_path = os.path.join(CSV_DIR, filename or _default_filename(table_name, file_format))
+    error = _check_import_file(table_name, full_path, file_format)
+    if error is not None:
+        return error
+
+    import pandas as pd  # przed try: klauzule except odwołują się do pd.errors
+    try:
+        with get_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE;")
+            data = _import_table(conn, table_name, _prepare_chunks(table_name, full_path, file_format))
             conn.commit()
-            return {
-                "code": 200,
-                "message": f"Dane do tabeli '{table_name}' zostały pomyślnie zaimportowane z '{full_path}'."
-            }
-        else:
-            return {
-                "code": 400,
-                "message": f"Nieznana nazwa tabeli: '{table_name}'."
-            }
+        return {
+            "code": 200,
+            "message": _import_summary(table_name, full_path, data),
+            "data": data
+        }
 
     except pd.errors.EmptyDataError:
         return {
@@ -189,11 +964,153 @@ def import_data(table_name, filename=None):
             "code": 400,
             "message": f"Błąd parsowania pliku CSV '{full_path}': {e}"
         }
+    except sqlite3.IntegrityError as e:
+        return {
+            "code": 409,
+            "message": f"Błąd integralności danych podczas importu tabeli '{table_name}': {e}. Import wycofany."
+        }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas importu tabeli '{table_name}': {e}. Import wycofany."
+        }
+    except Exception as e:
+        return {
+            "code": 500,
+            "message": f"Wystąpił nieoczekiwany błąd podczas importu danych: {e}"
+        }
+
+
+def _put(items_queue, item, stop):
+    """Wstawia element do kolejki, czekając na miejsce; zwraca False, jeśli przerwano (stop)."""
+    while not stop.is_set():
+        try:
+            items_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _parse_worker(chunks, chunks_queue, stop):
+    # Błąd parsowania przekazywany jest przez kolejkę do wątku zapisu
+    try:
+        for chunk in chunks:
+            if not _put(chunks_queue, chunk, stop):
+                return
+        _put(chunks_queue, None, stop)
+    except Exception as e:
+        _put(chunks_queue, e, stop)
+
+
+def _consume(chunks_queue):
+    while True:
+        chunk = chunks_queue.get()
+        if chunk is None:
+            return
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield chunk
+
+
+@instrument
+@invalidates("Customers", "Books", "Purchases")
+def import_all(tables=None, file_format="csv", compression=None):
+    """
+    Importuje kilka tabel naraz z plików w folderze DATABASE w kolejności zależności.
+
+    Pliki wszystkich tabel czytane i przygotowywane są równolegle (osobny wątek na
+    plik, ograniczone kolejki partii), a jedno połączenie zapisuje je w kolejności
+    IMPORT_ORDER (klienci i książki przed zakupami, które od nich zależą) w jednej
+    transakcji - błąd dowolnej tabeli wycofuje cały import.
+
+    Args:
+        tables (list, optional): Tabele do importu. Domyślnie wszystkie (IMPORT_ORDER).
+        file_format (str, optional): "csv", "parquet" lub "arrow" (wymagają pakietu pyarrow).
+        compression (str, optional): Kompresja plików CSV ("gzip", "zstd") - wyznacza domyślne
+                                     nazwy plików jak w export_all.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (błędny plik, tabela lub format), 404 (brak pliku),
+              409 (konflikt danych), 500 (błąd bazy lub nieoczekiwany).
+            - message (str): Podsumowanie importu każdej tabeli.
+            - data (dict, tylko przy code=200): tables ({tabela: wynik jak data w import_data}) i seconds.
+    """
+    requested = list(tables or IMPORT_ORDER)
+    unknown = [table for table in requested if table not in IMPORT_ORDER]
+    if unknown:
+        return {
+            "code": 400,
+            "message": f"Nieznana nazwa tabeli: '{unknown[0]}'."
+        }
+    tables = [table for table in IMPORT_ORDER if table in requested]
+    try:
+        file_format, compression = _resolve_export_options(None, compression, file_format)
+    except ValueError as e:
+        return {
+            "code": 400,
+            "message": str(e)
+        }
+
+    paths = {table: os.path.join(CSV_DIR, _default_filename(table, file_format, compression)) for table in tables}
+    for table in tables:
+        error = _check_import_file(table, paths[table], file_format)
+        if error is not None:
+            return error
+
+    import pandas as pd  # przed try: klauzule except odwołują się do pd.errors
+    started = time.perf_counter()
+    stop = threading.Event()
+    imported = {}
+    table = None
+    try:
+        with ThreadPoolExecutor(max_workers=len(tables), thread_name_prefix="import") as executor:
+            try:
+                queues = {table: queue.Queue(maxsize=IMPORT_QUEUE_CHUNKS) for table in tables}
+                for table in tables:
+                    executor.submit(_parse_worker, _prepare_chunks(table, paths[table], file_format),
+                                    queues[table], stop)
+                with get_connection() as conn:
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN IMMEDIATE;")
+                    for table in tables:
+                        imported[table] = _import_table(conn, table, _consume(queues[table]))
+                    conn.commit()
+            finally:
+                # Zatrzymuje wątki parsowania czekające na miejsce w kolejce (np. po błędzie zapisu)
+                stop.set()
+        return {
+            "code": 200,
+            "message": " ".join(_import_summary(table, paths[table], imported[table]) for table in tables),
+            "data": {
+                "tables": imported,
+                "seconds": time.perf_counter() - started
+            }
+        }
+
+    except pd.errors.EmptyDataError:
+        return {
+            "code": 400,
+            "message": f"Plik '{paths[table]}' jest pusty lub nie zawiera danych."
+        }
+    except pd.errors.ParserError as e:
+        return {
+            "code": 400,
+            "message": f"Błąd parsowania pliku CSV '{paths[table]}': {e}"
+        }
+    except sqlite3.IntegrityError as e:
+        return {
+            "code": 409,
+            "message": f"Błąd integralności danych podczas importu tabeli '{table}': {e}. Import wycofany."
+        }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas importu tabeli '{table}': {e}. Import wycofany."
+        }
     except Exception as e:
         return {
             "code": 500,
             "message": f"Wystąpił nieoczekiwany błąd podczas importu danych: {e}"
         }
-    finally:
-        if conn:
-            conn.close()
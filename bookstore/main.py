@@ -1,10 +1,11 @@
 # main.py
-from bookstore.book_Manager import get_book, add_book, remove_book
-from bookstore.customer_Manager import register_customer, get_customers, remove_customer, buy_book, \
-    get_customer_purchases
+from bookstore.book_Manager import add_book, remove_book, iter_books
+from bookstore.customer_Manager import register_customer, remove_customer, buy_book, \
+    get_customer_purchases, iter_customers
 from bookstore.monitor import *
 from bookstore.utilities import initialize_database, validate_email
-from bookstore.file_manager import export_data, import_data
+from bookstore.file_manager import export_data, import_data, export_all, import_all, export_changes
+from bookstore.backup import backup_database, restore_database
 
 
 def __main__():
@@ -27,9 +28,13 @@ def statistics_menu():
         print("9. Statystyki przychodów")
         print("10. Książki z niskim stanem magazynowym")
         print("11. Historia zakupów")
-        print("12. Eksportuj dane do CSV")
-        print("13. Importuj dane z CSV")
-        print("14. Powrót do głównego menu")
+        print("12. Eksportuj dane (CSV, Parquet, Arrow)")
+        print("13. Importuj dane (CSV, Parquet, Arrow)")
+        print("14. Sprawdź spójność liczników statystyk")
+        print("15. Przychody w zakresie dat")
+        print("16. Podsumowanie statystyk (migawka)")
+        print("17. Eksportuj zmiany od znacznika (eksport przyrostowy)")
+        print("18. Powrót do głównego menu")
 
         try:
             choice = int(input("Wpisz numer: "))
@@ -60,13 +65,18 @@ def statistics_menu():
                 case 5:
                     result = get_total_purchases()
                     print(f"Liczba zakupów: {result['data']}")
+                    result = get_units_sold()
+                    print(f"Sprzedane egzemplarze: {result['data']}")
 
                 case 6:
                     amount = input("Ile najpopularniejszych książek wyświetlić? (domyślnie 3): ").strip()
                     amount = int(amount) if amount.isdigit() else 3
-                    result = get_popular_books(amount)
+                    days = input("Z ilu ostatnich dni? (np. 7 lub 30, Enter = cała historia): ").strip()
+                    days = int(days) if days.isdigit() and int(days) > 0 else None
+                    result = get_popular_books(amount, days)
                     if result['data']:
-                        print("Najpopularniejsze książki:")
+                        print("Najpopularniejsze książki:" if days is None
+                              else f"Najpopularniejsze książki z ostatnich {days} dni:")
                         for book in result['data']:
                             print(f"  - {book[0]} by {book[1]} (Sprzedano: {book[2]} egz.)")  # Corrected indices
                     else:
@@ -113,39 +123,128 @@ def statistics_menu():
                         print("Wszystkie książki mają wystarczający stan magazynowy")
 
                 case 11:
-                    result = get_purchase_history()
-                    if result['data']:
-                        print("Ostatnie zakupy:")
+                    start_date = input("Data od (RRRR-MM-DD, Enter = ostatnie zakupy): ").strip()
+                    end_date = input("Data do (RRRR-MM-DD, Enter = bez ograniczenia): ").strip() if start_date else ""
+                    if start_date:
+                        result = get_purchase_history(start_date, end_date or None, page_size=10)
+                    else:
+                        result = get_purchase_history()
+                    if result['code'] == 400:
+                        print(result['message'])
+                    elif result['data']:
+                        print("Ostatnie zakupy:" if not start_date else "Najnowsze zakupy z podanego zakresu:")
                         for purchase in result['data'][:10]:  # Pokaż tylko 10 ostatnich
                             print(f"  - {purchase[1]} kupił {purchase[2]} (Ilość: {purchase[3]}, Data: {purchase[4]})")
                     else:
                         print("Brak historii zakupów")
 
                 case 12:
-                    print("\n--- Eksport danych do CSV ---")
+                    print("\n--- Eksport danych do pliku ---")
                     table_choice = input(
-                        "Wybierz tabelę do eksportu (Customers, Books, Purchases): ").strip().capitalize()
+                        "Wybierz tabelę do eksportu (Customers, Books, Purchases, All = wszystkie): ").strip().capitalize()
                     if table_choice in ['Customers', 'Books', 'Purchases']:
                         filename_input = input(
-                            f"Podaj nazwę pliku CSV (domyślnie {table_choice.lower()}.csv): ").strip()
+                            f"Podaj nazwę pliku (domyślnie {table_choice.lower()} z rozszerzeniem formatu): ").strip()
                         filename = filename_input if filename_input else None
-                        result = export_data(table_choice, filename)
+                        file_format = input("Format (csv/parquet/arrow, Enter = z rozszerzenia pliku lub csv): "
+                                            ).strip().lower() or None
+                        compression = input("Kompresja (gzip/zstd, Enter = brak): ").strip().lower() or None
+                        result = export_data(table_choice, filename, compression,
+                                             progress=lambda rows, total: print(
+                                                 f"\r  Zapisano {rows}" + (f" z {total}" if total else "") + " wierszy",
+                                                 end="", flush=True),
+                                             file_format=file_format)
+                        print()
+                        print(result["message"])
+                    elif table_choice == 'All':
+                        file_format = input("Format (csv/parquet/arrow, Enter = csv): ").strip().lower() or "csv"
+                        compression = input("Kompresja (gzip/zstd, Enter = brak): ").strip().lower() or None
+                        result = export_all(file_format=file_format, compression=compression,
+                                            progress=lambda table, rows, total: print(
+                                                f"\r  {table}: zapisano {rows}" + (f" z {total}" if total else "")
+                                                + " wierszy   ", end="", flush=True))
+                        print()
                         print(result["message"])
+                        if result["code"] == 200:
+                            print(f"Znacznik zmian migawki: {result['data']['watermark']}")
                     else:
                         print("Nieprawidłowa nazwa tabeli.")
                 case 13:
-                    print("\n--- Import danych z CSV ---")
+                    print("\n--- Import danych z pliku ---")
                     table_choice = input(
-                        "Wybierz tabelę do importu (Customers, Books, Purchases): ").strip().capitalize()
+                        "Wybierz tabelę do importu (Customers, Books, Purchases, All = wszystkie): ").strip().capitalize()
                     if table_choice in ['Customers', 'Books', 'Purchases']:
                         filename_input = input(
-                            f"Podaj nazwę pliku CSV (domyślnie {table_choice.lower()}.csv): ").strip()
+                            f"Podaj nazwę pliku (domyślnie {table_choice.lower()} z rozszerzeniem formatu): ").strip()
                         filename = filename_input if filename_input else None
-                        result = import_data(table_choice, filename)
+                        file_format = input("Format (csv/parquet/arrow, Enter = z rozszerzenia pliku lub csv): "
+                                            ).strip().lower() or None
+                        result = import_data(table_choice, filename, file_format)
                         print(result["message"])
+                        if result["code"] == 200:
+                            for reason, count in sorted(result["data"]["skipped"].items()):
+                                print(f"  - {reason}: {count}")
+                            lines = [str(line) for line, _ in result["data"]["skipped_rows"][:20]]
+                            if lines:
+                                print(f"  Pominięte wiersze: {', '.join(lines)}"
+                                      f"{' ...' if len(result['data']['skipped_rows']) > 20 else ''}")
+                    elif table_choice == 'All':
+                        file_format = input("Format (csv/parquet/arrow, Enter = csv): ").strip().lower() or "csv"
+                        compression = input("Kompresja plików CSV (gzip/zstd, Enter = brak): ").strip().lower() or None
+                        result = import_all(file_format=file_format, compression=compression)
+                        print(result["message"])
+                        if result["code"] == 200:
+                            for table, data in result["data"]["tables"].items():
+                                for reason, count in sorted(data["skipped"].items()):
+                                    print(f"  - {table} {reason}: {count}")
                     else:
                         print("Nieprawidłowa nazwa tabeli.")
                 case 14:
+                    result = check_stats_consistency()
+                    print(result["message"])
+                    for row in result["data"]:
+                        if row["stored"] != row["actual"]:
+                            print(f"  - {row['name']}: zapisano {row['stored']}, faktycznie {row['actual']}")
+                case 15:
+                    start_date = input("Data początkowa (RRRR-MM-DD, puste = od początku): ").strip() or None
+                    end_date = input("Data końcowa (RRRR-MM-DD, puste = dzisiaj): ").strip() or None
+                    granularity = input("Podział (day/week/month, domyślnie month): ").strip() or "month"
+                    result = get_revenue(start_date, end_date, granularity)
+                    if result['code'] != 200:
+                        print(result['message'])
+                    else:
+                        data = result['data']
+                        for period, revenue, units, purchases in data['periods']:
+                            print(f"  {period}: {revenue:.2f} zł ({units} egz., {purchases} zakupów)")
+                        print(f"Razem {data['start_date']} - {data['end_date']}: {data['total']['revenue']:.2f} zł")
+                case 16:
+                    result = get_dashboard_snapshot()
+                    if result['code'] != 200:
+                        print(result['message'])
+                    else:
+                        data = result['data']
+                        print(f"Stan na {data['snapshot_at']}:")
+                        print(f"  Książki: {data['total_books']} (niedostępne: {data['ebooks_unavailable']})")
+                        print(f"  Klienci: {data['total_customers']}")
+                        print(f"  Zakupy: {data['total_purchases']} (sprzedane egzemplarze: {data['units_sold']})")
+                        print(f"  Przychód całkowity: {data['revenue']['total_revenue']:.2f} zł, "
+                              f"z ostatnich 30 dni: {data['revenue']['monthly_revenue']:.2f} zł")
+                        print("  Najpopularniejsze: " + ", ".join(f"{book[0]} ({book[2]} egz.)"
+                                                                 for book in data['popular_books']))
+                        print("  Najnowsze: " + ", ".join(book[1] for book in data['recent_books']))
+                        print(f"  Książki z niskim stanem magazynowym: {len(data['low_stock_books'])}")
+                case 17:
+                    watermark = int(input("Znacznik poprzedniej synchronizacji (0 = od początku dziennika): ").strip() or 0)
+                    file_format = input("Format (csv/parquet/arrow, Enter = csv): ").strip().lower() or "csv"
+                    compression = input("Kompresja (gzip/zstd, Enter = brak): ").strip().lower() or None
+                    result = export_changes(watermark, file_format=file_format, compression=compression)
+                    print(result["message"])
+                    if result["code"] == 200:
+                        for table, data in result["data"]["tables"].items():
+                            print(f"  - {table}: {data['inserted']} nowych, {data['updated']} zmienionych, "
+                                  f"{data['deleted']} usuniętych")
+                        print(f"Nowy znacznik: {result['data']['watermark']}")
+                case 18:
                     break
                 case _:
                     print("Nieprawidłowy wybór")
@@ -187,13 +286,14 @@ def remove_book_from_system():
 
 def show_all_books():
     print("\n--- Lista książek ---")
-    result = get_book()
-    if result["code"] == 200:
-        for book in result["data"]:
+    found = False
+    for books in iter_books():
+        found = True
+        for book in books:
             print(
                 f"ID: {book[0]}, Tytuł: {book[1]}, Autor: {book[2]}, Gatunek: {book[3]}, Cena: {book[4]:.2f} zł, Stan: {book[5]}, Data dodania: {book[6]}")
-    else:
-        print(result["message"])
+    if not found:
+        print("Brak książek spełniających kryteria.")
 
 
 def register_new_customer():
@@ -220,12 +320,13 @@ def remove_existing_customer():
 
 def show_all_customers():
     print("\n--- Lista klientów ---")
-    result = get_customers()
-    if result["code"] == 200:
-        for customer in result["data"]:
+    found = False
+    for customers in iter_customers():
+        found = True
+        for customer in customers:
             print(f"ID: {customer[0]}, Imię i nazwisko: {customer[1]}, Email: {customer[2]}")
-    else:
-        print(result["message"])
+    if not found:
+        print("Brak klientów spełniających kryteria.")
 
 
 def purchase_book_process():
@@ -257,7 +358,9 @@ def initialize_menu():
         print("7. Kup książkę")
         print("8. Wyświetl historię zakupów klienta")
         print("9. Menu Statystyk")
-        print("10. Wyjście")
+        print("10. Utwórz kopię zapasową bazy danych")
+        print("11. Przywróć bazę danych z kopii zapasowej")
+        print("12. Wyjście")
 
         try:
             choice = int(input("Wpisz numer: "))
@@ -285,10 +388,10 @@ def initialize_menu():
                         print("\nHistoria zakupów:")
                         total_spent = 0
                         for purchase in result["data"]:
-                            item_total = purchase[3] * purchase[5]  # quantity * price
+                            item_total = purchase.LineTotal  # wartość z chwili zakupu
                             total_spent += item_total
-                            print(f"- {purchase[1]} kupił {purchase[2]}")
-                            print(f"  Ilość: {purchase[3]}, Data: {purchase[4]}, Koszt: {item_total:.2f} zł")
+                            print(f"- {purchase.Name} kupił {purchase.Title}")
+                            print(f"  Ilość: {purchase.Quantity}, Data: {purchase.PurchaseDate}, Koszt: {item_total:.2f} zł")
                         print(f"\nŁączna kwota wydana: {total_spent:.2f} zł")
                     else:
                         print(result["message"])
@@ -297,6 +400,34 @@ def initialize_menu():
                     statistics_menu()
 
                 case 10:
+                    print("\n--- Kopia zapasowa bazy danych ---")
+                    filename = input("Nazwa pliku (Enter = bookstore_<data>.db w DATABASE/backups): ").strip() or None
+                    compression = input("Kompresja (gzip/zstd, Enter = brak): ").strip().lower() or None
+                    result = backup_database(filename, compression,
+                                             progress=lambda copied, total: print(
+                                                 f"\r  Skopiowano {copied} z {total} stron", end="", flush=True))
+                    print()
+                    print(result["message"])
+                    if result["code"] == 200:
+                        data = result["data"]
+                        print(f"  {data['pages']} stron ({data['bytes'] / 2 ** 20:.1f} MB, plik "
+                              f"{data['file_bytes'] / 2 ** 20:.1f} MB) w {data['seconds']:.2f} s, "
+                              f"kopiowanie {data['pages_per_sec']:.0f} stron/s")
+
+                case 11:
+                    print("\n--- Przywracanie bazy danych z kopii zapasowej ---")
+                    filename = input("Nazwa pliku kopii w DATABASE/backups (lub pełna ścieżka): ").strip()
+                    confirm = input("Bieżące dane zostaną zastąpione zawartością kopii. Kontynuować? (tak/nie): ")
+                    if filename and confirm.strip().lower() == "tak":
+                        result = restore_database(filename,
+                                                  progress=lambda copied, total: print(
+                                                      f"\r  Przywrócono {copied} z {total} stron", end="", flush=True))
+                        print()
+                        print(result["message"])
+                    else:
+                        print("Przywracanie anulowane.")
+
+                case 12:
                     print("Dziękujemy za korzystanie z systemu!")
                     break
 
@@ -0,0 +1,239 @@
+# metrics.py
+import os
+import json
+import time
+import bisect
+import inspect
+import threading
+from functools import wraps
+
+from bookstore.cache import get_cache_stats
+
+# Górne granice przedziałów histogramu czasu wykonania (nanosekundy): 10 µs ... 10 s
+LATENCY_BUCKETS_NS = (
+    10_000, 50_000, 100_000, 250_000, 500_000,
+    1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000,
+    100_000_000, 250_000_000, 500_000_000, 1_000_000_000, 2_500_000_000, 10_000_000_000,
+)
+
+# Pomiary włączane zmienną środowiskową BOOKSTORE_METRICS=1 albo funkcją enable()
+_enabled = os.environ.get("BOOKSTORE_METRICS", "0") not in ("", "0", "false", "no")
+_lock = threading.Lock()
+_metrics = {}
+
+
+class _FunctionMetrics:
+    """Liczniki jednej funkcji: wywołania, kody odpowiedzi, zwrócone wiersze i histogram czasu."""
+
+    __slots__ = ("calls", "codes", "rows", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.codes = {}
+        self.rows = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_NS) + 1)  # ostatni przedział: +Inf
+
+
+def enable():
+    """Włącza zbieranie metryk."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Wyłącza zbieranie metryk (instrumentowane funkcje wywoływane są bezpośrednio)."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """Zwraca True, jeśli metryki są zbierane."""
+    return _enabled
+
+
+def reset():
+    """Usuwa wszystkie zebrane pomiary."""
+    with _lock:
+        _metrics.clear()
+
+
+def _count_rows(result):
+    data = result.get("data") if isinstance(result, dict) else None
+    return len(data) if isinstance(data, (list, tuple)) else 0
+
+
+def _record(name, elapsed_ns, code, rows):
+    with _lock:
+        metrics = _metrics.get(name)
+        if metrics is None:
+            metrics = _metrics[name] = _FunctionMetrics()
+        metrics.calls += 1
+        metrics.codes[code] = metrics.codes.get(code, 0) + 1
+        metrics.rows += rows
+        metrics.total_ns += elapsed_ns
+        if elapsed_ns > metrics.max_ns:
+            metrics.max_ns = elapsed_ns
+        metrics.buckets[bisect.bisect_left(LATENCY_BUCKETS_NS, elapsed_ns)] += 1
+
+
+def instrument(func):
+    """
+    Dekorator mierzący czas wykonania funkcji (perf_counter_ns), liczbę wywołań,
+    kody odpowiedzi (pole "code" zwracanego słownika) i liczbę zwróconych wierszy.
+
+    Wyjątek rejestrowany jest z kodem "exception" i przekazywany dalej. Dla generatorów
+    (np. iter_books) mierzony jest czas całej iteracji, a wierszami są zwrócone elementy;
+    iteracja przerwana przez wywołującego (close()) nie jest błędem.
+    Gdy metryki są wyłączone, kosztem jest jedno sprawdzenie flagi na wywołanie.
+    """
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            if not _enabled:
+                yield from func(*args, **kwargs)
+                return
+            rows = 0
+            code = 200
+            started = time.perf_counter_ns()
+            try:
+                for item in func(*args, **kwargs):
+                    rows += 1
+                    yield item
+            except GeneratorExit:  # Wywołujący przerwał iterację (np. pobrał tylko pierwsze partie) - to nie błąd
+                raise
+            except BaseException:
+                code = "exception"
+                raise
+            finally:
+                _record(name, time.perf_counter_ns() - started, code, rows)
+
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            _record(name, time.perf_counter_ns() - started, "exception", 0)
+            raise
+        code = result.get("code") if isinstance(result, dict) else None
+        _record(name, time.perf_counter_ns() - started, code, _count_rows(result))
+        return result
+
+    return wrapper
+
+
+def get_metrics():
+    """
+    Zwraca migawkę zebranych metryk.
+
+    Returns:
+        dict: Słownik {nazwa funkcji: dane}, gdzie dane zawierają calls, errors (kody >= 400
+              i wyjątki), codes, rows, total_seconds, mean_seconds, max_seconds oraz
+              buckets - listę par (górna granica w sekundach lub "+Inf", liczba wywołań).
+    """
+    with _lock:
+        items = [(name, m.calls, dict(m.codes), m.rows, m.total_ns, m.max_ns, list(m.buckets))
+                 for name, m in sorted(_metrics.items())]
+
+    snapshot = {}
+    for name, calls, codes, rows, total_ns, max_ns, buckets in items:
+        bounds = [bound / 1e9 for bound in LATENCY_BUCKETS_NS] + ["+Inf"]
+        snapshot[name] = {
+            "calls": calls,
+            "errors": sum(count for code, count in codes.items()
+                          if code == "exception" or (isinstance(code, int) and code >= 400)),
+            "codes": {str(code): count for code, count in codes.items()},
+            "rows": rows,
+            "total_seconds": total_ns / 1e9,
+            "mean_seconds": total_ns / calls / 1e9 if calls else 0.0,
+            "max_seconds": max_ns / 1e9,
+            "buckets": list(zip(bounds, buckets)),
+        }
+    return snapshot
+
+
+def to_prometheus():
+    """
+    Zwraca metryki w formacie tekstowym Prometheus (text exposition format 0.0.4).
+
+    Returns:
+        str: Histogram bookstore_call_duration_seconds oraz liczniki
+             bookstore_responses_total (według kodu), bookstore_rows_returned_total
+             i bookstore_cache_requests_total (trafienia i chybienia cache wyników).
+    """
+    snapshot = get_metrics()
+    lines = [
+        "# HELP bookstore_call_duration_seconds Czas wykonania funkcji.",
+        "# TYPE bookstore_call_duration_seconds histogram",
+    ]
+    for name, data in snapshot.items():
+        cumulative = 0
+        for bound, count in data["buckets"]:
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            lines.append(f'bookstore_call_duration_seconds_bucket{{function="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'bookstore_call_duration_seconds_sum{{function="{name}"}} {data["total_seconds"]:.9f}')
+        lines.append(f'bookstore_call_duration_seconds_count{{function="{name}"}} {data["calls"]}')
+
+    lines += [
+        "# HELP bookstore_responses_total Liczba odpowiedzi według kodu.",
+        "# TYPE bookstore_responses_total counter",
+    ]
+    for name, data in snapshot.items():
+        for code, count in sorted(data["codes"].items()):
+            lines.append(f'bookstore_responses_total{{function="{name}",code="{code}"}} {count}')
+
+    lines += [
+        "# HELP bookstore_rows_returned_total Liczba zwróconych wierszy.",
+        "# TYPE bookstore_rows_returned_total counter",
+    ]
+    for name, data in snapshot.items():
+        lines.append(f'bookstore_rows_returned_total{{function="{name}"}} {data["rows"]}')
+
+    lines += [
+        "# HELP bookstore_cache_requests_total Odczyty cache wyników statystyk (trafienia i chybienia).",
+        "# TYPE bookstore_cache_requests_total counter",
+    ]
+    for name, counters in get_cache_stats()["functions"].items():
+        lines.append(f'bookstore_cache_requests_total{{function="{name}",result="hit"}} {counters["hits"]}')
+        lines.append(f'bookstore_cache_requests_total{{function="{name}",result="miss"}} {counters["misses"]}')
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(filename, format="prometheus"):
+    """
+    Zapisuje metryki do pliku w formacie Prometheus (np. dla node_exporter textfile) lub JSON.
+
+    Args:
+        filename (str): Ścieżka do pliku wynikowego.
+        format (str, optional): "prometheus" lub "json".
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (nieznany format), 500 (błąd zapisu).
+            - message (str): Komunikat o wyniku operacji.
+    """
+    if format == "prometheus":
+        content = to_prometheus()
+    elif format == "json":
+        content = json.dumps(get_metrics(), ensure_ascii=False, indent=2)
+    else:
+        return {"code": 400, "message": f"Nieznany format metryk: {format}."}
+
+    try:
+        # Zapis przez plik tymczasowy, aby czytelnik nigdy nie zobaczył niepełnego pliku
+        temp_name = f"{filename}.tmp"
+        with open(temp_name, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(temp_name, filename)
+        return {"code": 200, "message": f"Metryki zapisane do {filename}."}
+    except OSError as e:
+        return {"code": 500, "message": f"Błąd zapisu metryk: {e}"}
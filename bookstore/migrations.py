@@ -0,0 +1,627 @@
+# migrations.py
+import sqlite3
+import time
+
+from bookstore.utilities import get_connection
+
+# Przeliczenie liczników tabeli Stats od zera (migracja 4, check_stats_consistency w monitor.py)
+SQL_STATS_RECOMPUTE = """
+                      SELECT 'books', COUNT(*) FROM Books
+                      UNION ALL
+                      SELECT 'books_out_of_stock', COUNT(*) FROM Books WHERE Stock = 0
+                      UNION ALL
+                      SELECT 'customers', COUNT(*) FROM Customers
+                      UNION ALL
+                      SELECT 'purchases', COUNT(*) FROM Purchases
+                      UNION ALL
+                      SELECT 'units_sold', COALESCE(SUM(Quantity), 0) FROM Purchases
+                      """
+
+MIGRATION_BATCH_SIZE = 50000  # Liczba wierszy przetwarzanych w jednej partii (backfill_in_batches)
+INDEX_BUILD_CACHE_SIZE = -262144  # cache_size (KiB) na czas budowy indeksu (~256 MB)
+INDEX_BUILD_THREADS = 4  # Wątki pomocnicze sortowania przy CREATE INDEX
+
+
+def create_index(name, table, columns, where=None):
+    """
+    Tworzy krok migracji budujący indeks w osobnej transakcji, z powiększonym cache i wielowątkowym sortowaniem.
+
+    SQLite nie potrafi budować indeksu online: CREATE INDEX czyta całą tabelę i sortuje
+    klucze, przez cały ten czas trzymając blokadę zapisu (czytelnicy w trybie WAL nie są
+    blokowani, inne zapisy czekają). Krok skraca budowę, a więc i blokadę, tylko przez
+    większy cache stron (INDEX_BUILD_CACHE_SIZE) i wątki pomocnicze sortowania
+    (INDEX_BUILD_THREADS). Czas blokady zwracany jest w raporcie - indeksy dużych tabel
+    najlepiej dodawać poza godzinami ruchu.
+
+    Args:
+        name (str): Nazwa indeksu.
+        table (str): Nazwa tabeli.
+        columns (str): Lista kolumn indeksu, np. "CustomerID, PurchaseDate".
+        where (str, optional): Warunek indeksu częściowego.
+
+    Returns:
+        callable: Krok migracji przyjmujący połączenie i zwracający słownik ze szczegółami.
+    """
+    def step(conn):
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?;",
+                              (name,)).fetchone()
+        if exists:
+            return {"lock_seconds": 0.0}
+
+        cache_size = conn.execute("PRAGMA cache_size;").fetchone()[0]
+        threads = conn.execute("PRAGMA threads;").fetchone()[0]
+        conn.execute(f"PRAGMA cache_size = {INDEX_BUILD_CACHE_SIZE};")
+        conn.execute(f"PRAGMA threads = {INDEX_BUILD_THREADS};")
+        try:
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE;")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+                         + (f" WHERE {where};" if where else ";"))
+            conn.commit()
+            lock_seconds = time.perf_counter() - started
+        finally:
+            conn.execute(f"PRAGMA cache_size = {cache_size};")
+            conn.execute(f"PRAGMA threads = {threads};")
+        return {"lock_seconds": lock_seconds}
+
+    step.description = f"CREATE INDEX {name} ON {table} ({columns})"
+    return step
+
+
+def add_column(table, column, definition):
+    """
+    Tworzy krok migracji dodający kolumnę, jeśli jeszcze nie istnieje (ALTER TABLE nie ma IF NOT EXISTS).
+
+    Args:
+        table (str): Nazwa tabeli.
+        column (str): Nazwa nowej kolumny.
+        definition (str): Typ i ograniczenia kolumny, np. "REAL".
+
+    Returns:
+        callable: Krok migracji przyjmujący połączenie i zwracający słownik ze szczegółami.
+    """
+    def step(conn):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table});")}
+        if column in columns:
+            return {"added": False}
+        conn.execute("BEGIN IMMEDIATE;")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition};")
+        conn.commit()
+        return {"added": True}
+
+    step.description = f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+    return step
+
+
+def backfill_in_batches(table, assignments, where, batch_size=MIGRATION_BATCH_SIZE):
+    """
+    Tworzy krok migracji uzupełniający kolumny partiami, z zatwierdzeniem po każdej partii.
+
+    Każda partia to osobna, krótka transakcja, więc inne procesy mogą zapisywać
+    pomiędzy partiami. Krok można bezpiecznie wznowić, o ile `where` wyklucza
+    wiersze już uzupełnione (np. "UnitPrice IS NULL").
+
+    Args:
+        table (str): Nazwa tabeli.
+        assignments (str): Wyrażenie SET, np. "UnitPrice = (SELECT Price FROM Books b WHERE b.BookID = Purchases.BookID)".
+        where (str): Warunek wybierający wiersze do uzupełnienia.
+        batch_size (int, optional): Liczba wierszy w jednej partii.
+
+    Returns:
+        callable: Krok migracji przyjmujący połączenie i zwracający słownik ze szczegółami.
+    """
+    def step(conn):
+        rows = 0
+        batches = 0
+        lock_seconds = 0.0
+        last_rowid = 0
+        while True:
+            bounds = conn.execute(f"""
+                                  SELECT MIN(rowid), MAX(rowid)
+                                  FROM (SELECT rowid
+                                        FROM {table}
+                                        WHERE rowid > ?
+                                          AND ({where})
+                                        ORDER BY rowid
+                                        LIMIT ?);
+                                  """, (last_rowid, batch_size)).fetchone()
+            if bounds[0] is None:
+                break
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE;")
+            cursor = conn.execute(f"""
+                                  UPDATE {table}
+                                  SET {assignments}
+                                  WHERE rowid BETWEEN ? AND ?
+                                    AND ({where});
+                                  """, bounds)
+            conn.commit()
+            lock_seconds = max(lock_seconds, time.perf_counter() - started)
+            rows += cursor.rowcount
+            batches += 1
+            last_rowid = bounds[1]
+        return {"rows": rows, "batches": batches, "lock_seconds": lock_seconds}
+
+    step.description = f"UPDATE {table} SET {assignments} (partiami po {batch_size})"
+    return step
+
+
+# Tabele przychodów: (tabela, wyrażenie wyznaczające początek okresu z daty zakupu)
+REVENUE_ROLLUPS = (
+    ("RevenueDaily", "date({date})"),
+    ("RevenueWeekly", "date({date}, 'weekday 0', '-6 days')"),  # okres zaczyna się w poniedziałek
+    ("RevenueMonthly", "date({date}, 'start of month')"),
+)
+
+
+def revenue_rollup_steps(row_revenue, rebuild_revenue, rebuild_join="",
+                         update_columns="BookID, Quantity, PurchaseDate"):
+    """
+    Zwraca kroki migracji tworzące wyzwalacze tabel przychodów i przeliczające je od zera.
+
+    Każdy zakup dodawany jest (INSERT ... ON CONFLICT DO UPDATE) do wiersza swojego dnia,
+    tygodnia i miesiąca; usunięcie zakupu odejmuje jego wartości, a zmiana - odejmuje
+    stare i dodaje nowe.
+
+    Args:
+        row_revenue (str): Przychód jednego zakupu, z "{row}" w miejscu NEW/OLD.
+        rebuild_revenue (str): Przychód zakupu `p` przy przeliczaniu od zera.
+        rebuild_join (str, optional): Dodatkowe złączenie potrzebne w `rebuild_revenue`.
+        update_columns (str, optional): Kolumny Purchases, których zmiana przelicza przychód.
+
+    Returns:
+        list: Zapytania SQL (DROP/CREATE TRIGGER, DELETE, INSERT ... SELECT).
+    """
+    def upserts(row, sign):
+        return "".join(f"""
+            INSERT INTO {table} (Period, Revenue, Units, Purchases)
+            VALUES ({period.format(date=f"{row}.PurchaseDate")},
+                    {sign}COALESCE({row_revenue.format(row=row)}, 0),
+                    {sign}COALESCE({row}.Quantity, 0),
+                    {sign}1)
+            ON CONFLICT (Period) DO UPDATE SET Revenue   = Revenue + excluded.Revenue,
+                                               Units     = Units + excluded.Units,
+                                               Purchases = Purchases + excluded.Purchases;"""
+                       for table, period in REVENUE_ROLLUPS)
+
+    triggers = {
+        "trg_revenue_purchases_insert": ("AFTER INSERT ON Purchases", upserts("NEW", "")),
+        "trg_revenue_purchases_delete": ("AFTER DELETE ON Purchases", upserts("OLD", "-")),
+        "trg_revenue_purchases_update": (f"AFTER UPDATE OF {update_columns} ON Purchases",
+                                         upserts("OLD", "-") + upserts("NEW", "")),
+    }
+    steps = []
+    for name, (event, body) in triggers.items():
+        steps.append(f"DROP TRIGGER IF EXISTS {name};")
+        steps.append(f"CREATE TRIGGER {name} {event} BEGIN {body}\nEND;")
+    for table, period in REVENUE_ROLLUPS:
+        steps.append(f"DELETE FROM {table};")
+        steps.append(f"""
+                     INSERT INTO {table} (Period, Revenue, Units, Purchases)
+                     SELECT {period.format(date="p.PurchaseDate")}, COALESCE(SUM({rebuild_revenue}), 0),
+                            SUM(COALESCE(p.Quantity, 0)), COUNT(*)
+                     FROM Purchases p {rebuild_join}
+                     GROUP BY 1;
+                     """)
+    return steps
+
+
+def book_sales_steps():
+    """
+    Zwraca kroki migracji tworzące tabele sprzedaży książek (BookSales, BookSalesDaily),
+    ich wyzwalacze i przeliczające je od zera.
+
+    BookSales przechowuje łączną liczbę sprzedanych egzemplarzy każdej książki (indeks na
+    UnitsSold daje ranking bez grupowania zakupów), a BookSalesDaily - sprzedaż książki
+    w danym dniu, z której liczone są rankingi z ostatnich dni.
+
+    Returns:
+        list: Zapytania SQL (CREATE TABLE/INDEX, DROP/CREATE TRIGGER, DELETE, INSERT ... SELECT).
+    """
+    def upserts(row, sign):
+        return f"""
+            INSERT INTO BookSales (BookID, UnitsSold)
+            VALUES ({row}.BookID, {sign}COALESCE({row}.Quantity, 0))
+            ON CONFLICT (BookID) DO UPDATE SET UnitsSold = UnitsSold + excluded.UnitsSold;
+            INSERT INTO BookSalesDaily (Day, BookID, Units)
+            VALUES (date({row}.PurchaseDate), {row}.BookID, {sign}COALESCE({row}.Quantity, 0))
+            ON CONFLICT (Day, BookID) DO UPDATE SET Units = Units + excluded.Units;"""
+
+    steps = [
+        """
+        CREATE TABLE IF NOT EXISTS BookSales
+        (
+            BookID    INTEGER PRIMARY KEY,
+            UnitsSold INTEGER NOT NULL DEFAULT 0
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_book_sales_units ON BookSales (UnitsSold);",
+        """
+        CREATE TABLE IF NOT EXISTS BookSalesDaily
+        (
+            Day    TEXT    NOT NULL,  -- RRRR-MM-DD
+            BookID INTEGER NOT NULL,
+            Units  INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Day, BookID)
+        ) WITHOUT ROWID;
+        """,
+    ]
+    triggers = {
+        "trg_book_sales_purchases_insert": ("AFTER INSERT ON Purchases", upserts("NEW", "")),
+        "trg_book_sales_purchases_delete": ("AFTER DELETE ON Purchases", upserts("OLD", "-")),
+        "trg_book_sales_purchases_update": ("AFTER UPDATE OF BookID, Quantity, PurchaseDate ON Purchases",
+                                            upserts("OLD", "-") + upserts("NEW", "")),
+    }
+    for name, (event, body) in triggers.items():
+        steps.append(f"DROP TRIGGER IF EXISTS {name};")
+        steps.append(f"CREATE TRIGGER {name} {event} BEGIN {body}\nEND;")
+    steps += [
+        "DELETE FROM BookSales;",
+        """
+        INSERT INTO BookSales (BookID, UnitsSold)
+        SELECT BookID, SUM(COALESCE(Quantity, 0))
+        FROM Purchases
+        GROUP BY BookID;
+        """,
+        "DELETE FROM BookSalesDaily;",
+        """
+        INSERT INTO BookSalesDaily (Day, BookID, Units)
+        SELECT date(PurchaseDate), BookID, SUM(COALESCE(Quantity, 0))
+        FROM Purchases
+        GROUP BY 1, 2;
+        """,
+    ]
+    return steps
+
+
+# Bieżący znacznik dziennika zmian (ostatni przydzielony ChangeID; export_all, export_changes)
+SQL_CHANGE_WATERMARK = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'), 0);"
+
+# Tabele śledzone w dzienniku zmian: tabela -> (klucz główny, pozostałe kolumny)
+CHANGE_LOG_TABLES = {
+    "Customers": ("CustomerID", ("Name", "Email")),
+    "Books": ("BookID", ("Title", "Author", "Genre", "Price", "Stock", "DateAdded")),
+    "Purchases": ("PurchaseID", ("CustomerID", "BookID", "Quantity", "PurchaseDate", "UnitPrice", "LineTotal")),
+}
+
+
+def change_log_steps():
+    """
+    Zwraca kroki migracji tworzące dziennik zmian (ChangeLog) i jego wyzwalacze.
+
+    Każde wstawienie, zmiana i usunięcie wiersza śledzonej tabeli dopisuje do ChangeLog
+    klucz wiersza i rodzaj operacji ('I', 'U', 'D'). ChangeID (AUTOINCREMENT, nigdy nie
+    używany ponownie) jest znacznikiem, od którego export_changes odczytuje zmiany, więc
+    eksport przyrostowy kosztuje O(zmian), a nie O(tabeli). UPDATE, który nie zmienia
+    żadnej wartości (np. ponowny import tych samych danych), nie jest zapisywany.
+    Wstawienia i usunięcia książek w trybie BulkLoad zapisuje sama operacja masowa
+    (log_book_changes), jednym zapytaniem na partię.
+
+    Returns:
+        list: Zapytania SQL (CREATE TABLE/INDEX, DROP/CREATE TRIGGER).
+    """
+    steps = [
+        """
+        CREATE TABLE IF NOT EXISTS ChangeLog
+        (
+            ChangeID  INTEGER PRIMARY KEY AUTOINCREMENT,
+            TableName TEXT NOT NULL,
+            RowKey             NOT NULL,  -- Klucz główny wiersza (typ jak w śledzonej tabeli)
+            Operation TEXT NOT NULL       -- 'I' (wstawienie), 'U' (zmiana), 'D' (usunięcie)
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_changelog_table ON ChangeLog (TableName, ChangeID);",
+    ]
+    for table, (key, columns) in CHANGE_LOG_TABLES.items():
+        changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in (key, *columns))
+        # Tryb BulkLoad używany jest tylko dla Books (add_books, remove_books, import książek)
+        bulk_load = " WHEN NOT EXISTS (SELECT 1 FROM BulkLoad WHERE TableName = 'Books')" if table == "Books" else ""
+        triggers = {
+            f"trg_changelog_{table.lower()}_insert": (
+                f"AFTER INSERT ON {table}{bulk_load}",
+                f"INSERT INTO ChangeLog (TableName, RowKey, Operation) VALUES ('{table}', NEW.{key}, 'I');"),
+            f"trg_changelog_{table.lower()}_delete": (
+                f"AFTER DELETE ON {table}{bulk_load}",
+                f"INSERT INTO ChangeLog (TableName, RowKey, Operation) VALUES ('{table}', OLD.{key}, 'D');"),
+            # Zmiana klucza to usunięcie starego wiersza i wstawienie nowego
+            f"trg_changelog_{table.lower()}_update": (
+                f"AFTER UPDATE ON {table} WHEN {changed}",
+                f"""INSERT INTO ChangeLog (TableName, RowKey, Operation)
+                SELECT '{table}', OLD.{key}, 'D' WHERE OLD.{key} IS NOT NEW.{key};
+                INSERT INTO ChangeLog (TableName, RowKey, Operation)
+                VALUES ('{table}', NEW.{key}, CASE WHEN OLD.{key} IS NEW.{key} THEN 'U' ELSE 'I' END);"""),
+        }
+        for name, (event, body) in triggers.items():
+            steps.append(f"DROP TRIGGER IF EXISTS {name};")
+            steps.append(f"CREATE TRIGGER {name} {event} BEGIN {body}\nEND;")
+    return steps
+
+
+# Uporządkowana lista migracji: (wersja, opis, kroki).
+# Krok to zapytanie SQL (wykonywane w transakcji migracji) albo funkcja przyjmująca
+# połączenie, która sama zarządza swoimi transakcjami (np. create_index).
+# Kroki muszą być idempotentne: migracja przerwana po kroku-funkcji wykonywana jest ponownie od początku.
+MIGRATIONS = [
+    (1, "Indeksy pomocnicze dla wyszukiwania i statystyk", [
+        "CREATE INDEX IF NOT EXISTS idx_books_author ON Books (Author);",
+        "CREATE INDEX IF NOT EXISTS idx_books_title ON Books (Title);",
+        "CREATE INDEX IF NOT EXISTS idx_books_genre ON Books (Genre);",
+        "CREATE INDEX IF NOT EXISTS idx_books_stock ON Books (Stock);",
+        "CREATE INDEX IF NOT EXISTS idx_books_date_added ON Books (DateAdded);",
+        "CREATE INDEX IF NOT EXISTS idx_customers_name ON Customers (Name);",
+        create_index("idx_purchases_customer_date", "Purchases", "CustomerID, PurchaseDate"),
+        create_index("idx_purchases_book", "Purchases", "BookID"),
+        create_index("idx_purchases_date", "Purchases", "PurchaseDate"),
+    ]),
+    (2, "Indeks pełnotekstowy FTS5 dla tytułów, autorów i gatunków", [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS BooksFTS USING fts5(
+            Title, Author, Genre,
+            content='Books', content_rowid='BookID',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_insert
+            AFTER INSERT ON Books
+        BEGIN
+            INSERT INTO BooksFTS (rowid, Title, Author, Genre)
+            VALUES (NEW.BookID, NEW.Title, NEW.Author, NEW.Genre);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_delete
+            AFTER DELETE ON Books
+        BEGIN
+            INSERT INTO BooksFTS (BooksFTS, rowid, Title, Author, Genre)
+            VALUES ('delete', OLD.BookID, OLD.Title, OLD.Author, OLD.Genre);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_update
+            AFTER UPDATE OF Title, Author, Genre ON Books
+        BEGIN
+            INSERT INTO BooksFTS (BooksFTS, rowid, Title, Author, Genre)
+            VALUES ('delete', OLD.BookID, OLD.Title, OLD.Author, OLD.Genre);
+            INSERT INTO BooksFTS (rowid, Title, Author, Genre)
+            VALUES (NEW.BookID, NEW.Title, NEW.Author, NEW.Genre);
+        END;
+        """,
+        "INSERT INTO BooksFTS (BooksFTS) VALUES ('rebuild');",
+    ]),
+    (3, "Tryb masowego ładowania: wyzwalacze FTS pomijane, indeks aktualizowany zbiorczo", [
+        # Wiersz w BulkLoad istnieje tylko wewnątrz transakcji masowej operacji (add_books, remove_books),
+        # więc inne połączenia nigdy go nie widzą, a pojedyncze zapisy nadal korzystają z wyzwalaczy.
+        # Operacja masowa sama aktualizuje wtedy dane pochodne (BooksFTS, a od wersji 4 także Stats).
+        "CREATE TABLE IF NOT EXISTS BulkLoad (TableName TEXT PRIMARY KEY);",
+        "DROP TRIGGER IF EXISTS trg_books_fts_insert;",
+        """
+        CREATE TRIGGER trg_books_fts_insert
+            AFTER INSERT ON Books
+            WHEN NOT EXISTS (SELECT 1 FROM BulkLoad WHERE TableName = 'Books')
+        BEGIN
+            INSERT INTO BooksFTS (rowid, Title, Author, Genre)
+            VALUES (NEW.BookID, NEW.Title, NEW.Author, NEW.Genre);
+        END;
+        """,
+        "DROP TRIGGER IF EXISTS trg_books_fts_delete;",
+        """
+        CREATE TRIGGER trg_books_fts_delete
+            AFTER DELETE ON Books
+            WHEN NOT EXISTS (SELECT 1 FROM BulkLoad WHERE TableName = 'Books')
+        BEGIN
+            INSERT INTO BooksFTS (BooksFTS, rowid, Title, Author, Genre)
+            VALUES ('delete', OLD.BookID, OLD.Title, OLD.Author, OLD.Genre);
+        END;
+        """,
+    ]),
+    (4, "Tabela Stats z licznikami utrzymywanymi przez wyzwalacze", [
+        "CREATE TABLE IF NOT EXISTS Stats (Name TEXT PRIMARY KEY, Value INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID;",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_books_insert
+            AFTER INSERT ON Books
+            WHEN NOT EXISTS (SELECT 1 FROM BulkLoad WHERE TableName = 'Books')
+        BEGIN
+            UPDATE Stats SET Value = Value + 1 WHERE Name = 'books';
+            UPDATE Stats SET Value = Value + 1 WHERE Name = 'books_out_of_stock' AND NEW.Stock IS 0;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_books_delete
+            AFTER DELETE ON Books
+            WHEN NOT EXISTS (SELECT 1 FROM BulkLoad WHERE TableName = 'Books')
+        BEGIN
+            UPDATE Stats SET Value = Value - 1 WHERE Name = 'books';
+            UPDATE Stats SET Value = Value - 1 WHERE Name = 'books_out_of_stock' AND OLD.Stock IS 0;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_books_stock
+            AFTER UPDATE OF Stock ON Books
+            WHEN (OLD.Stock IS 0) <> (NEW.Stock IS 0)
+        BEGIN
+            UPDATE Stats SET Value = Value + (NEW.Stock IS 0) - (OLD.Stock IS 0) WHERE Name = 'books_out_of_stock';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_customers_insert
+            AFTER INSERT ON Customers
+        BEGIN
+            UPDATE Stats SET Value = Value + 1 WHERE Name = 'customers';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_customers_delete
+            AFTER DELETE ON Customers
+        BEGIN
+            UPDATE Stats SET Value = Value - 1 WHERE Name = 'customers';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_purchases_insert
+            AFTER INSERT ON Purchases
+        BEGIN
+            UPDATE Stats
+            SET Value = Value + CASE Name WHEN 'purchases' THEN 1 ELSE COALESCE(NEW.Quantity, 0) END
+            WHERE Name IN ('purchases', 'units_sold');
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_purchases_delete
+            AFTER DELETE ON Purchases
+        BEGIN
+            UPDATE Stats
+            SET Value = Value - CASE Name WHEN 'purchases' THEN 1 ELSE COALESCE(OLD.Quantity, 0) END
+            WHERE Name IN ('purchases', 'units_sold');
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_purchases_quantity
+            AFTER UPDATE OF Quantity ON Purchases
+        BEGIN
+            UPDATE Stats
+            SET Value = Value + COALESCE(NEW.Quantity, 0) - COALESCE(OLD.Quantity, 0)
+            WHERE Name = 'units_sold';
+        END;
+        """,
+        # Początkowe wartości liczone w tej samej transakcji co utworzenie wyzwalaczy
+        "INSERT OR REPLACE INTO Stats (Name, Value) " + SQL_STATS_RECOMPUTE + ";",
+    ]),
+    (5, "Dzienne, tygodniowe i miesięczne tabele przychodów", [
+        *(f"""
+          CREATE TABLE IF NOT EXISTS {table}
+          (
+              Period    TEXT PRIMARY KEY,  -- Początek okresu (RRRR-MM-DD)
+              Revenue   REAL    NOT NULL DEFAULT 0,
+              Units     INTEGER NOT NULL DEFAULT 0,
+              Purchases INTEGER NOT NULL DEFAULT 0
+          ) WITHOUT ROWID;
+          """ for table, _ in REVENUE_ROLLUPS),
+        # Przychód według ceny książki w chwili zapisu zakupu
+        *revenue_rollup_steps("{row}.Quantity * COALESCE((SELECT Price FROM Books WHERE BookID = {row}.BookID), 0)",
+                              "p.Quantity * COALESCE(b.Price, 0)",
+                              "LEFT JOIN Books b ON b.BookID = p.BookID"),
+    ]),
+    (6, "Cena jednostkowa i wartość pozycji w Purchases, indeksy pokrywające", [
+        add_column("Purchases", "UnitPrice", "REAL"),
+        add_column("Purchases", "LineTotal", "REAL"),
+        # Dotychczasowe zakupy otrzymują bieżącą cenę książki (historyczna cena nie była zapisywana)
+        backfill_in_batches(
+            "Purchases",
+            "UnitPrice = COALESCE((SELECT Price FROM Books b WHERE b.BookID = Purchases.BookID), 0), "
+            "LineTotal = COALESCE(Quantity, 0) * COALESCE((SELECT Price FROM Books b WHERE b.BookID = Purchases.BookID), 0)",
+            "UnitPrice IS NULL"),
+        # Zakresy dat (przychody, historia) i historia klienta bez odczytu wierszy tabeli
+        create_index("idx_purchases_date_total", "Purchases", "PurchaseDate, LineTotal, Quantity"),
+        create_index("idx_purchases_customer_cover", "Purchases",
+                            "CustomerID, PurchaseDate, BookID, Quantity, UnitPrice, LineTotal"),
+        "DROP INDEX IF EXISTS idx_purchases_date;",
+        "DROP INDEX IF EXISTS idx_purchases_customer_date;",
+        # Przychód z zapisanej wartości pozycji zamiast ceny książki
+        *revenue_rollup_steps("{row}.LineTotal", "p.LineTotal",
+                              update_columns="Quantity, PurchaseDate, LineTotal"),
+    ]),
+    (7, "Sprzedaż książek (łączna i dzienna) dla rankingów bestsellerów", book_sales_steps()),
+    (8, "Indeks (Title, Author) dla dopasowania książek przy imporcie", [
+        # Tytuły często się powtarzają, więc sam indeks Title nie zawęża wyszukiwania książki;
+        # nowy indeks obsługuje też zapytania po samym tytule
+        create_index("idx_books_title_author", "Books", "Title, Author"),
+        "DROP INDEX IF EXISTS idx_books_title;",
+    ]),
+    (9, "Dziennik zmian (ChangeLog) dla eksportu przyrostowego", change_log_steps()),
+]
+
+
+def get_schema_version(conn=None):
+    """
+    Zwraca bieżącą wersję schematu bazy danych (PRAGMA user_version).
+
+    Args:
+        conn (sqlite3.Connection, optional): Połączenie z bazą. Domyślnie pobierane z puli.
+
+    Returns:
+        int: Numer ostatniej zastosowanej migracji.
+    """
+    if conn is None:
+        with get_connection() as conn:
+            return get_schema_version(conn)
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def _describe_step(step):
+    if isinstance(step, str):
+        return " ".join(step.split())
+    return getattr(step, "description", getattr(step, "__name__", repr(step)))
+
+
+def migrate(target_version=None):
+    """
+    Stosuje oczekujące migracje z listy MIGRATIONS w kolejności wersji.
+
+    Kolejne zapytania SQL migracji wykonywane są w jednej transakcji, a nowa wersja
+    zapisywana jest w PRAGMA user_version w transakcji ostatnich zapytań, po wykonaniu
+    wszystkich kroków. Kroki-funkcje (create_index, add_column, backfill_in_batches)
+    zatwierdzają wcześniejsze zapytania i same zarządzają swoimi transakcjami, więc
+    migracja z takim krokiem nie jest atomowa: przerwana w połowie zostawia część
+    kroków zastosowaną przy starej wersji i przy kolejnym uruchomieniu wykonywana jest
+    od początku - dlatego wszystkie kroki muszą być idempotentne. Czas każdego kroku
+    jest mierzony i zwracany w raporcie.
+
+    Args:
+        target_version (int, optional): Wersja, do której migrować. Domyślnie najnowsza.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 500 (błąd bazy - migracja przerwana).
+            - message (str): Komunikat o wyniku operacji.
+            - data (list): Raport kroków - słowniki (version, description, step, seconds, ...).
+    """
+    report = []
+    version = None
+    try:
+        with get_connection() as conn:
+            current = get_schema_version(conn)
+            for version, description, steps in MIGRATIONS:
+                if version <= current or (target_version is not None and version > target_version):
+                    continue
+
+                for step in steps:
+                    started = time.perf_counter()
+                    details = {}
+                    if isinstance(step, str):
+                        if not conn.in_transaction:
+                            conn.execute("BEGIN IMMEDIATE;")
+                        conn.execute(step)
+                    else:
+                        if conn.in_transaction:
+                            conn.commit()
+                        details = step(conn) or {}
+                    report.append({
+                        "version": version,
+                        "description": description,
+                        "step": _describe_step(step),
+                        "seconds": time.perf_counter() - started,
+                        **details
+                    })
+
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE;")
+                conn.execute(f"PRAGMA user_version = {version};")
+                conn.commit()
+                current = version
+
+            if report:
+                # Aktualizacja statystyk planera po zmianach schematu
+                conn.execute("PRAGMA optimize;")
+            return {
+                "code": 200,
+                "message": f"Schemat bazy danych w wersji {current}.",
+                "data": report
+            }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas migracji do wersji {version}: {e}",
+            "data": report
+        }
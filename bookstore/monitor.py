@@ -1,323 +1,811 @@
 # monitor.py
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
-from bookstore.utilities import DB_PATH  # Import DB_PATH
+from bookstore.utilities import get_connection, explain_query_plan, build_fts_query
+from bookstore.metrics import instrument
+from bookstore.cache import cached, invalidates
+from bookstore.migrations import SQL_STATS_RECOMPUTE, REVENUE_ROLLUPS
 
+# Zapytania wykorzystywane przez funkcje statystyk (sprawdzane przez get_query_plan_report)
+# Liczniki utrzymywane przez wyzwalacze w tabeli Stats (odczyt O(1) zamiast COUNT(*))
+SQL_STAT_VALUE = "SELECT Value FROM Stats WHERE Name = ?;"
+SQL_STATS = "SELECT Name, Value FROM Stats;"
+SQL_BOOKS_BY_AUTHOR = "SELECT * FROM Books WHERE Author = ?;"
+# Ranking z tabeli BookSales odczytywany w kolejności indeksu (top-K bez grupowania zakupów)
+SQL_POPULAR_BOOKS = """
+                    SELECT b.Title, b.Author, s.UnitsSold as TotalQuantitySold
+                    FROM BookSales s
+                             JOIN Books b ON s.BookID = b.BookID
+                    WHERE s.UnitsSold > 0
+                    ORDER BY s.UnitsSold DESC
+                    LIMIT ?;
+                    """
+# Ranking z ostatnich dni sumowany z dziennej sprzedaży (czas zależy od długości okna, nie od historii)
+SQL_POPULAR_BOOKS_WINDOW = """
+                           SELECT b.Title, b.Author, SUM(d.Units) as TotalQuantitySold
+                           FROM BookSalesDaily d
+                                    JOIN Books b ON d.BookID = b.BookID
+                           WHERE d.Day >= ?
+                             AND d.Day <= ?
+                           GROUP BY d.BookID
+                           HAVING TotalQuantitySold > 0
+                           ORDER BY TotalQuantitySold DESC
+                           LIMIT ?;
+                           """
+SQL_RECENT_BOOKS = "SELECT BookID, Title, Author, DateAdded FROM Books ORDER BY DateAdded DESC LIMIT ?;"
+SQL_BOOKS_BY_GENRE = """
+                     SELECT b.BookID, b.Title, b.Author, b.Genre, b.Price, b.Stock, b.DateAdded
+                     FROM BooksFTS
+                              JOIN Books b ON b.BookID = BooksFTS.rowid
+                     WHERE BooksFTS MATCH ?
+                     ORDER BY b.BookID;
+                     """
+# Przychody odczytywane wyłącznie z tabel RevenueDaily/Weekly/Monthly (okres = data początku, RRRR-MM-DD)
+REVENUE_GRANULARITIES = dict(zip(("day", "week", "month"), REVENUE_ROLLUPS))
+REVENUE_MIN_PERIOD = "0000-01-01"
+REVENUE_MAX_PERIOD = "9999-12-31"
+SQL_REVENUE_TOTAL = "SELECT COALESCE(SUM(Revenue), 0) FROM {table} WHERE Period >= ? AND Period < ?;"
+SQL_REVENUE_PERIODS = """
+                      SELECT Period, Revenue, Units, Purchases
+                      FROM {table}
+                      WHERE Period >= ?
+                        AND Period < ?
+                      ORDER BY Period;
+                      """
+# Niepełne okresy na krańcach zakresu składane z dni
+SQL_REVENUE_DAILY_BUCKETS = """
+                            SELECT {bucket} AS Bucket, SUM(Revenue), SUM(Units), SUM(Purchases)
+                            FROM RevenueDaily
+                            WHERE Period >= ?
+                              AND Period < ?
+                            GROUP BY Bucket
+                            ORDER BY Bucket;
+                            """
+# Oba przychody z get_revenue_statistics w jednym zapytaniu (migawka dashboardu), z tymi samymi
+# zakresami Period co SQL_REVENUE_TOTAL - RevenueMonthly rośnie z każdym miesiącem, więc nie jest skanowana
+SQL_REVENUE_SUMMARY = """
+                      SELECT (SELECT COALESCE(SUM(Revenue), 0) FROM RevenueMonthly WHERE Period >= ? AND Period < ?),
+                             (SELECT COALESCE(SUM(Revenue), 0) FROM RevenueDaily WHERE Period >= ? AND Period < ?);
+                      """
+SQL_LOW_STOCK_BOOKS = "SELECT BookID, Title, Author, Stock FROM Books WHERE Stock > 0 AND Stock <= ? ORDER BY Stock ASC;"
+# Historia zakupów: przedział [od, do) na samej kolumnie PurchaseDate (indeks idx_purchases_date_total),
+# od najnowszych; remis dat rozstrzyga PurchaseID, dzięki czemu (PurchaseDate, PurchaseID) jest kursorem strony
+PURCHASE_HISTORY_RECENT_LIMIT = 100
+SQL_PURCHASE_HISTORY_RANGE = """
+                             SELECT p.PurchaseID,
+                                    c.Name,
+                                    b.Title,
+                                    p.Quantity,
+                                    p.PurchaseDate,
+                                    p.LineTotal as TotalPrice
+                             FROM Purchases p
+                                      JOIN Customers c ON p.CustomerID = c.CustomerID
+                                      JOIN Books b ON p.BookID = b.BookID
+                             WHERE p.PurchaseDate >= ?
+                               AND p.PurchaseDate < ?
+                             ORDER BY p.PurchaseDate DESC, p.PurchaseID DESC
+                             LIMIT ?
+                             """
+# Kolejna strona: górną granicą zakresu indeksu jest data kursora
+SQL_PURCHASE_HISTORY_AFTER = """
+                             SELECT p.PurchaseID,
+                                    c.Name,
+                                    b.Title,
+                                    p.Quantity,
+                                    p.PurchaseDate,
+                                    p.LineTotal as TotalPrice
+                             FROM Purchases p
+                                      JOIN Customers c ON p.CustomerID = c.CustomerID
+                                      JOIN Books b ON p.BookID = b.BookID
+                             WHERE p.PurchaseDate >= ?
+                               AND p.PurchaseDate <= ?
+                               AND (p.PurchaseDate < ? OR p.PurchaseID < ?)
+                             ORDER BY p.PurchaseDate DESC, p.PurchaseID DESC
+                             LIMIT ?
+                             """
 
+# (funkcja, zapytanie, przykładowe parametry) dla raportu planów zapytań
+MONITOR_QUERIES = [
+    ("get_total_books", SQL_STAT_VALUE, ("books",)),
+    ("get_books_by_author", SQL_BOOKS_BY_AUTHOR, ("",)),
+    ("get_ebooks_unavailable", SQL_STAT_VALUE, ("books_out_of_stock",)),
+    ("get_total_customers", SQL_STAT_VALUE, ("customers",)),
+    ("get_total_purchases", SQL_STAT_VALUE, ("purchases",)),
+    ("get_units_sold", SQL_STAT_VALUE, ("units_sold",)),
+    ("get_popular_books", SQL_POPULAR_BOOKS, (5,)),
+    ("get_popular_books", SQL_POPULAR_BOOKS_WINDOW, ("", "", 5)),
+    ("get_recent_books", SQL_RECENT_BOOKS, (5,)),
+    ("get_books_by_genre", SQL_BOOKS_BY_GENRE, ("{Genre} : x",)),
+    ("get_revenue_statistics", SQL_REVENUE_TOTAL.format(table="RevenueMonthly"), ("", "")),
+    ("get_revenue_statistics", SQL_REVENUE_TOTAL.format(table="RevenueDaily"), ("", "")),
+    ("get_revenue", SQL_REVENUE_PERIODS.format(table="RevenueMonthly"), ("", "")),
+    ("get_revenue", SQL_REVENUE_DAILY_BUCKETS.format(bucket="date(Period, 'start of month')"), ("", "")),
+    ("get_low_stock_books", SQL_LOW_STOCK_BOOKS, (10,)),
+    ("get_dashboard_snapshot", SQL_STATS, ()),
+    ("get_dashboard_snapshot", SQL_REVENUE_SUMMARY, ("", "", "", "")),
+    ("get_purchase_history", SQL_PURCHASE_HISTORY_RANGE, ("", "", 100)),
+    ("get_purchase_history", SQL_PURCHASE_HISTORY_AFTER, ("", "", "", 0, 100)),
+]
+
+
+@instrument
+@cached(("Books",))
 def get_total_books():
     """Zwraca całkowitą liczbę książek w bazie danych."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM Books")
-        return {
-            "code": 200,
-            "message": "OK",
-            "data": cursor.fetchone()[0]
-        }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_STAT_VALUE, ("books",))
+            return {
+                "code": 200,
+                "message": "OK",
+                "data": cursor.fetchone()[0]
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania całkowitej liczby książek: {e}",
             "data": 0
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@cached(("Books",))
 def get_books_by_author(author):
     """Zwraca wszystkie książki danego autora."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Books WHERE Author = ?", (author,))
-        books = cursor.fetchall()
-        return {
-            "code": 200 if books else 404,
-            "message": "OK" if books else "Brak książek tego autora.",
-            "data": books
-        }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_BOOKS_BY_AUTHOR, (author,))
+            books = cursor.fetchall()
+            return {
+                "code": 200 if books else 404,
+                "message": "OK" if books else "Brak książek tego autora.",
+                "data": books
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania książek według autora: {e}",
             "data": []
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@cached(("Books",))
 def get_ebooks_unavailable():
     """Zwraca liczbę książek, które są niedostępne (stock = 0)."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM Books WHERE Stock = 0")
-        return {
-            "code": 200,
-            "message": "OK",
-            "data": cursor.fetchone()[0]
-        }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_STAT_VALUE, ("books_out_of_stock",))
+            return {
+                "code": 200,
+                "message": "OK",
+                "data": cursor.fetchone()[0]
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania niedostępnych książek: {e}",
             "data": 0
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@cached(("Customers",))
 def get_total_customers():
     """Zwraca całkowitą liczbę klientów."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM Customers")
-        return {
-            "code": 200,
-            "message": "OK",
-            "data": cursor.fetchone()[0]
-        }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_STAT_VALUE, ("customers",))
+            return {
+                "code": 200,
+                "message": "OK",
+                "data": cursor.fetchone()[0]
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania całkowitej liczby klientów: {e}",
             "data": 0
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@cached(("Purchases",))
 def get_total_purchases():
     """Zwraca całkowitą liczbę zakupów."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM Purchases")
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_STAT_VALUE, ("purchases",))
+            return {
+                "code": 200,
+                "message": "OK",
+                "data": cursor.fetchone()[0]
+            }
+    except sqlite3.Error as e:
         return {
-            "code": 200,
-            "message": "OK",
-            "data": cursor.fetchone()[0]
+            "code": 500,
+            "message": f"Błąd bazy danych podczas pobierania całkowitej liczby zakupów: {e}",
+            "data": 0
         }
+
+
+@instrument
+@cached(("Purchases",))
+def get_units_sold():
+    """Zwraca łączną liczbę sprzedanych egzemplarzy."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_STAT_VALUE, ("units_sold",))
+            return {
+                "code": 200,
+                "message": "OK",
+                "data": cursor.fetchone()[0]
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
-            "message": f"Błąd bazy danych podczas pobierania całkowitej liczby zakupów: {e}",
+            "message": f"Błąd bazy danych podczas pobierania liczby sprzedanych egzemplarzy: {e}",
             "data": 0
         }
-    finally:
-        if conn:
-            conn.close()
 
 
-def get_popular_books(limit=5):
-    """Zwraca najpopularniejsze książki na podstawie liczby zakupów."""
-    conn = None
+@instrument
+@cached(("Books", "Purchases"))
+def get_popular_books(limit=5, days=None, end_date=None):
+    """
+    Zwraca najpopularniejsze książki według liczby sprzedanych egzemplarzy.
+
+    Ranking całej historii odczytywany jest z indeksu tabeli BookSales, a ranking
+    z ostatnich `days` dni sumowany z tabeli BookSalesDaily.
+
+    Args:
+        limit (int, optional): Liczba książek w rankingu.
+        days (int, optional): Długość okna w dniach (np. 7 lub 30), łącznie z `end_date`.
+                              Domyślnie cała historia sprzedaży.
+        end_date (str, optional): Ostatni dzień okna (RRRR-MM-DD). Domyślnie dzisiaj.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (błędne parametry), 404 (brak sprzedaży), 500 (błąd bazy).
+            - message (str): Komunikat o wyniku operacji.
+            - data (list): Lista krotek (Title, Author, TotalQuantitySold).
+    """
+    if days is not None and (not isinstance(days, int) or days < 1):
+        return {
+            "code": 400,
+            "message": "Liczba dni musi być dodatnią liczbą całkowitą.",
+            "data": []
+        }
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-                       SELECT b.Title, b.Author, SUM(p.Quantity) as TotalQuantitySold
-                       FROM Purchases p
-                                JOIN Books b ON p.BookID = b.BookID
-                       GROUP BY b.BookID
-                       ORDER BY TotalQuantitySold DESC
-                       LIMIT ?;
-                       """, (limit,))
-        books = cursor.fetchall()
+        end = _parse_day(end_date) if end_date else datetime.now().date()
+    except ValueError:
         return {
-            "code": 200 if books else 404,
-            "message": "OK" if books else "Brak danych o popularnych książkach.",
-            "data": books
+            "code": 400,
+            "message": "Nieprawidłowy format daty. Użyj RRRR-MM-DD.",
+            "data": []
         }
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            if days is None:
+                cursor.execute(SQL_POPULAR_BOOKS, (limit,))
+            else:
+                start = end - timedelta(days=days - 1)
+                cursor.execute(SQL_POPULAR_BOOKS_WINDOW, (start.isoformat(), end.isoformat(), limit))
+            books = cursor.fetchall()
+            return {
+                "code": 200 if books else 404,
+                "message": "OK" if books else "Brak danych o popularnych książkach.",
+                "data": books
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania popularnych książek: {e}",
             "data": []
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@cached(("Books",))
 def get_recent_books(limit=5):
     """Zwraca ostatnio dodane książki."""
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT BookID, Title, Author, DateAdded FROM Books ORDER BY DateAdded DESC LIMIT ?;", (limit,))
-        books = cursor.fetchall()
-        return {
-            "code": 200 if books else 404,
-            "message": "OK" if books else "Brak danych o najnowszych książkach.",
-            "data": books
-        }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_RECENT_BOOKS, (limit,))
+            books = cursor.fetchall()
+            return {
+                "code": 200 if books else 404,
+                "message": "OK" if books else "Brak danych o najnowszych książkach.",
+                "data": books
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania najnowszych książek: {e}",
             "data": []
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@cached(("Books",))
 def get_books_by_genre(genre):
-    """Zwraca wszystkie książki danego gatunku."""
-    conn = None
+    """
+    Zwraca wszystkie książki danego gatunku.
+
+    Słowa gatunku dopasowywane są prefiksowo w indeksie pełnotekstowym ("fant" znajdzie
+    "Fantastyka", fragment ze środka słowa - nie).
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Books WHERE Genre LIKE ?;", (f"%{genre}%",))
-        books = cursor.fetchall()
-        return {
-            "code": 200 if books else 404,
-            "message": "OK" if books else f"Brak książek w gatunku '{genre}'.",
-            "data": books
-        }
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            match = build_fts_query(genre, columns=("Genre",))
+            if match:
+                cursor.execute(SQL_BOOKS_BY_GENRE, (match,))
+            else:
+                cursor.execute("SELECT * FROM Books WHERE Genre LIKE ?;", (f"%{genre}%",))
+            books = cursor.fetchall()
+            return {
+                "code": 200 if books else 404,
+                "message": "OK" if books else f"Brak książek w gatunku '{genre}'.",
+                "data": books
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania książek według gatunku: {e}",
             "data": []
         }
-    finally:
-        if conn:
-            conn.close()
 
 
+@instrument
+@cached(("Purchases",))
 def get_revenue_statistics():
-    """Zwraca statystyki przychodów (całkowity przychód, przychód z ostatnich 30 dni)."""
-    conn = None
+    """
+    Zwraca statystyki przychodów (całkowity przychód, przychód z ostatnich 30 dni).
+
+    Wartości odczytywane są z tabel przychodów (RevenueMonthly i RevenueDaily), więc czas
+    nie zależy od liczby zakupów. Ostatnie 30 dni liczone są pełnymi dniami.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Całkowity przychód
-        cursor.execute("""
-                       SELECT SUM(p.Quantity * b.Price)
-                       FROM Purchases p
-                                JOIN Books b ON p.BookID = b.BookID;
-                       """)
-        total_revenue = cursor.fetchone()[0] or 0.0
-
-        # Przychód z ostatnich 30 dni
-        thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S')
-        cursor.execute("""
-                       SELECT SUM(p.Quantity * b.Price)
-                       FROM Purchases p
-                                JOIN Books b ON p.BookID = b.BookID
-                       WHERE p.PurchaseDate >= ?;
-                       """, (thirty_days_ago,))
-        monthly_revenue = cursor.fetchone()[0] or 0.0
+        with get_connection() as conn:
+            cursor = conn.cursor()
 
-        return {
-            "code": 200,
-            "message": "OK",
-            "data": {
-                "total_revenue": total_revenue,
-                "monthly_revenue": monthly_revenue
+            # Całkowity przychód - suma miesięcy
+            cursor.execute(SQL_REVENUE_TOTAL.format(table="RevenueMonthly"), (REVENUE_MIN_PERIOD, REVENUE_MAX_PERIOD))
+            total_revenue = cursor.fetchone()[0]
+
+            # Przychód z ostatnich 30 dni - suma dni
+            thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            cursor.execute(SQL_REVENUE_TOTAL.format(table="RevenueDaily"), (thirty_days_ago, REVENUE_MAX_PERIOD))
+            monthly_revenue = cursor.fetchone()[0]
+
+            return {
+                "code": 200,
+                "message": "OK",
+                "data": {
+                    "total_revenue": total_revenue,
+                    "monthly_revenue": monthly_revenue
+                }
             }
-        }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania statystyk przychodów: {e}",
             "data": {"total_revenue": 0.0, "monthly_revenue": 0.0}
         }
-    finally:
-        if conn:
-            conn.close()
 
 
-def get_low_stock_books(threshold=10):
-    """Zwraca książki z niskim stanem magazynowym (poniżej progu)."""
-    conn = None
+def _period_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start, granularity):
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _parse_day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+@instrument
+@cached(("Purchases",))
+def get_revenue(start_date=None, end_date=None, granularity="day"):
+    """
+    Zwraca przychód w zakresie dat z podziałem na dni, tygodnie (od poniedziałku) lub miesiące.
+
+    Odczytywane są wyłącznie tabele przychodów: pełne okresy z tabeli danej granulacji,
+    a niepełne okresy na krańcach zakresu z RevenueDaily, więc wynik jest dokładny
+    dla dowolnego zakresu, a czas zależy tylko od liczby okresów.
+
+    Args:
+        start_date (str, optional): Data początkowa (RRRR-MM-DD, włącznie). Domyślnie pierwszy dzień sprzedaży.
+        end_date (str, optional): Data końcowa (RRRR-MM-DD, włącznie). Domyślnie dzisiaj.
+        granularity (str, optional): "day", "week" lub "month".
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (błędne parametry), 500 (błąd bazy).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict): granularity, start_date, end_date, total (revenue, units, purchases)
+                           oraz periods - lista krotek (okres, przychód, egzemplarze, zakupy).
+    """
+    if granularity not in REVENUE_GRANULARITIES:
+        return {
+            "code": 400,
+            "message": f"Nieznana granulacja: {granularity}. Dostępne: {', '.join(REVENUE_GRANULARITIES)}.",
+            "data": {}
+        }
+    table, bucket = REVENUE_GRANULARITIES[granularity]
+
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT BookID, Title, Author, Stock FROM Books WHERE Stock > 0 AND Stock <= ? ORDER BY Stock ASC;",
-            (threshold,))
-        books = cursor.fetchall()
+        end = _parse_day(end_date) if end_date else datetime.now().date()
+        start = _parse_day(start_date) if start_date else None
+    except ValueError:
         return {
-            "code": 200 if books else 404,
-            "message": "OK" if books else "Brak książek z niskim stanem magazynowym.",
-            "data": books
+            "code": 400,
+            "message": "Nieprawidłowy format daty. Użyj RRRR-MM-DD.",
+            "data": {}
         }
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            if start is None:
+                first = cursor.execute("SELECT MIN(Period) FROM RevenueDaily WHERE Purchases > 0;").fetchone()[0]
+                start = _parse_day(first) if first else end
+
+            after_end = end + timedelta(days=1)
+            # Pełne okresy: [full_from, full_to), niepełne krańce: [start, full_from) i [full_to, after_end)
+            full_from = start if _period_start(start, granularity) == start \
+                else _next_period(_period_start(start, granularity), granularity)
+            full_to = _period_start(after_end, granularity)
+            if full_from >= full_to:
+                full_from = full_to = after_end
+
+            rows = []
+            if full_from < full_to:
+                cursor.execute(SQL_REVENUE_PERIODS.format(table=table), (full_from.isoformat(), full_to.isoformat()))
+                rows += cursor.fetchall()
+            for edge_from, edge_to in ((start, min(full_from, after_end)), (max(full_to, start), after_end)):
+                if edge_from < edge_to:
+                    cursor.execute(SQL_REVENUE_DAILY_BUCKETS.format(bucket=bucket.format(date="Period")),
+                                   (edge_from.isoformat(), edge_to.isoformat()))
+                    rows += cursor.fetchall()
+
+            periods = sorted((period, round(revenue, 2), units, purchases)
+                             for period, revenue, units, purchases in rows if purchases)
+            return {
+                "code": 200,
+                "message": "OK" if periods else "Brak sprzedaży w podanym okresie.",
+                "data": {
+                    "granularity": granularity,
+                    "start_date": start.isoformat(),
+                    "end_date": end.isoformat(),
+                    "total": {
+                        "revenue": round(sum(row[1] for row in periods), 2),
+                        "units": sum(row[2] for row in periods),
+                        "purchases": sum(row[3] for row in periods)
+                    },
+                    "periods": periods
+                }
+            }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas pobierania przychodów: {e}",
+            "data": {}
+        }
+
+
+@instrument
+@cached(("Books",))
+def get_low_stock_books(threshold=10):
+    """Zwraca książki z niskim stanem magazynowym (poniżej progu)."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_LOW_STOCK_BOOKS, (threshold,))
+            books = cursor.fetchall()
+            return {
+                "code": 200 if books else 404,
+                "message": "OK" if books else "Brak książek z niskim stanem magazynowym.",
+                "data": books
+            }
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania książek z niskim stanem magazynowym: {e}",
             "data": []
         }
-    finally:
-        if conn:
-            conn.close()
 
 
-def get_purchase_history(start_date=None, end_date=None):
-    """Zwraca historię zakupów, opcjonalnie z filtrem daty."""
-    conn = None
+def _purchase_history_bounds(start_date, end_date):
+    # Daty włącznie zamieniane na przedział [start, before) porównywany z surową kolumną PurchaseDate
+    start = _parse_day(start_date).isoformat() if start_date else REVENUE_MIN_PERIOD
+    before = (_parse_day(end_date) + timedelta(days=1)).isoformat() if end_date else REVENUE_MAX_PERIOD
+    return start, before
+
+
+def _fetch_purchase_history(conn, start, before, after, limit):
+    if after is None:
+        return conn.execute(SQL_PURCHASE_HISTORY_RANGE, (start, before, limit)).fetchall()
+    after_date, after_id = after
+    return conn.execute(SQL_PURCHASE_HISTORY_AFTER, (start, after_date, after_date, after_id, limit)).fetchall()
+
+
+@instrument
+@cached(("Customers", "Books", "Purchases"))
+def get_purchase_history(start_date=None, end_date=None, page_size=None, after=None):
+    """
+    Zwraca historię zakupów od najnowszych, opcjonalnie z filtrem daty.
+
+    Bez filtra dat i `page_size` zwracanych jest PURCHASE_HISTORY_RECENT_LIMIT ostatnich
+    zakupów. Zakres dat można pobierać stronami (paginacja po kluczu): należy podać
+    `page_size`, a kolejną stronę pobrać przekazując `next_cursor` z poprzedniej
+    odpowiedzi jako `after`.
+
+    Args:
+        start_date (str, optional): Data początkowa (RRRR-MM-DD, włącznie).
+        end_date (str, optional): Data końcowa (RRRR-MM-DD, włącznie).
+        page_size (int, optional): Rozmiar strony. Domyślnie None - cały zakres naraz.
+        after (tuple, optional): Kursor strony (PurchaseDate, PurchaseID) - zwraca starsze zakupy.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 400 (błędna data), 404 (brak danych), 500 (błąd bazy).
+            - message (str): Komunikat o wyniku operacji.
+            - data (list): Lista krotek (PurchaseID, CustomerName, BookTitle, Quantity, PurchaseDate, TotalPrice).
+            - next_cursor (tuple | None, tylko przy `page_size`): `after` następnej strony lub None dla ostatniej.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        if start_date and end_date:
-            cursor.execute("""
-                           SELECT p.PurchaseID,
-                                  c.Name,
-                                  b.Title,
-                                  p.Quantity,
-                                  p.PurchaseDate,
-                                  (p.Quantity * b.Price) as TotalPrice
-                           FROM Purchases p
-                                    JOIN Customers c ON p.CustomerID = c.CustomerID
-                                    JOIN Books b ON p.BookID = b.BookID
-                           WHERE DATE(p.PurchaseDate) BETWEEN ? AND ?
-                           ORDER BY p.PurchaseDate DESC
-                           """, (start_date, end_date))
-        else:
-            cursor.execute("""
-                           SELECT p.PurchaseID,
-                                  c.Name,
-                                  b.Title,
-                                  p.Quantity,
-                                  p.PurchaseDate,
-                                  (p.Quantity * b.Price) as TotalPrice
-                           FROM Purchases p
-                                    JOIN Customers c ON p.CustomerID = c.CustomerID
-                                    JOIN Books b ON p.BookID = b.BookID
-                           ORDER BY p.PurchaseDate DESC
-                           LIMIT 100
-                           """)
-
-        purchases = cursor.fetchall()
+        start, before = _purchase_history_bounds(start_date, end_date)
+    except ValueError:
         return {
-            "code": 200 if purchases else 404,
-            "message": "OK" if purchases else "Brak historii zakupów.",
-            "data": purchases
+            "code": 400,
+            "message": "Nieprawidłowy format daty. Użyj RRRR-MM-DD.",
+            "data": []
         }
+
+    if page_size:
+        limit = page_size
+    elif start_date or end_date:
+        limit = -1
+    else:
+        limit = PURCHASE_HISTORY_RECENT_LIMIT
+
+    try:
+        with get_connection() as conn:
+            purchases = _fetch_purchase_history(conn, start, before, after, limit)
+            result = {
+                "code": 200 if purchases else 404,
+                "message": "OK" if purchases else "Brak historii zakupów.",
+                "data": purchases
+            }
+            if page_size:
+                last = purchases[-1] if len(purchases) == page_size else None
+                result["next_cursor"] = (last[4], last[0]) if last else None
+            return result
     except sqlite3.Error as e:
         return {
             "code": 500,
             "message": f"Błąd bazy danych podczas pobierania historii zakupów: {e}",
             "data": []
         }
-    finally:
-        if conn:
-            conn.close()
+
+
+@instrument
+def iter_purchase_history(start_date=None, end_date=None, batch_size=1000):
+    """
+    Generator zwracający historię zakupów z zakresu dat partiami o stałym rozmiarze.
+
+    Każda partia pobierana jest osobnym zapytaniem z paginacją po kluczu
+    (PurchaseDate, PurchaseID), więc zużycie pamięci nie zależy od długości zakresu.
+
+    Args:
+        start_date (str, optional): Data początkowa (RRRR-MM-DD, włącznie).
+        end_date (str, optional): Data końcowa (RRRR-MM-DD, włącznie).
+        batch_size (int, optional): Liczba zakupów w partii (domyślnie 1000).
+
+    Yields:
+        list: Lista krotek (PurchaseID, CustomerName, BookTitle, Quantity, PurchaseDate, TotalPrice),
+              od najnowszych.
+
+    Raises:
+        ValueError: Przy nieprawidłowym formacie daty.
+        sqlite3.Error: W przypadku błędu bazy danych.
+    """
+    start, before = _purchase_history_bounds(start_date, end_date)
+    after = None
+    while True:
+        with get_connection() as conn:
+            purchases = _fetch_purchase_history(conn, start, before, after, batch_size)
+        if not purchases:
+            return
+        yield purchases
+        if len(purchases) < batch_size:
+            return
+        after = (purchases[-1][4], purchases[-1][0])
+
+
+@instrument
+@cached(("Customers", "Books", "Purchases"))
+def get_dashboard_snapshot(popular_limit=5, recent_limit=5, low_stock_threshold=10):
+    """
+    Zwraca wszystkie statystyki pulpitu w jednej transakcji odczytu.
+
+    Zastępuje osobne wywołania get_total_books, get_ebooks_unavailable, get_total_customers,
+    get_total_purchases, get_units_sold, get_popular_books, get_recent_books,
+    get_revenue_statistics i get_low_stock_books: liczniki odczytywane są jednym zapytaniem
+    z tabeli Stats, przychody jednym zapytaniem z tabel przychodów, a wszystkie wartości
+    pochodzą z tej samej migawki bazy (spójny stan z jednej chwili).
+
+    Args:
+        popular_limit (int, optional): Liczba najpopularniejszych książek.
+        recent_limit (int, optional): Liczba najnowszych książek.
+        low_stock_threshold (int, optional): Próg niskiego stanu magazynowego.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (sukces), 500 (błąd bazy).
+            - message (str): Komunikat o wyniku operacji.
+            - data (dict): total_books, ebooks_unavailable, total_customers, total_purchases,
+                           units_sold, popular_books, recent_books, revenue (total_revenue,
+                           monthly_revenue), low_stock_books oraz snapshot_at (czas migawki).
+    """
+    thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    try:
+        with get_connection() as conn:
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                # Migawka WAL ustalana przy pierwszym odczycie i wspólna dla wszystkich zapytań
+                conn.execute("BEGIN;")
+            try:
+                snapshot_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                stats = dict(conn.execute(SQL_STATS).fetchall())
+                popular_books = conn.execute(SQL_POPULAR_BOOKS, (popular_limit,)).fetchall()
+                recent_books = conn.execute(SQL_RECENT_BOOKS, (recent_limit,)).fetchall()
+                total_revenue, monthly_revenue = conn.execute(
+                    SQL_REVENUE_SUMMARY, (REVENUE_MIN_PERIOD, REVENUE_MAX_PERIOD, thirty_days_ago, REVENUE_MAX_PERIOD)
+                ).fetchone()
+                low_stock_books = conn.execute(SQL_LOW_STOCK_BOOKS, (low_stock_threshold,)).fetchall()
+            finally:
+                if own_transaction:
+                    conn.rollback()
+            return {
+                "code": 200,
+                "message": "OK",
+                "data": {
+                    "total_books": stats.get("books", 0),
+                    "ebooks_unavailable": stats.get("books_out_of_stock", 0),
+                    "total_customers": stats.get("customers", 0),
+                    "total_purchases": stats.get("purchases", 0),
+                    "units_sold": stats.get("units_sold", 0),
+                    "popular_books": popular_books,
+                    "recent_books": recent_books,
+                    "revenue": {
+                        "total_revenue": total_revenue,
+                        "monthly_revenue": monthly_revenue
+                    },
+                    "low_stock_books": low_stock_books,
+                    "snapshot_at": snapshot_at
+                }
+            }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas pobierania migawki statystyk: {e}",
+            "data": {}
+        }
+
+
+@instrument
+def get_query_plan_report():
+    """
+    Zwraca raport EXPLAIN QUERY PLAN dla zapytań wszystkich funkcji statystyk.
+
+    Pozwala sprawdzić, czy każde zapytanie korzysta z indeksu zamiast pełnego skanu tabeli.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 jeśli wszystkie zapytania używają indeksów, 409 jeśli któreś
+              wykonuje pełny skan, 500 przy błędzie bazy.
+            - message (str): Komunikat o wyniku operacji.
+            - data (list): Lista słowników (function, plan, uses_index, expected_scans - oczekiwane
+              skany tabel o stałej liczbie wierszy, PLAN_SMALL_TABLES).
+    """
+    try:
+        with get_connection() as conn:
+            report = []
+            for function, sql, params in MONITOR_QUERIES:
+                plan = explain_query_plan(conn, sql, params)
+                report.append({
+                    "function": function,
+                    "plan": plan["plan"],
+                    "uses_index": plan["uses_index"],
+                    "expected_scans": plan["expected_scans"]
+                })
+            full_scans = sorted({entry["function"] for entry in report if not entry["uses_index"]})
+            return {
+                "code": 200 if not full_scans else 409,
+                "message": "OK" if not full_scans else f"Pełne skany tabel w: {', '.join(full_scans)}.",
+                "data": report
+            }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas tworzenia raportu planów zapytań: {e}",
+            "data": []
+        }
+
+
+@instrument
+@invalidates("Customers", "Books", "Purchases")
+def check_stats_consistency(repair=True):
+    """
+    Przelicza liczniki tabeli Stats od zera i porównuje je z zapisanymi wartościami.
+
+    Porównanie wykonywane jest w transakcji z blokadą zapisu, więc żaden zapis nie
+    zmieni liczników w trakcie sprawdzania.
+
+    Args:
+        repair (bool, optional): Czy nadpisać rozbieżne liczniki przeliczonymi wartościami.
+
+    Returns:
+        dict: Słownik zawierający:
+            - code (int): 200 (liczniki zgodne), 409 (wykryto rozbieżności), 500 (błąd bazy).
+            - message (str): Komunikat o wyniku sprawdzenia.
+            - data (list): Słowniki (name, stored, actual) dla każdego licznika.
+    """
+    try:
+        with get_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE;")
+            stored = dict(conn.execute(SQL_STATS).fetchall())
+            actual = conn.execute(SQL_STATS_RECOMPUTE).fetchall()
+            report = [{"name": name, "stored": stored.get(name), "actual": value} for name, value in actual]
+            mismatched = [row for row in report if row["stored"] != row["actual"]]
+            if mismatched and repair:
+                conn.executemany("INSERT OR REPLACE INTO Stats (Name, Value) VALUES (?, ?);",
+                                 [(row["name"], row["actual"]) for row in mismatched])
+            conn.commit()
+
+            if not mismatched:
+                return {
+                    "code": 200,
+                    "message": "Liczniki statystyk są zgodne z danymi.",
+                    "data": report
+                }
+            names = ", ".join(row["name"] for row in mismatched)
+            return {
+                "code": 409,
+                "message": f"Rozbieżne liczniki: {names}." + (" Liczniki zostały naprawione." if repair else ""),
+                "data": report
+            }
+    except sqlite3.Error as e:
+        return {
+            "code": 500,
+            "message": f"Błąd bazy danych podczas sprawdzania liczników statystyk: {e}",
+            "data": []
+        }
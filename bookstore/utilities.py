@@ -1,12 +1,348 @@
 # utilities.py
 import os
+import time
 import uuid
+import atexit
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+from bookstore.cache import clear as clear_cache, deferred_invalidation
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 FILE_DIR = os.path.join(BASE_DIR, "DATABASE")
 DB_PATH = os.path.join(BASE_DIR, "DATABASE", "bookstore_main.db")
 
+# Konfiguracja puli połączeń
+POOL_MAX_SIZE = 8  # Maksymalna liczba jednocześnie otwartych połączeń
+POOL_TIMEOUT = 30.0  # Maksymalny czas oczekiwania na wolne połączenie (sekundy)
+POOL_HEALTH_CHECK_INTERVAL = 30.0  # Po ilu sekundach bezczynności połączenie jest sprawdzane przed wydaniem
+POOL_STATEMENT_CACHE = 256  # Rozmiar cache przygotowanych zapytań (na połączenie)
+GROUP_SAVEPOINT = "grouped_operation"  # Punkt zapisu operacji w grupie transakcji (transaction_group)
+
+# UPDATE ... RETURNING jest dostępne od SQLite 3.35
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# PRAGMA ustawiane raz, przy otwieraniu każdego połączenia w puli.
+# Można je nadpisać przekazując `pragmas` do `configure_pool()`.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # Czytelnicy nie blokują piszącego i odwrotnie
+    "synchronous": "NORMAL",  # W trybie WAL bezpieczne, znacznie szybsze niż FULL
+    "cache_size": -16000,  # Ujemna wartość = rozmiar w KiB (~16 MB na połączenie)
+    "mmap_size": 134217728,  # 128 MB odczytów przez mapowanie pamięci
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Zgłaszany, gdy w zadanym czasie nie udało się pobrać połączenia z puli."""
+
+
+class _GroupedConnection:
+    """
+    Połączenie wydawane funkcjom menedżerów wewnątrz `transaction_group()`.
+
+    Każda operacja grupy wykonywana jest w punkcie zapisu (`operation()`): commit()
+    zatwierdza zmiany operacji tylko w ramach transakcji grupy, a rollback() wycofuje
+    zmiany od ostatniego commit() operacji. Pozostałe atrybuty należą do połączenia sqlite3.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        self._conn.execute(f"RELEASE {GROUP_SAVEPOINT};")
+        self._conn.execute(f"SAVEPOINT {GROUP_SAVEPOINT};")
+
+    def rollback(self):
+        self._conn.execute(f"ROLLBACK TO {GROUP_SAVEPOINT};")
+
+    @contextmanager
+    def operation(self):
+        """Wykonuje jedną operację grupy w osobnym punkcie zapisu."""
+        self._conn.execute(f"SAVEPOINT {GROUP_SAVEPOINT};")
+        try:
+            yield
+        finally:
+            # Jak przy zwrocie połączenia do puli: niezatwierdzone zmiany operacji są wycofywane
+            self._conn.execute(f"ROLLBACK TO {GROUP_SAVEPOINT};")
+            self._conn.execute(f"RELEASE {GROUP_SAVEPOINT};")
+
+
+class ConnectionPool:
+    """
+    Ograniczona, bezpieczna wątkowo pula połączeń SQLite.
+
+    Połączenia są otwierane leniwie (do `max_size`), a PRAGMA i cache
+    przygotowanych zapytań konfigurowane są raz, przy ich utworzeniu.
+    Zagnieżdżone pobrania w tym samym wątku zwracają to samo połączenie,
+    dzięki czemu funkcje menedżerów mogą się wzajemnie wywoływać bez
+    wyczerpywania puli.
+    """
+
+    def __init__(self, db_path, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 pragmas=None, health_check_interval=POOL_HEALTH_CHECK_INTERVAL):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+        self.health_check_interval = health_check_interval
+
+        self._idle = []  # Lista krotek (połączenie, czas zwrócenia do puli)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self._local = threading.local()
+        self._stats = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "high_water": 0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path,
+                               timeout=self.timeout,
+                               check_same_thread=False,
+                               cached_statements=POOL_STATEMENT_CACHE)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value};")
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1;").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _acquire(self):
+        deadline = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Pula połączeń została zamknięta.")
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, released_at = None, None
+                    break
+                if deadline is None:
+                    self._stats["waits"] += 1
+                    started = time.monotonic()
+                    deadline = started + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._size >= self.max_size:
+                        self._stats["wait_time"] += time.monotonic() - started
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Brak wolnego połączenia w puli po {self.timeout} s oczekiwania.")
+            if deadline is not None:
+                self._stats["wait_time"] += time.monotonic() - started
+            self._stats["checkouts"] += 1
+            in_use = self._size - len(self._idle)
+            self._stats["high_water"] = max(self._stats["high_water"], in_use)
+
+        try:
+            if conn is not None and time.monotonic() - released_at > self.health_check_interval:
+                if not self._is_healthy(conn):
+                    with self._cond:
+                        self._stats["health_check_failures"] += 1
+                    conn.close()
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._stats["created"] += 1
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def _release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            conn = None
+        with self._cond:
+            if conn is None or self._closed:
+                self._size -= 1
+                if conn is not None:
+                    conn.close()
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Pobiera połączenie z puli na czas trwania bloku `with`.
+
+        Niezatwierdzona transakcja jest wycofywana przy zwrocie połączenia do puli.
+        """
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            self._local.depth = depth + 1
+            try:
+                yield self._local.conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.depth = 0
+            self._local.conn = None
+            self._release(conn)
+
+    @contextmanager
+    def transaction_group(self):
+        """
+        Wykonuje operacje bieżącego wątku w jednej transakcji zapisu (BEGIN IMMEDIATE ... COMMIT).
+
+        Zagnieżdżone pobrania połączenia zwracają połączenie grupy (`_GroupedConnection`),
+        więc commit() funkcji menedżerów nie kończy transakcji. Operacje należy wykonywać
+        w blokach `with group.operation():`. Błąd w bloku grupy wycofuje całą grupę.
+        Cache wyników jest unieważniany dopiero po zatwierdzeniu lub wycofaniu grupy,
+        a odczyty w grupie go pomijają (deferred_invalidation).
+        """
+        with self.connection() as conn, deferred_invalidation():
+            if conn.in_transaction:
+                raise sqlite3.ProgrammingError("Grupa transakcji wymaga połączenia bez otwartej transakcji.")
+            grouped = _GroupedConnection(conn)
+            self._local.conn = grouped
+            try:
+                conn.execute("BEGIN IMMEDIATE;")
+                yield grouped
+                conn.commit()
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                self._local.conn = conn
+
+    def stats(self):
+        """Zwraca słownik ze statystykami puli."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            stats["max_size"] = self.max_size
+        return stats
+
+    def close(self):
+        """Zamyka wszystkie bezczynne połączenia i blokuje wydawanie nowych."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+                self._size -= 1
+            self._cond.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Zwraca współdzieloną pulę połączeń, tworząc ją przy pierwszym użyciu.
+
+    Returns:
+        ConnectionPool: Pula połączeń do bazy `DB_PATH`.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def configure_pool(db_path=None, **kwargs):
+    """
+    Zastępuje współdzieloną pulę nową, skonfigurowaną pulą połączeń.
+
+    Args:
+        db_path (str, optional): Ścieżka do pliku bazy danych. Domyślnie `DB_PATH`.
+        **kwargs: Argumenty przekazywane do `ConnectionPool` (max_size, timeout,
+                  pragmas, health_check_interval).
+
+    Returns:
+        ConnectionPool: Nowa pula połączeń.
+    """
+    global _pool
+    with _pool_lock:
+        old_pool = _pool
+        _pool = ConnectionPool(db_path or DB_PATH, **kwargs)
+    if old_pool is not None:
+        old_pool.close()
+    # Zapamiętane wyniki statystyk dotyczą poprzedniej bazy
+    clear_cache()
+    return _pool
+
+
+def get_connection():
+    """
+    Context manager wydający połączenie ze współdzielonej puli.
+
+    Przykład:
+        with get_connection() as conn:
+            conn.execute("SELECT COUNT(*) FROM Books;")
+    """
+    return get_pool().connection()
+
+
+def transaction_group():
+    """
+    Context manager grupujący operacje w jedną transakcję na połączeniu ze współdzielonej puli.
+
+    Przykład:
+        with transaction_group() as group:
+            for book in books:
+                with group.operation():
+                    add_book(book)
+    """
+    return get_pool().transaction_group()
+
+
+def get_pool_stats():
+    """
+    Zwraca statystyki współdzielonej puli połączeń.
+
+    Returns:
+        dict: Słownik zawierający m.in. liczbę pobrań (checkouts), oczekiwań (waits),
+              łączny czas oczekiwania (wait_time) i najwyższe jednoczesne użycie (high_water).
+    """
+    return get_pool().stats()
+
+
+@atexit.register
+def _close_pool():
+    if _pool is not None:
+        _pool.close()
+
 
 def get_next_book_id(conn):
     """
@@ -22,6 +358,81 @@ def get_next_book_id(conn):
         return result + 1
 
 
+def adjust_book_stats(conn, books_delta, out_of_stock_delta):
+    """
+    Koryguje liczniki Stats dla książek w trybie BulkLoad (gdy wyzwalacze są pominięte).
+
+    Zmiana nie jest zatwierdzana - robi to wywołujący, razem z resztą swojej transakcji.
+
+    Args:
+        conn (sqlite3.Connection): Połączenie z bazą danych.
+        books_delta (int): Zmiana liczby książek.
+        out_of_stock_delta (int): Zmiana liczby książek ze stanem 0.
+    """
+    conn.executemany("UPDATE Stats SET Value = Value + ? WHERE Name = ?;",
+                     [(books_delta, "books"), (out_of_stock_delta, "books_out_of_stock")])
+
+
+def log_book_changes(conn, operation, where, params=()):
+    """
+    Zapisuje w dzienniku zmian (ChangeLog) książki wstawiane lub usuwane w trybie BulkLoad
+    (gdy wyzwalacze dziennika są pominięte), jednym zapytaniem zamiast wyzwalacza na wiersz.
+
+    Przy usuwaniu wywoływana przed DELETE. Zmiana nie jest zatwierdzana.
+
+    Args:
+        conn (sqlite3.Connection): Połączenie z bazą danych.
+        operation (str): 'I' (wstawienie) lub 'D' (usunięcie).
+        where (str): Warunek wybierający książki, np. "BookID > ?".
+        params (tuple, optional): Parametry warunku.
+    """
+    conn.execute(f"""
+                 INSERT INTO ChangeLog (TableName, RowKey, Operation)
+                 SELECT 'Books', BookID, ?
+                 FROM Books
+                 WHERE {where}
+                 ORDER BY BookID;
+                 """, (operation, *params))
+
+
+def apply_stock_change(conn, book_id, quantity_change):
+    """
+    Atomowo zmienia stan magazynowy książki, o ile nie spadnie on poniżej zera.
+
+    Sprawdzenie i zmiana wykonywane są jednym warunkowym UPDATE, więc współbieżne
+    zakupy nie mogą sprzedać więcej egzemplarzy, niż jest w magazynie. Zmiana nie jest
+    zatwierdzana - robi to wywołujący, razem z resztą swojej transakcji.
+
+    Args:
+        conn (sqlite3.Connection): Połączenie z bazą danych.
+        book_id (int): ID książki.
+        quantity_change (int): Zmiana ilości (ujemna przy zakupie).
+
+    Returns:
+        tuple: (True, nowy stan) jeśli stan został zmieniony,
+               (False, obecny stan) jeśli stan byłby ujemny,
+               (False, None) jeśli książka nie istnieje.
+    """
+    if SQLITE_HAS_RETURNING:
+        row = conn.execute("""
+                           UPDATE Books
+                           SET Stock = Stock + ?
+                           WHERE BookID = ?
+                             AND Stock + ? >= 0
+                           RETURNING Stock;
+                           """, (quantity_change, book_id, quantity_change)).fetchone()
+        if row:
+            return True, row[0]
+    else:
+        cursor = conn.execute("UPDATE Books SET Stock = Stock + ? WHERE BookID = ? AND Stock + ? >= 0;",
+                              (quantity_change, book_id, quantity_change))
+        if cursor.rowcount:
+            return True, conn.execute("SELECT Stock FROM Books WHERE BookID = ?;", (book_id,)).fetchone()[0]
+
+    row = conn.execute("SELECT Stock FROM Books WHERE BookID = ?;", (book_id,)).fetchone()
+    return False, row[0] if row else None
+
+
 def generate_customer_id():
     """
     Generuje unikalny UUID dla nowego klienta.
@@ -47,58 +458,125 @@ def validate_email(email):
     return re.match(pattern, email) is not None
 
 
+def build_fts_query(text, columns=None):
+    """
+    Buduje wyrażenie MATCH dla indeksu pełnotekstowego BooksFTS.
+
+    Każde słowo z `text` staje się wyszukiwaniem prefiksowym ("słowo"*), a wszystkie
+    słowa muszą wystąpić (AND). Znaki specjalne składni FTS5 są pomijane, a słowa
+    ujmowane w cudzysłów, więc operatory (AND, OR, NOT, NEAR) i nazwy kolumn wpisane
+    przez użytkownika wyszukiwane są jako zwykłe słowa.
+
+    Args:
+        text (str): Tekst wpisany przez użytkownika, np. "harry pot".
+        columns (tuple, optional): Kolumny, do których ograniczyć wyszukiwanie, np. ("Title",).
+
+    Returns:
+        str | None: Wyrażenie MATCH lub None, jeśli tekst nie zawiera żadnego słowa.
+    """
+    import re
+    terms = re.findall(r"\w+", str(text))
+    if not terms:
+        return None
+    expression = " AND ".join(f'"{term}"*' for term in terms)
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+    return expression
+
+
+# Tabele o stałej liczbie wierszy (liczniki Stats, wiersz stałych SELECT bez FROM): ich pełny skan
+# jest oczekiwany - zgłaszany w expected_scans, a nie jako brak indeksu
+PLAN_SMALL_TABLES = ("Stats", "CONSTANT")
+
+
+def explain_query_plan(conn, sql, params=()):
+    """
+    Zwraca plan wykonania zapytania (EXPLAIN QUERY PLAN).
+
+    Args:
+        conn (sqlite3.Connection): Połączenie z bazą danych.
+        sql (str): Zapytanie SQL.
+        params (tuple, optional): Parametry zapytania.
+
+    Returns:
+        dict: Słownik zawierający:
+            - plan (list): Lista kroków planu (np. "SEARCH Books USING INDEX idx_books_author (Author=?)").
+            - uses_index (bool): False jeśli którykolwiek krok to pełny skan tabeli bez indeksu
+              (poza oczekiwanymi skanami tabel PLAN_SMALL_TABLES).
+            - expected_scans (list): Kroki planu skanujące tabele PLAN_SMALL_TABLES.
+    """
+    import re
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    plan = [row[3] for row in rows]
+    # Skan tabeli FTS5 z MATCH ("VIRTUAL TABLE INDEX 0:M...") korzysta z indeksu pełnotekstowego
+    scans = [step for step in plan
+             if step.startswith("SCAN") and "USING" not in step
+             and not re.search(r"VIRTUAL TABLE INDEX \d+:\S*M", step)]
+    # Skany tabel PLAN_SMALL_TABLES nie rosną z liczbą książek i zakupów
+    expected_scans = [step for step in scans if step.split()[1] in PLAN_SMALL_TABLES]
+    return {
+        "plan": plan,
+        "uses_index": len(scans) == len(expected_scans),
+        "expected_scans": expected_scans
+    }
+
+
 def initialize_database():
     """
-    Inicjalizuje bazę danych: tworzy plik bazy danych i tabele, jeśli nie istnieją.
+    Inicjalizuje bazę danych: tworzy plik bazy danych i tabele, jeśli nie istnieją,
+    a następnie stosuje oczekujące migracje schematu (indeksy itp.).
     """
-    os.makedirs(FILE_DIR, exist_ok=True)
+    from bookstore.migrations import migrate
+
+    os.makedirs(os.path.dirname(get_pool().db_path), exist_ok=True)
 
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Tworzenie tabeli Customers
-        cursor.execute("""
-                       CREATE TABLE IF NOT EXISTS Customers
-                       (
-                           CustomerID TEXT PRIMARY KEY,
-                           Name       TEXT        NOT NULL,
-                           Email      TEXT UNIQUE NOT NULL
-                       )
-                       """)
-
-        # Tworzenie tabeli Books
-        cursor.execute("""
-                       CREATE TABLE IF NOT EXISTS Books
-                       (
-                           BookID    INTEGER PRIMARY KEY AUTOINCREMENT,
-                           Title     TEXT NOT NULL,
-                           Author    TEXT NOT NULL,
-                           Genre     TEXT,
-                           Price     REAL NOT NULL,
-                           Stock     INTEGER DEFAULT 0,
-                           DateAdded TEXT
-                       )
-                       """)
-
-        # Tworzenie tabeli Purchases
-        cursor.execute("""
-                       CREATE TABLE IF NOT EXISTS Purchases
-                       (
-                           PurchaseID   INTEGER PRIMARY KEY AUTOINCREMENT,
-                           CustomerID   TEXT    NOT NULL,
-                           BookID       INTEGER NOT NULL,
-                           Quantity     INTEGER  DEFAULT 1,
-                           PurchaseDate DATETIME DEFAULT CURRENT_TIMESTAMP,
-                           FOREIGN KEY (CustomerID) REFERENCES Customers (CustomerID),
-                           FOREIGN KEY (BookID) REFERENCES Books (BookID)
-                       )
-                       """)
-
-        conn.commit()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            # Tworzenie tabeli Customers
+            cursor.execute("""
+                           CREATE TABLE IF NOT EXISTS Customers
+                           (
+                               CustomerID TEXT PRIMARY KEY,
+                               Name       TEXT        NOT NULL,
+                               Email      TEXT UNIQUE NOT NULL
+                           )
+                           """)
+
+            # Tworzenie tabeli Books
+            cursor.execute("""
+                           CREATE TABLE IF NOT EXISTS Books
+                           (
+                               BookID    INTEGER PRIMARY KEY AUTOINCREMENT,
+                               Title     TEXT NOT NULL,
+                               Author    TEXT NOT NULL,
+                               Genre     TEXT,
+                               Price     REAL NOT NULL,
+                               Stock     INTEGER DEFAULT 0,
+                               DateAdded TEXT
+                           )
+                           """)
+
+            # Tworzenie tabeli Purchases
+            cursor.execute("""
+                           CREATE TABLE IF NOT EXISTS Purchases
+                           (
+                               PurchaseID   INTEGER PRIMARY KEY AUTOINCREMENT,
+                               CustomerID   TEXT    NOT NULL,
+                               BookID       INTEGER NOT NULL,
+                               Quantity     INTEGER  DEFAULT 1,
+                               PurchaseDate DATETIME DEFAULT CURRENT_TIMESTAMP,
+                               FOREIGN KEY (CustomerID) REFERENCES Customers (CustomerID),
+                               FOREIGN KEY (BookID) REFERENCES Books (BookID)
+                           )
+                           """)
+
+            conn.commit()
     except sqlite3.Error as e:
         print(f"Błąd bazy danych podczas inicjalizacji: {e}")
-    finally:
-        if conn:
-            conn.close()
+        return
+
+    result = migrate()
+    if result["code"] != 200:
+        print(result["message"])
@@ -0,0 +1,35 @@
+# conftest.py
+import pytest
+
+from bookstore import utilities, cache, file_manager, backup
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Pusta baza w katalogu tymczasowym; pliki eksportu i kopie zapasowe trafiają do tego samego katalogu."""
+    monkeypatch.setattr(file_manager, "CSV_DIR", str(tmp_path))
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path / "backups"))
+    utilities.configure_pool(str(tmp_path / "bookstore.db"))
+    utilities.initialize_database()
+    cache.reset()
+    yield tmp_path
+    # Zamknięta pula: test bez tego fixture'a nie dotknie bazy projektu
+    utilities.get_pool().close()
+    cache.reset()
+
+
+def book(title, stock=5, price=10.0, author="Autor Testowy", genre="Test"):
+    return {"Title": title, "Author": author, "Genre": genre, "Price": price, "Stock": stock}
+
+
+def customer_id(name):
+    """Rejestruje klienta i zwraca jego CustomerID."""
+    from bookstore.customer_Manager import register_customer, get_customers
+    email = name.lower().replace(" ", ".") + "@example.com"
+    assert register_customer({"Name": name, "Email": email})["code"] == 201
+    return get_customers(name)["data"][0][0]
+
+
+def book_id(title):
+    with utilities.get_connection() as conn:
+        return conn.execute("SELECT BookID FROM Books WHERE Title = ?;", (title,)).fetchone()[0]
@@ -0,0 +1,150 @@
+# test_backup.py
+"""Kopia zapasowa i przywracanie (API backup SQLite): weryfikacja kopii, migawka i dziennik zmian."""
+import csv
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from bookstore import utilities, backup
+from bookstore.backup import backup_database, restore_database
+from bookstore.book_Manager import add_book, remove_book
+from bookstore.customer_Manager import buy_book
+from bookstore.file_manager import export_all, export_changes
+from bookstore.migrations import MIGRATIONS, SQL_CHANGE_WATERMARK, get_schema_version
+from bookstore.monitor import get_total_books
+from tests.conftest import book, customer_id
+
+TABLES = ("Customers", "Books", "Purchases")
+
+
+@pytest.fixture
+def data(db):
+    for i in range(5):
+        add_book(book(f"Książka {i}", stock=10))
+    anna = customer_id("Anna Nowak")
+    for i in range(3):
+        assert buy_book(anna, f"Książka {i}", 2)["code"] == 200
+
+
+def rows(conn=None):
+    with utilities.get_connection() as pooled:
+        conn = conn or pooled
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1;").fetchall() for table in TABLES}
+
+
+def watermark():
+    with utilities.get_connection() as conn:
+        return conn.execute(SQL_CHANGE_WATERMARK).fetchone()[0]
+
+
+def backup_path(name):
+    return os.path.join(backup.BACKUP_DIR, name)
+
+
+@pytest.mark.parametrize("filename, verify", [("kopia.db", "quick"), ("kopia.db.gz", "full"), ("kopia.db", None)])
+def test_backup_and_restore(data, filename, verify):
+    before = rows()
+    result = backup_database(filename, verify=verify, pages=2)
+    assert result["code"] == 200, result["message"]
+    assert result["data"]["steps"] > 1
+    assert not [name for name in os.listdir(backup.BACKUP_DIR) if name != filename]
+
+    add_book(book("Po kopii"))
+    remove_book("Książka 4")
+    result = restore_database(filename, verify=verify, pages=2)
+    assert result["code"] == 200, result["message"]
+    assert result["data"]["schema_version"] == MIGRATIONS[-1][0]
+    assert rows() == before
+    # Cache statystyk wyczyszczony po przywróceniu
+    assert get_total_books()["data"] == 5
+
+
+def test_backup_is_one_snapshot(data):
+    before = rows()
+    writes = []
+
+    def progress(done, total):
+        if not writes:
+            # Zapis innego połączenia w trakcie kopiowania nie trafia do kopii i jej nie przerywa
+            writer = threading.Thread(target=lambda: writes.append(add_book(book("W trakcie kopii"))))
+            writer.start()
+            writer.join()
+
+    result = backup_database("kopia.db", pages=1, progress=progress)
+    assert result["code"] == 200, result["message"]
+    assert writes[0]["code"] == 201
+    copy = sqlite3.connect(backup_path("kopia.db"))
+    try:
+        assert rows(copy) == before
+    finally:
+        copy.close()
+
+
+def test_restore_resets_change_log(data):
+    add_book(book("W kopii"))
+    result = backup_database()
+    assert result["code"] == 200, result["message"]
+    backup_watermark = watermark()
+
+    add_book(book("Po kopii"))
+    remove_book("W kopii")
+    before_restore = watermark()
+    assert restore_database(os.path.basename(result["data"]["path"]))["code"] == 200
+
+    # Dziennik wyczyszczony, licznik przesunięty za znacznik sprzed przywrócenia
+    with utilities.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ChangeLog;").fetchone()[0] == 0
+    assert watermark() > before_restore
+    for since in (0, backup_watermark, before_restore):
+        assert export_changes(since, ["Books"])["code"] == 409
+
+    # Nowa synchronizacja zaczyna się od pełnego eksportu i jego znacznika
+    full = export_all(["Books"])
+    assert full["code"] == 200, full["message"]
+    add_book(book("Po przywróceniu"))
+    changes = export_changes(full["data"]["watermark"], ["Books"])
+    assert changes["code"] == 200, changes["message"]
+    with open(changes["data"]["tables"]["Books"]["path"], newline="", encoding="utf-8") as file:
+        assert [(row["Title"], row["ChangeType"]) for row in csv.DictReader(file)] == [("Po przywróceniu", "insert")]
+    assert changes["data"]["watermark"] > before_restore
+
+
+def test_restore_migrates_older_backup(data):
+    before = rows()
+    assert backup_database("kopia.db")["code"] == 200
+    copy = sqlite3.connect(backup_path("kopia.db"))
+    copy.execute(f"PRAGMA user_version = {MIGRATIONS[-1][0] - 1};")
+    copy.close()
+
+    result = restore_database("kopia.db")
+    assert result["code"] == 200, result["message"]
+    assert result["data"]["schema_version"] == MIGRATIONS[-1][0] - 1
+    assert get_schema_version() == MIGRATIONS[-1][0]
+    assert rows() == before
+
+
+def test_restore_rejects_invalid_backups(data):
+    before = rows()
+    os.makedirs(backup.BACKUP_DIR, exist_ok=True)
+    with open(backup_path("smieci.db"), "wb") as file:
+        file.write(b"to nie jest baza danych" * 100)
+    with open(backup_path("smieci.db.gz"), "wb") as file:
+        file.write(b"to nie jest gzip")
+    sqlite3.connect(backup_path("pusta.db")).execute("CREATE TABLE Inna (x);").connection.close()
+    assert backup_database("nowsza.db")["code"] == 200
+    newer = sqlite3.connect(backup_path("nowsza.db"))
+    newer.execute(f"PRAGMA user_version = {MIGRATIONS[-1][0] + 1};")
+    newer.close()
+
+    assert restore_database("smieci.db")["code"] == 400
+    assert restore_database("smieci.db.gz")["code"] == 400
+    result = restore_database("pusta.db")
+    assert result["code"] == 400
+    assert "brak tabeli Customers" in result["message"]
+    assert restore_database("nowsza.db")["code"] == 409
+    assert restore_database("brak.db")["code"] == 404
+    assert restore_database("nowsza.db", verify="deep")["code"] == 400
+    assert backup_database("kopia.db", compression="bz2")["code"] == 400
+    assert rows() == before
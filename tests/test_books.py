@@ -0,0 +1,27 @@
+# test_books.py
+"""Operacje na wielu książkach naraz: add_books i remove_books."""
+from bookstore.book_Manager import add_books, remove_books
+from bookstore.utilities import get_connection
+from tests.conftest import book, book_id
+
+
+def titles():
+    with get_connection() as conn:
+        return [row[0] for row in conn.execute("SELECT Title FROM Books ORDER BY BookID;")]
+
+
+def test_add_books_reports_each_book(db):
+    result = add_books([book("A"), {"Title": "Bez ceny"}, book("B", stock=-1), book("C")], batch_size=2)
+    assert result["code"] == 200, result["message"]
+    assert [status["code"] for status in result["data"]] == [201, 400, 400, 201]
+    assert titles() == ["A", "C"]
+
+
+def test_remove_books_reports_each_id(db):
+    add_books([book("A"), book("B"), book("C")])
+    ids = [book_id("A"), str(book_id("C")), "²", "١٢x", "abc", 999]
+    result = remove_books(ids, batch_size=2)
+    assert result["code"] == 200, result["message"]
+    assert [status["code"] for status in result["data"]] == [200, 200, 400, 400, 400, 404]
+    assert titles() == ["B"]
+    assert remove_books(["²"])["code"] == 404
@@ -0,0 +1,89 @@
+# test_buy_books.py
+"""Zakup koszyka (buy_books): wszystko albo nic, sumowanie pozycji i rozpoznawanie książek."""
+import pytest
+
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book, buy_books
+from bookstore.utilities import get_connection
+from tests.conftest import book, book_id, customer_id
+
+
+def stock(title):
+    with get_connection() as conn:
+        return conn.execute("SELECT Stock FROM Books WHERE Title = ?;", (title,)).fetchone()[0]
+
+
+def purchases():
+    with get_connection() as conn:
+        return conn.execute("SELECT BookID, Quantity, LineTotal FROM Purchases ORDER BY PurchaseID;").fetchall()
+
+
+@pytest.fixture
+def anna(db):
+    add_book(book("Lalka", stock=5, price=10.0))
+    add_book(book("Potop", stock=2, price=20.0))
+    return customer_id("Anna Nowak")
+
+
+def test_whole_cart(anna):
+    result = buy_books(anna, [("Lalka", 2), (book_id("Potop"), 1)])
+    assert result["code"] == 200, result["message"]
+    assert [line["code"] for line in result["data"]] == [200, 200]
+    assert purchases() == [(book_id("Lalka"), 2, 20.0), (book_id("Potop"), 1, 20.0)]
+    assert (stock("Lalka"), stock("Potop")) == (3, 1)
+
+
+def test_bad_line_rejects_whole_cart(anna):
+    result = buy_books(anna, [("Lalka", 2), ("Brak", 1), ("Potop", 0)])
+    assert result["code"] == 400
+    assert [line["code"] for line in result["data"]] == [200, 404, 400]
+    assert purchases() == []
+    assert (stock("Lalka"), stock("Potop")) == (5, 2)
+
+
+def test_insufficient_stock(anna):
+    result = buy_books(anna, [("Lalka", 1), ("Potop", 3)])
+    assert result["code"] == 400
+    assert [line["code"] for line in result["data"]] == [200, 400]
+    assert "Dostępne: 2" in result["data"][1]["message"]
+    assert purchases() == []
+    assert (stock("Lalka"), stock("Potop")) == (5, 2)
+
+
+def test_duplicate_lines_are_summed(anna):
+    # Każda pozycja osobno mieści się w stanie, razem nie
+    result = buy_books(anna, [("Potop", 1), (str(book_id("Potop")), 2)])
+    assert result["code"] == 400
+    assert [line["code"] for line in result["data"]] == [400, 400]
+    assert stock("Potop") == 2
+
+    result = buy_books(anna, [("Potop", 1), (str(book_id("Potop")), 1)])
+    assert result["code"] == 200, result["message"]
+    assert purchases() == [(book_id("Potop"), 1, 20.0), (book_id("Potop"), 1, 20.0)]
+    assert stock("Potop") == 0
+
+
+def test_empty_cart_and_unknown_customer(anna):
+    assert buy_books(anna, [])["code"] == 400
+    assert buy_books("Nieznany Klient", [("Lalka", 1)])["code"] == 404
+
+
+@pytest.mark.parametrize("book_data", ["²", "١٢", "12a", "", None, 3.0])
+def test_unusual_book_data_is_not_found(anna, book_data):
+    result = buy_books(anna, [(book_data, 1)])
+    assert result["code"] == 400
+    assert result["data"][0]["code"] == 404
+    assert buy_book(anna, book_data, 1)["code"] == 404
+
+
+def test_digit_title_same_as_buy_book(anna):
+    # "1984" to tytuł, bo nie ma książki o ID 1984; ID istniejącej książki ma pierwszeństwo
+    add_book(book("1984", stock=3))
+    add_book(book(str(book_id("Lalka")), stock=3))
+    result = buy_books(anna, [("1984", 1), (str(book_id("Lalka")), 1)])
+    assert result["code"] == 200, result["message"]
+    assert [line["book_id"] for line in result["data"]] == [book_id("1984"), book_id("Lalka")]
+
+    assert buy_book(anna, "1984", 1)["code"] == 200
+    assert buy_book(anna, str(book_id("Lalka")), 1)["code"] == 200
+    assert (stock("1984"), stock("Lalka")) == (1, 3)
@@ -0,0 +1,75 @@
+# test_cache.py
+"""Cache wyników statystyk: unieważnianie po zapisach, TTL i izolacja zwracanych danych."""
+import time
+
+import pytest
+
+from bookstore import cache
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book
+from bookstore.monitor import get_total_books, get_popular_books, get_dashboard_snapshot
+from tests.conftest import book, customer_id
+
+
+@pytest.fixture(autouse=True)
+def enabled_cache(monkeypatch):
+    # Niezależnie od BOOKSTORE_CACHE w środowisku testów
+    monkeypatch.setattr(cache, "_enabled", True)
+
+
+def hits(name):
+    return cache.get_cache_stats()["functions"].get(name, {}).get("hits", 0)
+
+
+def test_add_book_invalidates_cached_value(db):
+    add_book(book("Pierwsza"))
+    assert get_total_books()["data"] == 1
+    assert get_total_books()["data"] == 1
+    assert hits("monitor.get_total_books") == 1
+
+    add_book(book("Druga"))
+    assert get_total_books()["data"] == 2
+
+
+def test_buy_book_invalidates_cached_value(db):
+    add_book(book("Bestseller", stock=10))
+    anna = customer_id("Anna Nowak")
+    assert buy_book(anna, "Bestseller", 2)["code"] == 200
+    assert get_popular_books()["data"] == [("Bestseller", "Autor Testowy", 2)]
+
+    assert buy_book(anna, "Bestseller", 3)["code"] == 200
+    assert get_popular_books()["data"] == [("Bestseller", "Autor Testowy", 5)]
+
+
+def test_ttl_expiry():
+    calls = []
+
+    @cache.cached(("Books",), ttl=0.05)
+    def counted():
+        calls.append(1)
+        return {"code": 200, "message": "OK", "data": len(calls)}
+
+    assert counted()["data"] == 1
+    assert counted()["data"] == 1
+    time.sleep(0.1)
+    assert counted()["data"] == 2
+
+
+def test_returned_data_is_not_shared_with_cache(db):
+    add_book(book("Bestseller", stock=10))
+    anna = customer_id("Anna Nowak")
+    buy_book(anna, "Bestseller", 1)
+
+    first = get_popular_books()  # chybienie - wynik zapisany w cache
+    first["data"].clear()
+    second = get_popular_books()  # trafienie
+    assert second["data"] == [("Bestseller", "Autor Testowy", 1)]
+    second["data"].append(("Obca", "Ktoś", 99))
+    assert get_popular_books()["data"] == [("Bestseller", "Autor Testowy", 1)]
+
+    snapshot = get_dashboard_snapshot()["data"]
+    snapshot["revenue"]["total_revenue"] = -1
+    snapshot["popular_books"].clear()
+    again = get_dashboard_snapshot()["data"]
+    assert again["revenue"]["total_revenue"] == 10.0
+    assert len(again["popular_books"]) == 1
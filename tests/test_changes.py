@@ -0,0 +1,73 @@
+# test_changes.py
+"""Znaczniki dziennika zmian: export_changes i purge_changes."""
+import csv
+
+from bookstore import utilities
+from bookstore.migrations import SQL_CHANGE_WATERMARK
+from bookstore.book_Manager import add_book, remove_book, update_book_stock
+from bookstore.file_manager import export_changes, purge_changes
+from tests.conftest import book, book_id
+
+
+def watermark():
+    with utilities.get_connection() as conn:
+        return conn.execute(SQL_CHANGE_WATERMARK).fetchone()[0]
+
+
+def changed_books(result):
+    """Zwraca {Title lub BookID: ChangeType} z pliku zmian tabeli Books."""
+    assert result["code"] == 200, result["message"]
+    with open(result["data"]["tables"]["Books"]["path"], newline="", encoding="utf-8") as file:
+        return {row["Title"] or int(row["BookID"]): row["ChangeType"] for row in csv.DictReader(file)}
+
+
+def test_changes_since_watermark(db):
+    add_book(book("Zmieniana", stock=1))
+    add_book(book("Usuwana"))
+    removed_id = book_id("Usuwana")
+    since = export_changes(0, ["Books"])["data"]["watermark"]
+    assert since == watermark() > 0
+
+    update_book_stock(book_id("Zmieniana"), 4)
+    add_book(book("Nowa"))
+    remove_book("Usuwana")
+    result = export_changes(since, ["Books"])
+    assert changed_books(result) == {"Zmieniana": "update", "Nowa": "insert", removed_id: "delete"}
+    assert result["data"]["watermark"] == watermark()
+
+    # Brak zmian od najnowszego znacznika; znacznik z przyszłości jest błędem
+    assert export_changes(result["data"]["watermark"], ["Books"])["data"]["tables"] == {}
+    assert export_changes(watermark() + 1, ["Books"])["code"] == 400
+
+
+def test_watermark_survives_purge(db):
+    for title in ("A", "B", "C"):
+        add_book(book(title))
+    first = watermark()
+    assert purge_changes(first)["data"]["deleted"] == first
+    with utilities.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ChangeLog;").fetchone()[0] == 0
+
+    # AUTOINCREMENT: znacznik z sqlite_sequence nie cofa się po usunięciu wpisów, ChangeID nie są używane ponownie
+    assert watermark() == first
+    add_book(book("D"))
+    result = export_changes(first, ["Books"])
+    assert changed_books(result) == {"D": "insert"}
+    assert result["data"]["watermark"] == first + 1
+
+
+def test_purge_past_callers_watermark_returns_409(db):
+    add_book(book("A"))
+    since = watermark()
+    add_book(book("B"))
+    add_book(book("C"))
+    latest = watermark()
+
+    # Usunięcie wpisów do znacznika odbiorcy nie przeszkadza mu w dalszej synchronizacji
+    assert purge_changes(since)["code"] == 200
+    assert changed_books(export_changes(since, ["Books"])) == {"B": "insert", "C": "insert"}
+
+    assert purge_changes(latest - 1)["code"] == 200
+    assert export_changes(since, ["Books"])["code"] == 409
+    assert export_changes(latest - 1, ["Books"])["code"] == 200
+
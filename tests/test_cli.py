@@ -0,0 +1,127 @@
+# test_cli.py
+"""Wiersz poleceń: pojedyncze polecenia (main) i tryb wsadowy (run_batch)."""
+import json
+import sqlite3
+
+import pytest
+
+from bookstore import __main__ as cli
+from bookstore.book_Manager import add_book
+from bookstore.monitor import get_total_books
+from bookstore.utilities import get_connection
+from tests.conftest import book
+
+
+def add(title):
+    return {"op": "add_book", "args": {"bookInfo": book(title)}}
+
+
+def write_ops(path, *operations):
+    with open(path, "w", encoding="utf-8") as file:
+        for operation in operations:
+            file.write((operation if isinstance(operation, str) else json.dumps(operation)) + "\n")
+    return str(path)
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_main_single_command(db, capsys):
+    assert cli.main(["add_book", json.dumps(book("Lalka"))]) == 0
+    assert json.loads(capsys.readouterr().out)["code"] == 201
+
+    assert cli.main(["get_book", "--data", "Lalka"]) == 0
+    assert json.loads(capsys.readouterr().out)["data"][0][1] == "Lalka"
+
+    # Brak wyniku i wyjątek funkcji (tekst zamiast słownika książki) kończą się kodem wyjścia 1
+    assert cli.main(["get_book", "--data", "Brak"]) == 1
+    assert json.loads(capsys.readouterr().out)["code"] == 404
+    assert cli.main(["add_book", "oops"]) == 1
+    assert json.loads(capsys.readouterr().out)["code"] == 400
+    assert get_total_books()["data"] == 1
+
+
+def test_main_iterator_prints_rows(db, capsys):
+    for title in ("A", "B", "C"):
+        add_book(book(title))
+    assert cli.main(["iter_books", "--batch-size", "2"]) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [row[1] for row in rows] == ["A", "B", "C"]
+
+
+def test_main_unknown_command(db):
+    with pytest.raises(SystemExit):
+        cli.main(["no_such_function"])
+
+
+def test_bad_line_does_not_abort_group(db):
+    ops = write_ops(db / "ops.jsonl",
+                    add("Pierwsza"),
+                    {"op": "add_book", "args": ["oops"]},
+                    "{nie json",
+                    {"op": "no_such_function"},
+                    {"op": "iter_books"},
+                    {"op": "backup_database"},
+                    {"op": "add_book", "args": {"wrong": 1}},
+                    add("Ostatnia"))
+    output = str(db / "results.jsonl")
+    result = cli.run_batch(ops, group_size=100, output=output)
+
+    assert result["code"] == 200, result["message"]
+    assert result["data"]["groups"] == 1
+    assert result["data"]["codes"] == {201: 2, 400: 6}
+    assert result["data"]["failed"] == 6
+    assert get_total_books()["data"] == 2
+    results = read_results(output)
+    assert [row["line"] for row in results] == list(range(1, 9))
+    assert [row["code"] for row in results] == [201, 400, 400, 400, 400, 400, 400, 201]
+
+
+def test_unexpected_exception_is_reported_per_operation(db, monkeypatch):
+    def explode():
+        raise RuntimeError("awaria")
+
+    functions = {**cli.commands(), "explode": explode}
+    monkeypatch.setattr(cli, "commands", lambda: functions)
+    ops = write_ops(db / "ops.jsonl", add("A"), {"op": "explode"}, add("B"))
+    result = cli.run_batch(ops, group_size=3)
+    assert result["data"]["codes"] == {201: 2, 500: 1}
+    assert get_total_books()["data"] == 2
+
+
+def test_aborted_transaction_rolls_back_only_its_group(db, monkeypatch):
+    def abort_transaction():
+        with get_connection() as conn:
+            conn.execute("ROLLBACK;")
+        raise sqlite3.OperationalError("disk I/O error")
+
+    functions = {**cli.commands(), "abort_transaction": abort_transaction}
+    monkeypatch.setattr(cli, "commands", lambda: functions)
+    ops = write_ops(db / "ops.jsonl", add("A"), {"op": "abort_transaction"}, add("B"), add("C"))
+    output = str(db / "results.jsonl")
+    result = cli.run_batch(ops, group_size=2, output=output)
+
+    assert result["data"]["groups"] == 2
+    assert [row["code"] for row in read_results(output)] == [500, 500, 201, 201]
+    assert get_total_books()["data"] == 2
+
+
+@pytest.mark.parametrize("group_size, groups", [(1, 5), (2, 3), (4, 2), (5, 1), (6, 1)])
+def test_group_size_boundaries(db, group_size, groups):
+    ops = write_ops(db / "ops.jsonl", *(add(f"Książka {i}") for i in range(5)))
+    result = cli.run_batch(ops, group_size=group_size)
+    assert result["data"]["groups"] == groups
+    assert result["data"]["codes"] == {201: 5}
+    assert get_total_books()["data"] == 5
+
+
+def test_batch_command(db, capsys):
+    ops = write_ops(db / "ops.jsonl", add("A"), add("B"), {"op": "add_book", "args": ["oops"]})
+    assert cli.main(["batch", ops, "--group-size", "2"]) == 1
+    assert json.loads(capsys.readouterr().out)["data"]["codes"] == {"201": 2, "400": 1}
+
+    assert cli.main(["batch", ops, "--group-size", "0"]) == 1
+    assert json.loads(capsys.readouterr().out)["code"] == 400
+    assert cli.run_batch(str(db / "missing.jsonl"))["code"] == 404
@@ -0,0 +1,65 @@
+# test_dashboard.py
+"""Migawka pulpitu (get_dashboard_snapshot) i raport planów zapytań statystyk."""
+from datetime import datetime, timedelta
+
+from bookstore import monitor
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book
+from bookstore.utilities import get_connection
+from tests.conftest import book, book_id, customer_id
+
+
+def add_sales():
+    add_book(book("Lalka", stock=20, price=10.0))
+    add_book(book("Potop", stock=3, price=25.0))
+    add_book(book("Wyprzedana", stock=1, price=5.0))
+    add_book(book("Nowa", stock=12, price=40.0))
+    anna = customer_id("Anna Nowak")
+    customer_id("Jan Kowalski")
+    assert buy_book(anna, "Lalka", 4)["code"] == 200
+    assert buy_book(anna, "Wyprzedana", 1)["code"] == 200
+    # Zakup sprzed roku liczy się do przychodu całkowitego, ale nie do ostatnich 30 dni
+    old_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d %H:%M:%S')
+    with get_connection() as conn:
+        conn.execute("""
+                     INSERT INTO Purchases (CustomerID, BookID, Quantity, PurchaseDate, UnitPrice, LineTotal)
+                     VALUES (?, ?, 2, ?, 25.0, 50.0);
+                     """, (anna, book_id("Potop"), old_date))
+        conn.commit()
+
+
+def test_snapshot_matches_individual_functions(db):
+    add_sales()
+    snapshot = monitor.get_dashboard_snapshot(popular_limit=2, recent_limit=3, low_stock_threshold=5)
+    assert snapshot["code"] == 200, snapshot["message"]
+    data = snapshot["data"]
+
+    assert data["total_books"] == monitor.get_total_books()["data"] == 4
+    assert data["ebooks_unavailable"] == monitor.get_ebooks_unavailable()["data"] == 1
+    assert data["total_customers"] == monitor.get_total_customers()["data"] == 2
+    assert data["total_purchases"] == monitor.get_total_purchases()["data"] == 3
+    assert data["units_sold"] == monitor.get_units_sold()["data"] == 7
+    assert data["popular_books"] == monitor.get_popular_books(limit=2)["data"]
+    assert data["recent_books"] == monitor.get_recent_books(limit=3)["data"]
+    assert data["revenue"] == monitor.get_revenue_statistics()["data"] == {"total_revenue": 95.0,
+                                                                             "monthly_revenue": 45.0}
+    assert data["low_stock_books"] == monitor.get_low_stock_books(threshold=5)["data"]
+
+
+def test_snapshot_of_empty_database(db):
+    data = monitor.get_dashboard_snapshot()["data"]
+    assert (data["total_books"], data["total_customers"], data["total_purchases"], data["units_sold"]) == (0, 0, 0, 0)
+    assert data["revenue"] == {"total_revenue": 0, "monthly_revenue": 0}
+    assert data["popular_books"] == data["recent_books"] == data["low_stock_books"] == []
+
+
+def test_query_plan_report_marks_expected_scans(db):
+    report = monitor.get_query_plan_report()
+    assert report["code"] == 200, report["message"]
+    for entry in report["data"]:
+        assert entry["uses_index"], entry
+        assert all(step.split()[1] in ("Stats", "CONSTANT") for step in entry["expected_scans"])
+    # Skan liczników Stats jest zgłaszany jako oczekiwany, a przychody miesięczne czytane przez klucz główny
+    snapshot = [entry for entry in report["data"] if entry["function"] == "get_dashboard_snapshot"]
+    assert ["SCAN Stats"] in [entry["expected_scans"] for entry in snapshot]
+    assert any(step.startswith("SEARCH RevenueMonthly USING PRIMARY KEY") for entry in snapshot for step in entry["plan"])
@@ -0,0 +1,83 @@
+# test_export.py
+"""Eksport strumieniowy (export_data): kompresja gzip/zstd, plik tymczasowy i import z powrotem."""
+import gzip
+import importlib.util
+
+import pytest
+
+from bookstore import utilities
+from bookstore.file_manager import export_data, import_data
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book
+from bookstore.utilities import get_connection
+from tests.conftest import book, customer_id
+
+TABLES = ("Customers", "Books", "Purchases")
+
+
+@pytest.fixture
+def data(db):
+    for i in range(7):
+        add_book(book(f"Książka, \"{i}\"\nz nową linią", stock=20, price=10.5 + i, author=f"Żółć {i}"))
+    for name in ("Anna Nowak", "Jan Kowalski"):
+        customer = customer_id(name)
+        for i in range(5):
+            assert buy_book(customer, str(i + 1), i + 1)["code"] == 200
+
+
+def rows(table):
+    with get_connection() as conn:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY 1;").fetchall()
+
+
+@pytest.mark.parametrize("table", TABLES)
+def test_gzip_matches_plain_csv(data, table):
+    plain = export_data(table, f"{table}.csv", batch_size=3)
+    assert plain["code"] == 200, plain["message"]
+    assert plain["data"]["rows"] == len(rows(table))
+    # Kompresja wykrywana z rozszerzenia pliku
+    compressed = export_data(table, f"{table}.csv.gz", batch_size=3)
+    assert compressed["code"] == 200, compressed["message"]
+    with open(plain["data"]["path"], "rb") as file, gzip.open(compressed["data"]["path"], "rb") as gz_file:
+        assert gz_file.read() == file.read()
+
+
+def test_zstd_matches_plain_csv(data):
+    zstandard = pytest.importorskip("zstandard")
+    plain = export_data("Books", "Books.csv")
+    compressed = export_data("Books", "Books.csv.zst")
+    assert compressed["code"] == 200, compressed["message"]
+    with open(plain["data"]["path"], "rb") as file, open(compressed["data"]["path"], "rb") as zst_file:
+        assert zstandard.ZstdDecompressor().stream_reader(zst_file).read() == file.read()
+
+
+@pytest.mark.skipif(importlib.util.find_spec("zstandard") is not None, reason="pakiet zstandard zainstalowany")
+def test_zstd_without_package(data, db):
+    result = export_data("Books", "Books.csv.zst")
+    assert result["code"] == 400
+    assert "zstandard" in result["message"]
+    assert not list(db.glob("Books.csv.zst*"))
+
+
+def test_progress_and_invalid_arguments(data, db):
+    calls = []
+    result = export_data("Purchases", batch_size=4, progress=lambda done, total: calls.append((done, total)))
+    assert result["code"] == 200, result["message"]
+    assert calls == [(4, 10), (8, 10), (10, 10)]
+    assert export_data("Books; DROP TABLE Books")["code"] == 400
+    assert export_data("Books", compression="bz2")["code"] == 400
+    assert not list(db.glob("*.tmp"))
+
+
+def test_gzip_round_trip(data, tmp_path):
+    before = {table: rows(table) for table in TABLES}
+    for table in TABLES:
+        assert export_data(table, f"{table}.csv.gz")["code"] == 200
+
+    # Import do nowej, pustej bazy
+    utilities.configure_pool(str(tmp_path / "copy.db"))
+    utilities.initialize_database()
+    for table in TABLES:
+        result = import_data(table, f"{table}.csv.gz")
+        assert result["code"] == 200, result["message"]
+    assert {table: rows(table) for table in TABLES} == before
@@ -0,0 +1,81 @@
+# test_export_all.py
+"""Eksport i import wielu tabel (export_all/import_all): wspólna migawka i przenoszenie danych."""
+import threading
+
+import pytest
+
+from bookstore import utilities
+from bookstore.file_manager import export_all, import_all
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book
+from bookstore.utilities import get_connection
+from tests.conftest import book, customer_id
+
+TABLES = ("Customers", "Books", "Purchases")
+
+
+@pytest.fixture
+def data(db):
+    for i in range(9):
+        add_book(book(f"Książka {i}", stock=50, price=12.25 + i))
+    for name in ("Anna Nowak", "Jan Kowalski", "Ewa Zielińska"):
+        customer = customer_id(name)
+        for i in range(4):
+            assert buy_book(customer, f"Książka {i}", i + 1)["code"] == 200
+
+
+def rows(table):
+    with get_connection() as conn:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY 1;").fetchall()
+
+
+@pytest.mark.parametrize("file_format, compression", [("csv", None), ("csv", "gzip"), ("parquet", None), ("arrow", None)])
+def test_round_trip(data, tmp_path, file_format, compression):
+    if file_format != "csv":
+        pytest.importorskip("pyarrow")
+    before = {table: rows(table) for table in TABLES}
+    result = export_all(file_format=file_format, compression=compression, batch_size=5)
+    assert result["code"] == 200, result["message"]
+    assert {table: info["rows"] for table, info in result["data"]["tables"].items()} \
+        == {table: len(before[table]) for table in TABLES}
+
+    utilities.configure_pool(str(tmp_path / "copy.db"))
+    utilities.initialize_database()
+    result = import_all(file_format=file_format, compression=compression)
+    assert result["code"] == 200, result["message"]
+    assert {table: rows(table) for table in TABLES} == before
+
+
+def test_export_is_one_snapshot(data):
+    before = {table: rows(table) for table in TABLES}
+
+    def buy_in_other_thread():
+        # Zakup zatwierdzony w trakcie eksportu zmienia Books i Purchases
+        writer = threading.Thread(target=lambda: buy_book("Anna Nowak", "Książka 8", 5))
+        writer.start()
+        writer.join()
+
+    calls = []
+
+    def progress(table, done, total):
+        if not calls:
+            buy_in_other_thread()
+        calls.append(table)
+
+    result = export_all(batch_size=2, progress=progress)
+    assert result["code"] == 200, result["message"]
+    assert len(rows("Purchases")) == len(before["Purchases"]) + 1
+
+    # Pliki pochodzą z migawki sprzed zakupu: zgodny stan Books i Purchases
+    utilities.configure_pool(str(utilities.get_pool().db_path) + ".copy")
+    utilities.initialize_database()
+    assert import_all()["code"] == 200
+    assert {table: rows(table) for table in TABLES} == before
+
+
+def test_import_requires_all_files(data, db):
+    assert export_all(tables=["Customers", "Books"])["code"] == 200
+    result = import_all()
+    assert result["code"] == 404
+    assert export_all(tables=["Orders"])["code"] == 400
+    assert import_all(tables=["Orders"])["code"] == 400
@@ -0,0 +1,96 @@
+# test_import.py
+"""Import z pliku: walidacja w tabeli pośredniej i raport pominiętych wierszy."""
+import pytest
+
+from bookstore.file_manager import import_data
+from bookstore.book_Manager import add_book
+from bookstore.utilities import get_connection
+from tests.conftest import book, book_id, customer_id
+
+
+def write_csv(path, *lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path.name
+
+
+def test_books_out_of_range_are_skipped(db):
+    filename = write_csv(db / "books.csv",
+                         "Title,Author,Genre,Price,Stock,DateAdded",
+                         "Dobra,Autor,Test,10.0,3,2024-01-01",
+                         "Ujemna cena,Autor,Test,-1.0,3,2024-01-01",
+                         "Ujemny stan,Autor,Test,10.0,-2,2024-01-01",
+                         "Bez stanu,Autor,Test,10.0,,2024-01-01",
+                         "Cena tekstem,Autor,Test,abc,3,2024-01-01",
+                         "Darmowa,Autor,Test,0,0,2024-01-01")
+    result = import_data("Books", filename)
+    assert result["code"] == 200, result["message"]
+    data = result["data"]
+    assert (data["rows"], data["inserted"]) == (6, 2)
+    assert data["skipped"] == {"invalid_value": 4}
+    assert data["skipped_rows"] == [(3, "invalid_value"), (4, "invalid_value"),
+                                    (5, "invalid_value"), (6, "invalid_value")]
+    with get_connection() as conn:
+        assert conn.execute("SELECT Title FROM Books ORDER BY BookID;").fetchall() == [("Dobra",), ("Darmowa",)]
+
+
+def test_purchases_out_of_range_are_skipped(db):
+    add_book(book("Lalka", price=10.0))
+    anna, lalka = customer_id("Anna Nowak"), book_id("Lalka")
+    filename = write_csv(db / "purchases.csv",
+                         "CustomerID,BookID,Quantity,PurchaseDate,UnitPrice",
+                         f"{anna},{lalka},2,2024-01-01,",
+                         f"{anna},{lalka},-5,2024-01-01,",
+                         f"{anna},{lalka},0,2024-01-01,",
+                         f"{anna},{lalka},1,2024-01-01,-3.0",
+                         f"{anna},999,1,2024-01-01,",
+                         f"999,{lalka},1,2024-01-01,",
+                         f"{anna},{lalka},1,2024-01-01,8.0")
+    result = import_data("Purchases", filename)
+    assert result["code"] == 200, result["message"]
+    data = result["data"]
+    assert (data["rows"], data["inserted"]) == (7, 2)
+    assert data["skipped"] == {"invalid_value": 3, "unknown_book": 1, "unknown_customer": 1}
+    assert data["skipped_rows"] == [(3, "invalid_value"), (4, "invalid_value"), (5, "invalid_value"),
+                                    (6, "unknown_book"), (7, "unknown_customer")]
+    with get_connection() as conn:
+        assert conn.execute("SELECT Quantity, UnitPrice, LineTotal FROM Purchases ORDER BY PurchaseID;").fetchall() \
+            == [(2, 10.0, 20.0), (1, 8.0, 8.0)]
+        assert conn.execute("SELECT MIN(Quantity), MIN(LineTotal) FROM Purchases;").fetchone() == (1, 8.0)
+
+
+def test_skipped_rows_report_is_limited(db, monkeypatch):
+    from bookstore import file_manager
+    monkeypatch.setattr(file_manager, "IMPORT_SKIPPED_REPORT_LIMIT", 2)
+    filename = write_csv(db / "books.csv",
+                         "Title,Author,Genre,Price,Stock,DateAdded",
+                         *(f"Książka {i},Autor,Test,-1.0,1,2024-01-01" for i in range(5)))
+    data = import_data("Books", filename)["data"]
+    assert data["skipped"] == {"invalid_value": 5}
+    assert data["skipped_rows"] == [(2, "invalid_value"), (3, "invalid_value")]
+
+
+def test_columnar_file_is_closed(db, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    from bookstore import file_manager
+    for title in ("A", "B", "C", "D", "E"):
+        add_book(book(title))
+    assert file_manager.export_data("Books", "books.arrow", batch_size=2)["code"] == 200
+
+    opened = []
+    memory_map = pa.memory_map
+
+    def tracking_memory_map(*args, **kwargs):
+        opened.append(memory_map(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(pa, "memory_map", tracking_memory_map)
+    # Przerwane czytanie (np. błąd w trakcie importu) zamyka plik razem z generatorem
+    chunks = file_manager._read_chunks(str(db / "books.arrow"), "arrow", ("Title",))
+    assert list(next(chunks)["Title"]) == ["A", "B"]
+    chunks.close()
+    assert opened and opened[-1].closed
+
+    result = import_data("Books", "books.arrow")
+    assert result["code"] == 200, result["message"]
+    assert result["data"]["updated"] == 5
+    assert len(opened) > 1 and all(source.closed for source in opened)
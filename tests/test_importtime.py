@@ -0,0 +1,8 @@
+# test_importtime.py
+"""Budżet czasu startu CLI i GUI (python -X importtime, benchmarks.bench_importtime)."""
+from benchmarks import bench_importtime
+
+
+def test_startup_within_budget():
+    violations = bench_importtime.check(runs=3)
+    assert not violations, "; ".join(violations)
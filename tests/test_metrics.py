@@ -0,0 +1,101 @@
+# test_metrics.py
+"""Metryki (@instrument): liczniki wywołań, kodów i wierszy, histogram czasu oraz formaty eksportu."""
+import json
+
+import pytest
+
+from bookstore import metrics
+from bookstore.metrics import instrument
+
+
+@pytest.fixture(autouse=True)
+def enabled_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@instrument
+def lookup(code, rows=0):
+    return {"code": code, "message": "OK", "data": list(range(rows))}
+
+
+@instrument
+def failing():
+    raise ValueError("błąd")
+
+
+@instrument
+def rows(count):
+    yield from range(count)
+
+
+def test_counters(monkeypatch):
+    lookup(200, rows=3)
+    lookup(200, rows=2)
+    lookup(404)
+    with pytest.raises(ValueError):
+        failing()
+    data = metrics.get_metrics()
+
+    assert data["test_metrics.lookup"]["calls"] == 3
+    assert data["test_metrics.lookup"]["codes"] == {"200": 2, "404": 1}
+    assert data["test_metrics.lookup"]["errors"] == 1
+    assert data["test_metrics.lookup"]["rows"] == 5
+    assert data["test_metrics.failing"]["codes"] == {"exception": 1}
+    assert data["test_metrics.failing"]["errors"] == 1
+    for name in ("test_metrics.lookup", "test_metrics.failing"):
+        entry = data[name]
+        assert sum(count for _, count in entry["buckets"]) == entry["calls"]
+        assert entry["buckets"][-1][0] == "+Inf"
+        assert 0 < entry["max_seconds"] <= entry["total_seconds"]
+        assert entry["mean_seconds"] == pytest.approx(entry["total_seconds"] / entry["calls"])
+
+    # Wyłączone metryki nie są zbierane
+    monkeypatch.setattr(metrics, "_enabled", False)
+    lookup(200)
+    assert metrics.get_metrics()["test_metrics.lookup"]["calls"] == 3
+
+
+def test_generator_counts_yielded_items():
+    assert list(rows(4)) == [0, 1, 2, 3]
+    # Przerwana iteracja też jest rejestrowana
+    generator = rows(10)
+    next(generator)
+    generator.close()
+    data = metrics.get_metrics()["test_metrics.rows"]
+    assert (data["calls"], data["rows"], data["codes"]) == (2, 5, {"200": 2})
+
+
+def test_prometheus_format():
+    lookup(200, rows=2)
+    lookup(500)
+    text = metrics.to_prometheus()
+    assert text.endswith("\n")
+    assert "# TYPE bookstore_call_duration_seconds histogram" in text
+    assert 'bookstore_call_duration_seconds_bucket{function="test_metrics.lookup",le="+Inf"} 2' in text
+    assert 'bookstore_call_duration_seconds_count{function="test_metrics.lookup"} 2' in text
+    assert 'bookstore_responses_total{function="test_metrics.lookup",code="500"} 1' in text
+    assert 'bookstore_rows_returned_total{function="test_metrics.lookup"} 2' in text
+
+    # Przedziały histogramu są kumulatywne
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+               if line.startswith('bookstore_call_duration_seconds_bucket{function="test_metrics.lookup"')]
+    assert len(buckets) == len(metrics.LATENCY_BUCKETS_NS) + 1
+    assert buckets == sorted(buckets)
+
+
+def test_export_metrics(tmp_path):
+    lookup(200, rows=1)
+    path = tmp_path / "metrics.json"
+    assert metrics.export_metrics(str(path), format="json")["code"] == 200
+    assert json.loads(path.read_text(encoding="utf-8"))["test_metrics.lookup"]["calls"] == 1
+
+    path = tmp_path / "metrics.prom"
+    assert metrics.export_metrics(str(path))["code"] == 200
+    assert path.read_text(encoding="utf-8") == metrics.to_prometheus()
+    assert not (tmp_path / "metrics.prom.tmp").exists()
+
+    assert metrics.export_metrics(str(path), format="xml")["code"] == 400
+    assert metrics.export_metrics(str(tmp_path / "missing" / "metrics.prom"))["code"] == 500
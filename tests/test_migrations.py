@@ -0,0 +1,114 @@
+# test_migrations.py
+"""Migracje schematu: wersja docelowa, ponowne uruchomienie i wznowienie przerwanej migracji."""
+import sqlite3
+
+import pytest
+
+from bookstore import utilities, migrations
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import register_customer, buy_book
+from tests.conftest import book
+
+
+@pytest.fixture
+def base_db(tmp_path, monkeypatch):
+    """Baza z tabelami podstawowymi, bez zastosowanych migracji (user_version = 0)."""
+    utilities.configure_pool(str(tmp_path / "bookstore.db"))
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "MIGRATIONS", [])
+        utilities.initialize_database()
+    yield tmp_path
+    utilities.get_pool().close()
+
+
+def versions():
+    return [version for version, _, _ in migrations.MIGRATIONS]
+
+
+def schema():
+    with utilities.get_connection() as conn:
+        return set(conn.execute("SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%';").fetchall())
+
+
+def test_target_version(base_db):
+    first, latest = versions()[0], versions()[-1]
+    assert migrations.get_schema_version() == 0
+
+    result = migrations.migrate(target_version=first)
+    assert result["code"] == 200, result["message"]
+    assert migrations.get_schema_version() == first
+    assert {step["version"] for step in result["data"]} == {first}
+
+    result = migrations.migrate()
+    assert result["code"] == 200, result["message"]
+    assert migrations.get_schema_version() == latest
+    assert all(step["version"] > first for step in result["data"])
+
+
+def test_rerun_is_noop(base_db):
+    assert migrations.migrate()["data"]
+    before = schema()
+    result = migrations.migrate()
+    assert result["code"] == 200
+    assert result["data"] == []
+    assert schema() == before
+
+
+def test_steps_are_idempotent(base_db):
+    migrations.migrate()
+    add_book(book("Lalka"))
+    register_customer({"Name": "Anna Nowak", "Email": "anna@example.com"})
+    assert buy_book("Anna Nowak", "Lalka", 2)["code"] == 200
+    before = schema()
+
+    # Ponowne wykonanie wszystkich migracji (jak po przerwaniu przed zapisem wersji)
+    with utilities.get_connection() as conn:
+        conn.execute("PRAGMA user_version = 0;")
+    result = migrations.migrate()
+    assert result["code"] == 200, result["message"]
+    assert migrations.get_schema_version() == versions()[-1]
+    assert schema() == before
+    with utilities.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*), SUM(Quantity) FROM Purchases;").fetchone() == (1, 2)
+        assert conn.execute("SELECT Stock FROM Books;").fetchone()[0] == 3
+
+
+def test_interrupted_migration_resumes(base_db, monkeypatch):
+    migrations.migrate()
+    latest = versions()[-1]
+    calls = []
+
+    def interrupted_step(conn):
+        calls.append(conn)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("przerwanie migracji")
+        return {}
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [
+        (latest + 1, "Migracja testowa", [
+            "CREATE TABLE IF NOT EXISTS Extra (ExtraID INTEGER PRIMARY KEY);",
+            interrupted_step,
+            "CREATE INDEX IF NOT EXISTS idx_extra ON Extra (ExtraID);",
+        ]),
+    ])
+    result = migrations.migrate()
+    assert result["code"] == 500
+    # Zapytanie przed krokiem-funkcją zostało zatwierdzone, wersja nie
+    assert migrations.get_schema_version() == latest
+    assert ("table", "Extra") in schema()
+    assert ("index", "idx_extra") not in schema()
+
+    result = migrations.migrate()
+    assert result["code"] == 200, result["message"]
+    assert migrations.get_schema_version() == latest + 1
+    assert ("index", "idx_extra") in schema()
+
+
+def test_create_index_step(base_db):
+    migrations.migrate()
+    step = migrations.create_index("idx_test_author_title", "Books", "Author, Title")
+    with utilities.get_connection() as conn:
+        assert step(conn)["lock_seconds"] > 0
+        assert step(conn) == {"lock_seconds": 0.0}
+        assert not conn.in_transaction
+    assert ("index", "idx_test_author_title") in schema()
@@ -0,0 +1,65 @@
+# test_pagination.py
+"""Paginacja po kluczu (keyset) i strumieniowanie partiami: książki i klienci."""
+import pytest
+
+from bookstore.book_Manager import add_book, get_book, iter_books, remove_book
+from bookstore.customer_Manager import get_customers, iter_customers
+from tests.conftest import book, customer_id
+
+
+def all_pages(fetch, page_size, first_cursor):
+    """Pobiera kolejne strony, przekazując next_cursor jako after_id; zwraca listę stron."""
+    pages, cursor = [], first_cursor
+    while True:
+        result = fetch(page_size=page_size, after_id=cursor)
+        if result["code"] == 404:
+            assert result["next_cursor"] is None
+            return pages
+        pages.append(result["data"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("count, page_size, sizes", [(10, 3, [3, 3, 3, 1]), (9, 3, [3, 3, 3]), (2, 5, [2])])
+def test_book_pages_cover_all_rows_once(db, count, page_size, sizes):
+    for i in range(count):
+        add_book(book(f"Książka {i}"))
+    pages = all_pages(get_book, page_size, 0)
+    assert [len(page) for page in pages] == sizes
+    rows = [row for page in pages for row in page]
+    assert rows == get_book()["data"]
+    assert len({row[0] for row in rows}) == count
+
+
+def test_book_pages_are_stable_under_deletes(db):
+    for i in range(6):
+        add_book(book(f"Książka {i}"))
+    first = get_book(page_size=3)
+    # Usunięcie wiersza z pobranej strony nie przesuwa kolejnych stron (w przeciwieństwie do OFFSET)
+    remove_book(str(first["data"][0][0]))
+    second = get_book(page_size=3, after_id=first["next_cursor"])
+    assert [row[1] for row in first["data"] + second["data"]] == [f"Książka {i}" for i in range(6)]
+
+
+def test_iter_books_is_exhausted(db):
+    assert list(iter_books(batch_size=4)) == []
+    for i in range(8):
+        add_book(book(f"Książka {i}"))
+    batches = list(iter_books(batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 4]
+    assert [row for batch in batches for row in batch] == get_book()["data"]
+
+    add_book(book("Książka 8"))
+    assert [len(batch) for batch in iter_books(batch_size=4)] == [4, 4, 1]
+
+
+def test_customer_pages_and_iterator(db):
+    ids = sorted(customer_id(f"Klient {i}") for i in range(7))
+    pages = all_pages(get_customers, 3, "")
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [row[0] for page in pages for row in page] == ids
+
+    batches = list(iter_customers(batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [row for batch in batches for row in batch] == [row for page in pages for row in page]
@@ -0,0 +1,106 @@
+# test_pool.py
+"""Pula połączeń: ograniczenie liczby połączeń, ponowne wejście w tym samym wątku i zwrot połączeń."""
+import sqlite3
+import threading
+
+import pytest
+
+from bookstore.utilities import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def hold_connection(pool, acquired, release):
+    """Wątek pobierający połączenie i trzymający je do ustawienia `release`."""
+    def run():
+        with pool.connection():
+            acquired.release()
+            release.wait(5)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_nested_checkout_reuses_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+            with pool.connection() as innermost:
+                assert innermost is outer
+        # Po wyjściu z bloku zagnieżdżonego połączenie nadal należy do wątku
+        assert pool.stats()["in_use"] == 1
+    stats = pool.stats()
+    assert (stats["created"], stats["checkouts"], stats["in_use"], stats["idle"]) == (1, 1, 0, 1)
+
+
+def test_pool_is_bounded(pool):
+    acquired, release = threading.Semaphore(0), threading.Event()
+    threads = [hold_connection(pool, acquired, release) for _ in range(2)]
+    for _ in threads:
+        assert acquired.acquire(timeout=5)
+    try:
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+        stats = pool.stats()
+        assert (stats["size"], stats["in_use"], stats["high_water"]) == (2, 2, 2)
+        assert (stats["waits"], stats["timeouts"]) == (1, 1)
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+    assert pool.stats()["created"] == 2
+
+
+def test_waiting_thread_gets_released_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=5)
+    acquired, release = threading.Semaphore(0), threading.Event()
+    thread = hold_connection(pool, acquired, release)
+    assert acquired.acquire(timeout=5)
+    threading.Timer(0.1, release.set).start()
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1;").fetchone() == (1,)
+    thread.join()
+    stats = pool.stats()
+    assert (stats["created"], stats["waits"], stats["timeouts"]) == (1, 1, 0)
+    assert stats["wait_time"] > 0
+    pool.close()
+
+
+def test_uncommitted_transaction_is_rolled_back(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE T (x INTEGER);")
+        conn.commit()
+        conn.execute("INSERT INTO T VALUES (1);")
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM T;").fetchone() == (0,)
+
+
+def test_broken_connection_is_replaced(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), health_check_interval=0)
+    with pool.connection() as conn:
+        broken = conn
+    broken.close()
+    with pool.connection() as conn:
+        assert conn is not broken
+        assert conn.execute("SELECT 1;").fetchone() == (1,)
+    stats = pool.stats()
+    assert (stats["created"], stats["health_check_failures"], stats["size"]) == (2, 1, 1)
+    pool.close()
+
+
+def test_closed_pool_rejects_checkout(pool):
+    with pool.connection():
+        pass
+    pool.close()
+    assert pool.stats()["size"] == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection():
+            pass
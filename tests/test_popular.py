@@ -0,0 +1,78 @@
+# test_popular.py
+"""Rankingi bestsellerów z tabel BookSales/BookSalesDaily w porównaniu z grupowaniem zakupów."""
+from datetime import date, timedelta
+
+import pytest
+
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book
+from bookstore.monitor import get_popular_books
+from bookstore.utilities import get_connection
+from tests.conftest import book, customer_id
+
+END_DAY = date(2024, 3, 31)
+
+
+@pytest.fixture
+def sales(db):
+    """Sześć książek; zakupy w ostatnich 40 dniach przed END_DAY, różne sumy dla każdego okna."""
+    for i in range(6):
+        add_book(book(f"Książka {i}", stock=10_000, author=f"Autor {i}"))
+    anna = customer_id("Anna Nowak")
+    with get_connection() as conn:
+        for day in range(40):
+            for i in range(6):
+                quantity = (i + 1) * (day % 3 + 1) if (day + i) % (i + 2) == 0 else 0
+                if not quantity:
+                    continue
+                assert buy_book(anna, f"Książka {i}", quantity)["code"] == 200
+                conn.execute("UPDATE Purchases SET PurchaseDate = ? WHERE PurchaseID = (SELECT MAX(PurchaseID) FROM Purchases);",
+                             (f"{END_DAY - timedelta(days=day)} 10:00:00",))
+        conn.commit()
+        # Usunięcie i zmiana zakupu aktualizują obie tabele sprzedaży
+        conn.execute("DELETE FROM Purchases WHERE PurchaseID = 5;")
+        conn.execute("UPDATE Purchases SET Quantity = Quantity + 7 WHERE PurchaseID = (SELECT MAX(PurchaseID) FROM Purchases);")
+        conn.commit()
+
+
+def brute_force(limit, start=None, end=None):
+    where = "WHERE date(p.PurchaseDate) BETWEEN ? AND ?" if start else ""
+    with get_connection() as conn:
+        return conn.execute(f"""
+                            SELECT b.Title, b.Author, SUM(p.Quantity) AS Units
+                            FROM Purchases p
+                                     JOIN Books b ON b.BookID = p.BookID
+                            {where}
+                            GROUP BY p.BookID
+                            ORDER BY Units DESC
+                            LIMIT ?;
+                            """, ((start, end) if start else ()) + (limit,)).fetchall()
+
+
+def assert_ranking(result, expected):
+    assert result["code"] == 200, result["message"]
+    assert [row[2] for row in result["data"]] == [row[2] for row in expected]
+    # Remisy mogą wystąpić w dowolnej kolejności - porównywane są zbiory książek
+    assert sorted(result["data"]) == sorted(expected)
+
+
+@pytest.mark.parametrize("limit", [1, 3, 6, 10])
+def test_top_k_matches_brute_force(sales, limit):
+    assert_ranking(get_popular_books(limit=limit), brute_force(limit))
+
+
+@pytest.mark.parametrize("days", [1, 7, 30, 365])
+@pytest.mark.parametrize("limit", [2, 6])
+def test_trending_matches_brute_force(sales, days, limit):
+    start = (END_DAY - timedelta(days=days - 1)).isoformat()
+    result = get_popular_books(limit=limit, days=days, end_date=END_DAY.isoformat())
+    assert_ranking(result, brute_force(limit, start, END_DAY.isoformat()))
+
+
+def test_window_without_sales(sales):
+    assert get_popular_books(days=7, end_date="2023-01-01")["code"] == 404
+
+
+def test_invalid_parameters(db):
+    assert get_popular_books(days=0)["code"] == 400
+    assert get_popular_books(days=7, end_date="31.03.2024")["code"] == 400
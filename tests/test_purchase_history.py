@@ -0,0 +1,98 @@
+# test_purchase_history.py
+"""Historia zakupów: przedział dat [od, do) i paginacja po kluczu (PurchaseDate, PurchaseID)."""
+import pytest
+
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book
+from bookstore.monitor import get_purchase_history, iter_purchase_history
+from bookstore.utilities import get_connection
+from tests.conftest import book, customer_id
+
+# Daty na granicach dni, kilka zakupów z tą samą datą (remisy rozstrzyga PurchaseID)
+PURCHASE_DATES = [
+    "2024-01-31 23:59:59",
+    "2024-02-01 00:00:00",
+    "2024-02-01 00:00:00",
+    "2024-02-10 12:00:00",
+    "2024-02-10 12:00:00",
+    "2024-02-10 12:00:00",
+    "2024-02-29 23:59:59",
+    "2024-03-01 00:00:00",
+]
+
+
+@pytest.fixture
+def purchases(db):
+    add_book(book("Lalka", stock=100))
+    anna = customer_id("Anna Nowak")
+    with get_connection() as conn:
+        for purchase_date in PURCHASE_DATES:
+            assert buy_book(anna, "Lalka", 1)["code"] == 200
+            conn.execute("UPDATE Purchases SET PurchaseDate = ? WHERE PurchaseID = (SELECT MAX(PurchaseID) FROM Purchases);",
+                         (purchase_date,))
+        conn.commit()
+
+
+def expected(start=None, end=None):
+    """Identyfikatory zakupów z zakresu dat (włącznie), od najnowszych."""
+    with get_connection() as conn:
+        return [row[0] for row in conn.execute("""
+                                               SELECT PurchaseID
+                                               FROM Purchases
+                                               WHERE date(PurchaseDate) BETWEEN ? AND ?
+                                               ORDER BY PurchaseDate DESC, PurchaseID DESC;
+                                               """, (start or "0000-01-01", end or "9999-12-31"))]
+
+
+def ids(rows):
+    return [row[0] for row in rows]
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2024-02-01", "2024-02-29"),  # pierwsza i ostatnia sekunda miesiąca wchodzą, sąsiednie dni nie
+    ("2024-02-10", "2024-02-10"),  # jeden dzień
+    ("2024-01-31", None),
+    (None, "2024-02-01"),
+    ("2024-03-02", "2024-03-31"),  # brak zakupów
+])
+def test_date_range_is_inclusive_by_day(purchases, start, end):
+    result = get_purchase_history(start, end)
+    assert result["code"] == (200 if expected(start, end) else 404)
+    assert ids(result["data"]) == expected(start, end)
+
+
+def test_february_bounds(purchases):
+    dates = [row[4] for row in get_purchase_history("2024-02-01", "2024-02-29")["data"]]
+    assert dates[0] == "2024-02-29 23:59:59"
+    assert dates[-1] == "2024-02-01 00:00:00"
+    assert "2024-01-31 23:59:59" not in dates and "2024-03-01 00:00:00" not in dates
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 6, 7])
+def test_pages_follow_after_cursor(purchases, page_size):
+    pages, after = [], None
+    while True:
+        result = get_purchase_history("2024-02-01", "2024-02-29", page_size=page_size, after=after)
+        if result["code"] == 404:
+            break
+        assert len(result["data"]) <= page_size
+        pages.append(ids(result["data"]))
+        after = result["next_cursor"]
+        if after is None:
+            break
+    # Strony bez luk i powtórzeń, także przy zakupach o tej samej dacie
+    assert [purchase for page in pages for purchase in page] == expected("2024-02-01", "2024-02-29")
+
+
+def test_iterator_matches_pages(purchases):
+    batches = list(iter_purchase_history("2024-02-01", "2024-02-29", batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 2]
+    assert [purchase for batch in batches for purchase in ids(batch)] == expected("2024-02-01", "2024-02-29")
+    assert ids(next(iter_purchase_history(batch_size=100))) == expected()
+
+
+def test_recent_limit_and_invalid_date(purchases, monkeypatch):
+    from bookstore import monitor
+    monkeypatch.setattr(monitor, "PURCHASE_HISTORY_RECENT_LIMIT", 3)
+    assert ids(get_purchase_history()["data"]) == expected()[:3]
+    assert get_purchase_history("2024/02/01")["code"] == 400
@@ -0,0 +1,30 @@
+# test_purchases.py
+"""Historia zakupów klienta: pola CustomerPurchase i cena z chwili zakupu."""
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import CustomerPurchase, buy_book, get_customer_purchases
+from bookstore.utilities import get_connection
+from tests.conftest import book, customer_id
+
+
+def test_line_total_is_frozen_after_price_change(db):
+    add_book(book("Lalka", price=10.0))
+    anna = customer_id("Anna Nowak")
+    assert buy_book(anna, "Lalka", 3)["code"] == 200
+    with get_connection() as conn:
+        conn.execute("UPDATE Books SET Price = 25.0 WHERE Title = 'Lalka';")
+        conn.commit()
+
+    result = get_customer_purchases("Anna Nowak")
+    assert result["code"] == 200, result["message"]
+    [purchase] = result["data"]
+    assert isinstance(purchase, CustomerPurchase)
+    assert (purchase.Name, purchase.Title, purchase.Quantity) == ("Anna Nowak", "Lalka", 3)
+    assert (purchase.UnitPrice, purchase.LineTotal) == (10.0, 30.0)
+    # Indeksy 0-4 jak w dawnej krotce, pod indeksem 5 cena z chwili zakupu
+    assert purchase[3] * purchase[5] == purchase.LineTotal
+
+
+def test_no_purchases(db):
+    customer_id("Anna Nowak")
+    assert get_customer_purchases("Anna Nowak")["code"] == 404
+    assert get_customer_purchases("Nieznany Klient")["code"] == 404
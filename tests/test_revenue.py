@@ -0,0 +1,94 @@
+# test_revenue.py
+"""Przychody z tabel RevenueDaily/Weekly/Monthly (get_revenue) w porównaniu z sumą po zakupach."""
+from datetime import date, timedelta
+
+import pytest
+
+from bookstore.book_Manager import add_book
+from bookstore.customer_Manager import buy_book
+from bookstore.monitor import get_revenue
+from bookstore.utilities import get_connection
+from tests.conftest import book, customer_id
+
+FIRST_DAY = date(2024, 1, 1)
+
+
+@pytest.fixture
+def sales(db):
+    """Zakupy co 4 dni od 2024-01-01 do 2024-03-30 (23 zakupy), kilka książek w różnych cenach."""
+    add_book(book("Tania", stock=1000, price=9.99))
+    add_book(book("Droga", stock=1000, price=42.5))
+    anna = customer_id("Anna Nowak")
+    with get_connection() as conn:
+        for i in range(23):
+            assert buy_book(anna, "Tania" if i % 3 else "Droga", i % 4 + 1)["code"] == 200
+            # Data zakupu przesuwana wstecz - wyzwalacz zmiany przenosi przychód do właściwych okresów
+            conn.execute("UPDATE Purchases SET PurchaseDate = ? WHERE PurchaseID = (SELECT MAX(PurchaseID) FROM Purchases);",
+                         (f"{FIRST_DAY + timedelta(days=4 * i)} 12:00:00",))
+        conn.commit()
+        # Usunięty zakup odejmowany jest od tabel przychodów
+        conn.execute("DELETE FROM Purchases WHERE PurchaseDate LIKE '2024-02-02%';")
+        conn.commit()
+
+
+def period_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def brute_force(start, end, granularity):
+    """Przychód liczony wprost z tabeli Purchases (bez tabel przychodów)."""
+    with get_connection() as conn:
+        rows = conn.execute("""
+                            SELECT date(p.PurchaseDate), p.Quantity * b.Price, p.Quantity
+                            FROM Purchases p
+                                     JOIN Books b ON b.BookID = p.BookID
+                            WHERE date(p.PurchaseDate) BETWEEN ? AND ?;
+                            """, (start, end)).fetchall()
+    periods = {}
+    for day, revenue, units in rows:
+        key = period_start(date.fromisoformat(day), granularity).isoformat()
+        totals = periods.setdefault(key, [0.0, 0, 0])
+        totals[0] += revenue
+        totals[1] += units
+        totals[2] += 1
+    return [(key, round(revenue, 2), units, purchases) for key, (revenue, units, purchases) in sorted(periods.items())]
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+@pytest.mark.parametrize("start, end", [
+    ("2024-01-01", "2024-03-31"),  # cały zakres
+    ("2024-01-10", "2024-02-20"),  # niepełne okresy na obu krańcach
+    ("2024-01-03", "2024-01-06"),  # zakres wewnątrz jednego tygodnia
+    ("2024-02-01", "2024-02-29"),  # dokładnie jeden miesiąc
+    ("2024-01-29", "2024-02-04"),  # tydzień na przełomie miesięcy
+    ("2024-01-05", "2024-01-05"),  # jeden dzień
+    ("2023-06-01", "2023-12-31"),  # bez sprzedaży
+])
+def test_revenue_matches_brute_force(sales, granularity, start, end):
+    result = get_revenue(start, end, granularity)
+    assert result["code"] == 200, result["message"]
+    expected = brute_force(start, end, granularity)
+    data = result["data"]
+    assert [row[0] for row in data["periods"]] == [row[0] for row in expected]
+    for row, expected_row in zip(data["periods"], expected):
+        assert row[1] == pytest.approx(expected_row[1])
+        assert row[2:] == expected_row[2:]
+    assert data["total"]["revenue"] == pytest.approx(sum(row[1] for row in expected))
+    assert data["total"]["units"] == sum(row[2] for row in expected)
+    assert data["total"]["purchases"] == sum(row[3] for row in expected)
+
+
+def test_default_start_is_first_sale(sales):
+    data = get_revenue(end_date="2024-03-31", granularity="month")["data"]
+    assert data["start_date"] == FIRST_DAY.isoformat()
+    assert [row[0] for row in data["periods"]] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    assert data["total"]["purchases"] == 22
+
+
+def test_invalid_parameters(db):
+    assert get_revenue(granularity="year")["code"] == 400
+    assert get_revenue(start_date="01.02.2024")["code"] == 400
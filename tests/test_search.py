@@ -0,0 +1,63 @@
+# test_search.py
+"""Wyszukiwanie pełnotekstowe (FTS5): budowa zapytań, dopasowanie prefiksów i kolejność trafności."""
+from bookstore.utilities import build_fts_query
+from bookstore.book_Manager import add_book, get_book, remove_book, search_books
+from bookstore.monitor import get_books_by_genre
+from tests.conftest import book
+
+
+def titles(result):
+    assert result["code"] == 200, result["message"]
+    return [row[1] for row in result["data"]]
+
+
+def test_build_fts_query():
+    assert build_fts_query("harry pot") == '"harry"* AND "pot"*'
+    assert build_fts_query("Lalka", columns=("Title",)) == '{Title} : ("Lalka"*)'
+    assert build_fts_query("Pan", columns=("Title", "Author")) == '{Title Author} : ("Pan"*)'
+    assert build_fts_query("  !?  ") is None
+    assert build_fts_query("") is None
+
+
+def test_build_fts_query_neutralizes_syntax():
+    # Operatory, nazwy kolumn i cudzysłowy użytkownika stają się zwykłymi słowami w cudzysłowie
+    assert build_fts_query('tolkien OR NOT "hobbit"') == '"tolkien"* AND "OR"* AND "NOT"* AND "hobbit"*'
+    assert build_fts_query("Title:kot* NEAR(a b)") == '"Title"* AND "kot"* AND "NEAR"* AND "a"* AND "b"*'
+
+
+def test_operator_words_are_searched_literally(db):
+    add_book(book("Wojna OR pokój"))
+    add_book(book("Wojna"))
+    assert titles(search_books("wojna or")) == ["Wojna OR pokój"]
+    assert search_books('NOT "wojna"')["code"] == 404
+    assert search_books("(")["code"] == 400
+
+
+def test_prefix_not_substring(db):
+    add_book(book("Harry Potter"))
+    add_book(book("Ósmy cud", genre="Fantastyka"))
+    assert titles(get_book("pot")) == ["Harry Potter"]
+    assert titles(get_book("harry potter")) == ["Harry Potter"]
+    assert get_book("otter")["code"] == 404
+    # Wielkość liter i znaki diakrytyczne bez znaczenia
+    assert titles(get_book("OSMY")) == ["Ósmy cud"]
+
+    assert [row[1] for row in get_books_by_genre("fant")["data"]] == ["Ósmy cud"]
+    assert get_books_by_genre("tastyka")["code"] == 404
+
+
+def test_rank_order(db):
+    # Waga BM25: tytuł > autor > gatunek, niezależnie od kolejności dodania
+    add_book(book("Ryba", author="Anna Nowak", genre="Kot"))
+    add_book(book("Pies", author="Kot Kowalski"))
+    add_book(book("Kot", author="Jan Nowak"))
+    assert titles(search_books("kot")) == ["Kot", "Pies", "Ryba"]
+    assert titles(search_books("kot", limit=1, offset=1)) == ["Pies"]
+    assert titles(search_books("kot", columns=("Author", "Genre"))) == ["Pies", "Ryba"]
+
+
+def test_index_follows_changes(db):
+    add_book(book("Lalka"))
+    assert titles(search_books("lalka")) == ["Lalka"]
+    remove_book("Lalka")
+    assert search_books("lalka")["code"] == 404
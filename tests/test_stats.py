@@ -0,0 +1,103 @@
+# test_stats.py
+"""Liczniki tabeli Stats (wyzwalacze i ręczne korekty w trybie BulkLoad) po każdej ścieżce zapisu."""
+import csv
+import os
+
+from bookstore import utilities
+from bookstore.book_Manager import add_book, add_books, remove_book, remove_books, update_book_stock
+from bookstore.customer_Manager import buy_book, buy_books, remove_customer
+from bookstore.file_manager import import_data
+from bookstore.backup import backup_database, restore_database
+from bookstore.monitor import check_stats_consistency, get_total_books, get_ebooks_unavailable
+from tests.conftest import book, book_id, customer_id
+
+
+def assert_consistent():
+    result = check_stats_consistency(repair=False)
+    assert result["code"] == 200, result["message"]
+
+
+def test_single_operations(db):
+    assert add_book(book("Pierwsza", stock=1))["code"] == 201
+    assert add_book(book("Druga", stock=0))["code"] == 201
+    assert add_book(book("Trzecia"))["code"] == 201
+    anna = customer_id("Anna Nowak")
+    customer_id("Jan Kowalski")
+
+    assert buy_book(anna, str(book_id("Pierwsza")), 1)["code"] == 200  # stan 1 -> 0
+    assert buy_books(anna, [(book_id("Trzecia"), 2), ("Trzecia", 1)])["code"] == 200
+    assert update_book_stock(book_id("Druga"), 3)["code"] == 200  # stan 0 -> 3
+    assert remove_book("Trzecia")["code"] == 200
+    assert remove_customer("Jan Kowalski")["code"] == 200
+
+    assert_consistent()
+    assert get_total_books()["data"] == 2
+    assert get_ebooks_unavailable()["data"] == 1
+
+
+def test_rejected_purchase_does_not_change_counters(db):
+    add_book(book("Jedyna", stock=1))
+    anna = customer_id("Anna Nowak")
+    assert buy_book(anna, "Jedyna", 2)["code"] == 400
+    assert buy_book(anna, "Jedyna", 0)["code"] == 400
+    assert buy_book(anna, "Jedyna", -3)["code"] == 400
+    assert_consistent()
+    with utilities.get_connection() as conn:
+        assert conn.execute("SELECT Stock FROM Books;").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM Purchases;").fetchone()[0] == 0
+
+
+def test_bulk_operations(db):
+    books = [book(f"Partia {i}", stock=i % 3) for i in range(60)]
+    result = add_books(books, batch_size=25)
+    assert result["code"] == 201, result["message"]
+    assert_consistent()
+
+    ids = [book_id(f"Partia {i}") for i in range(0, 60, 2)]
+    assert remove_books(ids, batch_size=7)["code"] == 200
+    assert_consistent()
+    assert get_total_books()["data"] == 30
+    assert get_ebooks_unavailable()["data"] == sum(1 for i in range(1, 60, 2) if i % 3 == 0)
+
+
+def test_import(db):
+    add_book(book("Istniejąca", stock=0))
+    path = os.path.join(db, "books.csv")
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Title", "Author", "Genre", "Price", "Stock", "DateAdded"])
+        writer.writerow(["Istniejąca", "Autor Testowy", "Test", 12.5, 4, "2026-01-01 10:00:00"])  # stan 0 -> 4
+        writer.writerow(["Nowa", "Autor Testowy", "Test", 8.0, 0, "2026-01-02 10:00:00"])
+        writer.writerow(["Druga nowa", "Autor Testowy", "Test", 9.0, 2, "2026-01-03 10:00:00"])
+    result = import_data("Books")
+    assert result["code"] == 200, result["message"]
+    assert_consistent()
+    assert get_total_books()["data"] == 3
+    assert get_ebooks_unavailable()["data"] == 1
+
+
+def test_restore(db):
+    add_books([book(f"Kopia {i}", stock=i % 2) for i in range(10)])
+    backup = backup_database()
+    assert backup["code"] == 200, backup["message"]
+
+    add_books([book(f"Po kopii {i}", stock=0) for i in range(5)])
+    remove_book("Kopia 1")
+    result = restore_database(os.path.basename(backup["data"]["path"]))
+    assert result["code"] == 200, result["message"]
+    assert_consistent()
+    assert get_total_books()["data"] == 10
+    assert get_ebooks_unavailable()["data"] == 5
+
+
+def test_drift_is_detected_and_repaired(db):
+    add_book(book("Jedyna"))
+    with utilities.get_connection() as conn:
+        conn.execute("UPDATE Stats SET Value = Value + 5 WHERE Name = 'books';")
+        conn.commit()
+
+    result = check_stats_consistency(repair=False)
+    assert result["code"] == 409
+    assert {row["name"] for row in result["data"] if row["stored"] != row["actual"]} == {"books"}
+    assert check_stats_consistency()["code"] == 409
+    assert_consistent()
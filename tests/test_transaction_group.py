@@ -0,0 +1,49 @@
+# test_transaction_group.py
+"""Grupa transakcji (tryb wsadowy CLI) a cache statystyk: unieważnianie dopiero po zatwierdzeniu."""
+import threading
+
+import pytest
+
+from bookstore import cache, utilities
+from bookstore.book_Manager import add_book
+from bookstore.monitor import get_total_books
+from tests.conftest import book
+
+
+@pytest.fixture(autouse=True)
+def enabled_cache(monkeypatch):
+    monkeypatch.setattr(cache, "_enabled", True)
+
+
+def total_books_in_other_thread():
+    """Odczyt (i zapamiętanie w cache) z osobnego wątku - osobne połączenie, migawka sprzed COMMIT."""
+    results = []
+    reader = threading.Thread(target=lambda: results.append(get_total_books()["data"]))
+    reader.start()
+    reader.join()
+    return results[0]
+
+
+def test_reader_during_group_does_not_cache_stale_value(db):
+    add_book(book("Przed grupą"))
+    assert get_total_books()["data"] == 1
+    with utilities.transaction_group() as group:
+        with group.operation():
+            assert add_book(book("W grupie"))["code"] == 201
+        # Wątek grupy widzi własne zmiany, inne wątki - stan zatwierdzony
+        assert get_total_books()["data"] == 2
+        assert total_books_in_other_thread() == 1
+    assert get_total_books()["data"] == 2
+    assert total_books_in_other_thread() == 2
+
+
+def test_rolled_back_group_invalidates_cache(db):
+    add_book(book("Przed grupą"))
+    with pytest.raises(RuntimeError):
+        with utilities.transaction_group() as group:
+            with group.operation():
+                add_book(book("Wycofana"))
+            assert total_books_in_other_thread() == 1
+            raise RuntimeError("przerwanie grupy")
+    assert get_total_books()["data"] == 1
+    assert total_books_in_other_thread() == 1